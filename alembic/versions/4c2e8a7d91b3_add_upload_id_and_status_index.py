@@ -0,0 +1,28 @@
+"""add upload_id and (status, created_at) index to videos
+
+Revision ID: 4c2e8a7d91b3
+Revises: 1b979b188f9a
+Create Date: 2026-10-17 09:12:44.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c2e8a7d91b3'
+down_revision = '1b979b188f9a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lưu S3 UploadId để reaper có thể abort multipart upload bị bỏ dở
+    op.add_column('videos', sa.Column('upload_id', sa.String(length=255), nullable=True))
+    # Reaper quét status = 'uploading' AND created_at < cutoff
+    op.create_index('ix_videos_status_created_at', 'videos', ['status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_status_created_at', table_name='videos')
+    op.drop_column('videos', 'upload_id')
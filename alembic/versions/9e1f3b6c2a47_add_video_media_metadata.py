@@ -0,0 +1,29 @@
+"""add media metadata columns to videos
+
+Revision ID: 9e1f3b6c2a47
+Revises: 4c2e8a7d91b3
+Create Date: 2026-10-17 10:02:15.771930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e1f3b6c2a47'
+down_revision = '4c2e8a7d91b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Được worker điền sau khi probe file (ffprobe), không nằm trên critical path của complete
+    op.add_column('videos', sa.Column('video_codec', sa.String(length=50), nullable=True))
+    op.add_column('videos', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('videos', sa.Column('height', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'height')
+    op.drop_column('videos', 'width')
+    op.drop_column('videos', 'video_codec')
@@ -0,0 +1,42 @@
+"""keep keyword_batch_jobs rows after release to count attempts per job
+
+Revision ID: a6e2d8b4c137
+Revises: f3c7a9d2b518
+Create Date: 2026-10-18 21:14:36.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e2d8b4c137'
+down_revision = 'f3c7a9d2b518'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'keyword_batch_jobs',
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'),
+    )
+    op.alter_column('keyword_batch_jobs', 'attempts', server_default=None)
+    # Xoá batch → batch_id NULL (nhả claim) thay vì xoá row, số lần thử được giữ lại
+    op.alter_column('keyword_batch_jobs', 'batch_id', nullable=True)
+    op.drop_constraint('keyword_batch_jobs_batch_id_fkey', 'keyword_batch_jobs', type_='foreignkey')
+    op.create_foreign_key(
+        'keyword_batch_jobs_batch_id_fkey', 'keyword_batch_jobs', 'keyword_batches',
+        ['batch_id'], ['id'], ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM keyword_batch_jobs WHERE batch_id IS NULL")
+    op.drop_constraint('keyword_batch_jobs_batch_id_fkey', 'keyword_batch_jobs', type_='foreignkey')
+    op.create_foreign_key(
+        'keyword_batch_jobs_batch_id_fkey', 'keyword_batch_jobs', 'keyword_batches',
+        ['batch_id'], ['id'], ondelete='CASCADE',
+    )
+    op.alter_column('keyword_batch_jobs', 'batch_id', nullable=False)
+    op.drop_column('keyword_batch_jobs', 'attempts')
@@ -0,0 +1,30 @@
+"""add (user_id, created_at desc, id desc) index to videos
+
+Revision ID: b7d4e1f0c853
+Revises: 9e1f3b6c2a47
+Create Date: 2026-10-17 14:20:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d4e1f0c853'
+down_revision = '9e1f3b6c2a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset pagination của /uploads/my-videos đọc thẳng theo thứ tự index, không sort
+    op.create_index(
+        'ix_videos_user_id_created_at_id',
+        'videos',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_user_id_created_at_id', table_name='videos')
@@ -0,0 +1,70 @@
+"""convert video_jobs transcript / render_config to JSONB
+
+Revision ID: d5a9c2f4e716
+Revises: b7d4e1f0c853
+Create Date: 2026-10-18 09:12:37.284511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9c2f4e716'
+down_revision = 'b7d4e1f0c853'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = ('transcript', 'render_config')
+
+
+def _create_video_jobs() -> None:
+    """
+    Trước revision này video_jobs không có migration tạo bảng (tạo ngoài alembic).
+    DB mới → tạo bảng ở đây, dạng như tại revision này (cột JSON đã là JSONB),
+    để các revision sau luôn có video_jobs thay vì bỏ qua trong im lặng.
+    """
+    op.create_table(
+        'video_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('input_file_path', sa.String(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('UPLOADED', 'QUEUED', 'PROCESSING', 'COMPLETED', 'FAILED', name='jobstatus'),
+            nullable=True,
+        ),
+        sa.Column('transcript', postgresql.JSONB(), nullable=True),
+        sa.Column('render_config', postgresql.JSONB(), nullable=True),
+        sa.Column('output_file_paths', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('video_jobs'):
+        _create_video_jobs()
+        return
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'video_jobs', column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+
+def downgrade() -> None:
+    # Giữ bảng (có thể đã được tạo ngoài alembic trước revision này), chỉ đổi kiểu về JSON
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'video_jobs', column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::json',
+        )
@@ -0,0 +1,143 @@
+"""move video_jobs.transcript into compact video_job_transcripts table
+
+Revision ID: e8b3f6a1d924
+Revises: d5a9c2f4e716
+Create Date: 2026-10-18 11:03:52.917406
+
+"""
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f6a1d924'
+down_revision = 'd5a9c2f4e716'
+branch_labels = None
+depends_on = None
+
+
+# ── Codec đóng băng tại revision này ──────────────────────────────────────────
+# Không import transcript_codec / value_objects: format ứng dụng đổi về sau (v2) thì
+# migration vẫn ghi đúng blob v1 như lúc viết. Downgrade đọc được cả v1 và v2
+# (format ứng dụng ghi vào bảng sau revision này).
+
+_MAGIC = b"TRW"
+_HEADER = struct.Struct("<3sBII")
+
+
+def _le_bytes(typecode: str, values) -> bytes:
+    values = array(typecode, values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _le_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _encode_words_v1(words: List[Dict[str, Any]]) -> bytes:
+    """header | start[n] | end[n] | confidence[n] (f64) | word_index[n] u32 | string_len[m] u32 | strings"""
+    strings: Dict[str, int] = {}
+    word_index = [strings.setdefault(w['word'], len(strings)) for w in words]
+    encoded = [s.encode('utf-8') for s in strings]
+    return b"".join([
+        _HEADER.pack(_MAGIC, 1, len(words), len(encoded)),
+        _le_bytes('d', (float(w['start']) for w in words)),
+        _le_bytes('d', (float(w['end']) for w in words)),
+        _le_bytes('d', (float(w['confidence']) for w in words)),
+        _le_bytes('I', word_index),
+        _le_bytes('I', (len(s) for s in encoded)),
+        *encoded,
+    ])
+
+
+def _decode_words(data: bytes) -> List[Dict[str, Any]]:
+    magic, version, n, size = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+
+    def take(typecode: str, count: int) -> array:
+        nonlocal offset
+        length = array(typecode).itemsize * count
+        values = _le_array(typecode, data[offset:offset + length])
+        offset += length
+        return values
+
+    starts, ends, confidences = take('d', n), take('d', n), take('d', n)
+    if magic == _MAGIC and version == 1:
+        # size = số string trong string table
+        word_index, string_lengths = take('I', n), take('I', size)
+        strings = []
+        for length in string_lengths:
+            strings.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+        words = [strings[i] for i in word_index]
+    elif magic == _MAGIC and version == 2:
+        # size = số byte text; offsets[n+1] tính theo ký tự
+        offsets = take('I', n + 1)
+        text = data[offset:offset + size].decode('utf-8')
+        words = [text[offsets[i]:offsets[i + 1]] for i in range(n)]
+    else:
+        raise ValueError(f"Unsupported transcript encoding: {magic!r} v{version}")
+
+    return [
+        {'word': w, 'start': s, 'end': e, 'confidence': c}
+        for w, s, e, c in zip(words, starts, ends, confidences)
+    ]
+
+
+def upgrade() -> None:
+    transcripts = op.create_table(
+        'video_job_transcripts',
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('full_text', sa.Text(), nullable=False),
+        sa.Column('word_count', sa.Integer(), nullable=False),
+        sa.Column('words', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['video_jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id'),
+    )
+
+    # Chuyển transcript JSONB hiện có sang dạng cột
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, transcript FROM video_jobs WHERE transcript IS NOT NULL")).all()
+    now = datetime.utcnow()
+    for job_id, transcript in rows:
+        words = transcript.get('words', [])
+        op.bulk_insert(transcripts, [{
+            'job_id': job_id,
+            'full_text': transcript.get('full_text', ''),
+            'word_count': len(words),
+            'words': _encode_words_v1(words),
+            'updated_at': now,
+        }])
+
+    op.drop_column('video_jobs', 'transcript')
+
+
+def downgrade() -> None:
+    op.add_column('video_jobs', sa.Column('transcript', postgresql.JSONB(), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT job_id, full_text, words FROM video_job_transcripts")).all()
+    for job_id, full_text, blob in rows:
+        transcript = {'full_text': full_text, 'words': _decode_words(blob)}
+        bind.execute(
+            sa.text("UPDATE video_jobs SET transcript = :transcript WHERE id = :id").bindparams(
+                sa.bindparam('transcript', type_=postgresql.JSONB())
+            ),
+            {'transcript': transcript, 'id': job_id},
+        )
+
+    op.drop_table('video_job_transcripts')
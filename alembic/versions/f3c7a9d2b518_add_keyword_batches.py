@@ -0,0 +1,46 @@
+"""add keyword_batches / keyword_batch_jobs for Gemini batch keyword extraction
+
+Revision ID: f3c7a9d2b518
+Revises: e8b3f6a1d924
+Create Date: 2026-10-18 16:42:07.281954
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c7a9d2b518'
+down_revision = 'e8b3f6a1d924'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'keyword_batches',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('requests', postgresql.JSONB(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('submitted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    # PK job_id: một job chỉ thuộc một batch đang mở; xoá batch → nhả claim
+    op.create_table(
+        'keyword_batch_jobs',
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('batch_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['video_jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['batch_id'], ['keyword_batches.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id'),
+    )
+    op.create_index('ix_keyword_batch_jobs_batch_id', 'keyword_batch_jobs', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_keyword_batch_jobs_batch_id', table_name='keyword_batch_jobs')
+    op.drop_table('keyword_batch_jobs')
+    op.drop_table('keyword_batches')
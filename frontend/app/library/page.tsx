@@ -1,7 +1,7 @@
 'use client';
 
-import React from 'react';
-import { useQuery } from '@tanstack/react-query';
+import React, { useState } from 'react';
+import { useInfiniteQuery } from '@tanstack/react-query';
 import { api, Video } from '@/lib/api';
 import VideoRow from '@/components/VideoRow';
 import Shell, { useSearch } from '@/components/Shell';
@@ -17,10 +17,14 @@ export default function LibraryPage() {
 
 function LibraryContent() {
     const { searchQuery } = useSearch();
-    const { data: videos, isLoading } = useQuery({
-        queryKey: ['videos'],
-        queryFn: api.listVideos,
+    const [statusFilter, setStatusFilter] = useState<Video['status'] | undefined>(undefined);
+    const { data, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useInfiniteQuery({
+        queryKey: ['videos', statusFilter ?? 'all'],
+        queryFn: ({ pageParam }) => api.listVideos({ cursor: pageParam, status: statusFilter }),
+        initialPageParam: null as string | null,
+        getNextPageParam: (lastPage) => lastPage.next_cursor,
     });
+    const videos = data?.pages.flatMap((page) => page.items);
 
     const filteredVideos = videos?.filter((v: Video) =>
         v.original_filename.toLowerCase().includes(searchQuery.toLowerCase())
@@ -34,8 +38,17 @@ function LibraryContent() {
                     <p className="text-sm text-gray-500 dark:text-gray-400 font-medium">Manage and monitor your processed videos</p>
                 </div>
                 <div className="flex bg-gray-100 dark:bg-white/5 p-1 rounded-full shadow-inner">
-                    <button className="px-6 py-1.5 rounded-full text-xs font-bold bg-white dark:bg-white/10 text-black dark:text-white shadow-sm">All</button>
-                    <button className="px-6 py-1.5 rounded-full text-xs font-medium text-gray-500 dark:text-gray-400 hover:text-gray-900 dark:hover:text-white transition-colors">Completed</button>
+                    {([['All', undefined], ['Completed', 'completed']] as const).map(([label, value]) => (
+                        <button
+                            key={label}
+                            onClick={() => setStatusFilter(value)}
+                            className={statusFilter === value
+                                ? 'px-6 py-1.5 rounded-full text-xs font-bold bg-white dark:bg-white/10 text-black dark:text-white shadow-sm'
+                                : 'px-6 py-1.5 rounded-full text-xs font-medium text-gray-500 dark:text-gray-400 hover:text-gray-900 dark:hover:text-white transition-colors'}
+                        >
+                            {label}
+                        </button>
+                    ))}
                 </div>
             </div>
 
@@ -45,10 +58,21 @@ function LibraryContent() {
                     <p className="text-sm font-bold text-gray-500 dark:text-gray-400 uppercase tracking-widest">Loading assets...</p>
                 </div>
             ) : filteredVideos.length > 0 ? (
-                <div id="videoGrid" className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-                    {filteredVideos.map((video: Video) => (
-                        <VideoRow key={video.id} video={video} />
-                    ))}
+                <div className="flex flex-col gap-6">
+                    <div id="videoGrid" className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
+                        {filteredVideos.map((video: Video) => (
+                            <VideoRow key={video.id} video={video} />
+                        ))}
+                    </div>
+                    {hasNextPage && (
+                        <button
+                            onClick={() => fetchNextPage()}
+                            disabled={isFetchingNextPage}
+                            className="self-center px-6 py-2 rounded-full text-xs font-bold bg-gray-100 dark:bg-white/5 text-gray-700 dark:text-gray-300 hover:bg-gray-200 dark:hover:bg-white/10 transition-colors disabled:opacity-50"
+                        >
+                            {isFetchingNextPage ? 'Loading...' : 'Load more'}
+                        </button>
+                    )}
                 </div>
             ) : (
                 <div id="emptyState" className="py-32 flex flex-col items-center justify-center text-center bg-white dark:bg-[#111] rounded-3xl border border-gray-100 dark:border-white/10 shadow-sm">
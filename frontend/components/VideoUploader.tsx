@@ -3,8 +3,9 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { api } from '@/lib/api';
 
-const CHUNK_SIZE = 10 * 1024 * 1024; // 10MB parts
+const CHUNK_SIZE = 10 * 1024 * 1024; // 10MB parts (fallback nếu server không trả part_size)
 const MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024; // 2GB total
+const URL_PREFETCH_WINDOW = 20; // Số part URL lấy trước trong 1 request
 
 interface VideoUploaderProps {
     projectId?: string;
@@ -80,38 +81,56 @@ export default function VideoUploader({ onUploadComplete, onBatchComplete, onClo
         const storedState = localStorage.getItem(fingerprint);
         let upload_id: string;
         let video_id: string;
-        let uploadedParts: { PartNumber: number; ETag: string }[] = [];
-
-        if (storedState) {
-            const state = JSON.parse(storedState);
-            upload_id = state.upload_id;
-            video_id = state.video_id;
-            uploadedParts = state.uploadedParts || [];
+        let part_size: number;
+        let uploadedParts: { PartNumber: number; ETag: string; Size: number }[] = [];
+
+        // Resume: hỏi server những part S3 đã thực sự nhận thay vì tin localStorage
+        const resumed = storedState ? JSON.parse(storedState) : null;
+        const serverParts = resumed ? await api.listUploadedParts(resumed.video_id, resumed.upload_id) : null;
+
+        if (resumed && serverParts) {
+            upload_id = resumed.upload_id;
+            video_id = resumed.video_id;
+            part_size = resumed.part_size || CHUNK_SIZE;
+            uploadedParts = serverParts.parts.map((p) => ({ PartNumber: p.part_number, ETag: p.etag, Size: p.size }));
         } else {
-            const result = await api.initiateUpload(file.name, file.type);
+            const result = await api.initiateUpload(file.name, file.type, file.size);
             upload_id = result.upload_id;
             video_id = result.video_id;
+            part_size = result.part_size || CHUNK_SIZE;
         }
 
-        const totalParts = Math.ceil(file.size / CHUNK_SIZE);
+        const totalParts = Math.max(1, Math.ceil(file.size / part_size));
         const uploadedPartNumbers = new Set(uploadedParts.map((p) => p.PartNumber));
+        const partUrls = new Map<number, string>();
+
+        const prefetchPartUrls = async (fromPart: number) => {
+            const window: number[] = [];
+            for (let n = fromPart; n <= totalParts && window.length < URL_PREFETCH_WINDOW; n++) {
+                if (!uploadedPartNumbers.has(n)) window.push(n);
+            }
+            const { urls } = await api.getPresignedUrls(video_id, upload_id, window);
+            urls.forEach(({ part_number, url }) => partUrls.set(part_number, url));
+        };
 
         for (let partNumber = 1; partNumber <= totalParts; partNumber++) {
             if (abortControllerRef.current?.signal.aborted) throw new DOMException('Aborted', 'AbortError');
 
             if (uploadedPartNumbers.has(partNumber)) continue;
 
-            const start = (partNumber - 1) * CHUNK_SIZE;
-            const end = Math.min(start + CHUNK_SIZE, file.size);
+            const start = (partNumber - 1) * part_size;
+            const end = Math.min(start + part_size, file.size);
             const chunk = file.slice(start, end);
 
-            const { url } = await api.getPresignedUrl(video_id, upload_id, partNumber);
+            if (!partUrls.has(partNumber)) await prefetchPartUrls(partNumber);
+            const url = partUrls.get(partNumber)!;
+            partUrls.delete(partNumber);
             const etag = await api.uploadChunk(url, chunk);
             if (!etag) throw new Error(`Transmission failed for segment ${partNumber}: ETag missing`);
 
-            uploadedParts.push({ PartNumber: partNumber, ETag: etag.replace(/"/g, '') });
+            uploadedParts.push({ PartNumber: partNumber, ETag: etag.replace(/"/g, ''), Size: chunk.size });
             uploadedPartNumbers.add(partNumber);
-            localStorage.setItem(fingerprint, JSON.stringify({ upload_id, video_id, uploadedParts }));
+            localStorage.setItem(fingerprint, JSON.stringify({ upload_id, video_id, part_size, uploadedParts }));
         }
 
         setStatus('PROCESSING');
@@ -3,20 +3,35 @@ const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1
 export interface Video {
     id: string;
     original_filename: string;
-    status: 'uploading' | 'completed' | 'failed' | 'processing';
+    status: 'uploading' | 'completed' | 'failed' | 'processing' | 'abandoned';
     file_size_bytes?: number;
+    duration_sec?: number;
+    video_codec?: string;
+    width?: number;
+    height?: number;
     created_at: string;
 }
 
+export interface VideoPage {
+    items: Video[];
+    next_cursor: string | null;
+}
+
 export const api = {
-    async initiateUpload(filename: string, contentType: string) {
+    async initiateUpload(filename: string, contentType: string, fileSize?: number) {
         const res = await fetch(`${API_URL}/uploads/initiate`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ filename, content_type: contentType }),
+            body: JSON.stringify({ filename, content_type: contentType, file_size: fileSize }),
         });
         if (!res.ok) throw new Error('Failed to initiate upload');
-        return res.json() as Promise<{ upload_id: string; video_id: string; key: string }>;
+        return res.json() as Promise<{
+            upload_id: string;
+            video_id: string;
+            key: string;
+            part_size: number;
+            part_count?: number;
+        }>;
     },
 
     async getPresignedUrl(videoId: string, uploadId: string, partNumber: number) {
@@ -29,6 +44,16 @@ export const api = {
         return res.json() as Promise<{ url: string }>;
     },
 
+    async getPresignedUrls(videoId: string, uploadId: string, partNumbers: number[]) {
+        const res = await fetch(`${API_URL}/uploads/presigned-urls`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ video_id: videoId, upload_id: uploadId, part_numbers: partNumbers }),
+        });
+        if (!res.ok) throw new Error('Failed to get presigned URLs');
+        return res.json() as Promise<{ urls: { part_number: number; url: string }[] }>;
+    },
+
     async uploadChunk(url: string, chunk: Blob) {
         const res = await fetch(url, {
             method: 'PUT',
@@ -38,7 +63,18 @@ export const api = {
         return res.headers.get('ETag');
     },
 
-    async completeUpload(videoId: string, uploadId: string, parts: { PartNumber: number; ETag: string }[]) {
+    async listUploadedParts(videoId: string, uploadId: string) {
+        const res = await fetch(`${API_URL}/uploads/${videoId}/parts?upload_id=${encodeURIComponent(uploadId)}`);
+        if (res.status === 404) return null; // Upload đã hết hạn / bị abort
+        if (!res.ok) throw new Error('Failed to list uploaded parts');
+        return res.json() as Promise<{
+            video_id: string;
+            upload_id: string;
+            parts: { part_number: number; etag: string; size: number }[];
+        }>;
+    },
+
+    async completeUpload(videoId: string, uploadId: string, parts: { PartNumber: number; ETag: string; Size?: number }[]) {
         const res = await fetch(`${API_URL}/uploads/complete`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
@@ -48,10 +84,14 @@ export const api = {
         return res.json();
     },
 
-    async listVideos() {
-        const res = await fetch(`${API_URL}/uploads/my-videos`);
+    async listVideos(params: { cursor?: string | null; status?: Video['status']; limit?: number } = {}) {
+        const query = new URLSearchParams();
+        if (params.cursor) query.set('cursor', params.cursor);
+        if (params.status) query.set('status', params.status);
+        if (params.limit) query.set('limit', String(params.limit));
+        const res = await fetch(`${API_URL}/uploads/my-videos?${query}`);
         if (!res.ok) throw new Error('Failed to fetch videos');
-        return res.json() as Promise<Video[]>;
+        return res.json() as Promise<VideoPage>;
     },
 
     async getVideoDownloadUrl(videoId: string, disposition: 'inline' | 'attachment' = 'inline') {
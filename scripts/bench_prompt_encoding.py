@@ -0,0 +1,160 @@
+"""
+So sánh format prompt transcript cho Gemini: "json" (cũ) vs "lines" (t=12.3 word word ...)
+
+    python scripts/bench_prompt_encoding.py [--targets 500] [--min-agreement 0.85]
+    python scripts/bench_prompt_encoding.py --live transcript.json   # gọi Gemini thật (cần GEMINI_API_KEYS)
+
+Offline:
+  1. Kích thước prompt (token ước lượng) cho transcript 10 phút / 1 giờ / 3 giờ.
+  2. Độ chính xác timing: LLM "lý tưởng" chọn một word và đọc timestamp từ prompt
+     (json: start chính xác; lines: t= của dòng + nội suy theo vị trí word), rồi chạy
+     qua snap-to-word của extractor. Agreement = tỉ lệ overlay có start giống hệt format cũ.
+     Exit code 1 nếu agreement < --min-agreement (dùng như regression check).
+Live: extract cùng transcript bằng cả 2 format, so latency, số overlay, tỉ lệ start trùng
+start của word, và độ trùng text (Jaccard).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.modules.video_processing.domain.timing_index import WordTimingIndex  # noqa: E402
+from src.modules.video_processing.domain.value_objects import Transcript, WordTimings  # noqa: E402
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import (  # noqa: E402
+    LINES_PROMPT_TEMPLATE,
+    USER_PROMPT_TEMPLATE,
+    GeminiKeywordExtractor,
+)
+from src.modules.video_processing.infrastructure.adapters.transcript_prompt import (  # noqa: E402
+    encode_timed_lines,
+    encode_words_json,
+    estimate_tokens,
+)
+
+DURATIONS = {"10 min": 600, "1 hour": 3600, "3 hours": 3 * 3600}
+VOCABULARY = (
+    "the a strategy plan people business growth customers data market team product really "
+    "think important because revenue we you they simple actually build launch video money "
+    "question answer example problem solution first second finally remember always never"
+).split()
+
+
+def make_transcript(duration: float, rng: random.Random) -> Transcript:
+    words, starts, ends, confidences = [], [], [], []
+    t = 0.0
+    while t < duration:
+        length = rng.uniform(0.15, 0.6)
+        sentence_end = rng.random() < 0.08
+        words.append(rng.choice(VOCABULARY) + ("." if sentence_end else ""))
+        starts.append(round(t, 3))
+        ends.append(round(t + length, 3))
+        confidences.append(round(rng.uniform(0.7, 1.0), 3))
+        t += length + (rng.uniform(0.5, 1.5) if sentence_end else rng.uniform(0.0, 0.25))
+    timings = WordTimings(words, starts, ends, confidences)
+    return Transcript(full_text=" ".join(words), words=timings)
+
+
+def prompt_for(transcript: Transcript, prompt_format: str) -> str:
+    if prompt_format == "json":
+        return USER_PROMPT_TEMPLATE.format(full_text=transcript.full_text, words_json=encode_words_json(transcript.words))
+    return LINES_PROMPT_TEMPLATE.format(timed_lines=encode_timed_lines(transcript.words))
+
+
+def times_visible_in_lines(timed_lines: str) -> list[float]:
+    """Start time của từng word mà LLM suy ra được chỉ từ text của format lines"""
+    lines = []
+    for line in timed_lines.splitlines():
+        stamp, _, text = line.partition(" ")
+        lines.append((float(stamp[2:]), len(text.split())))
+
+    estimates = []
+    for i, (line_start, count) in enumerate(lines):
+        # Dòng không vắt qua khoảng lặng → phân bố đều tới đầu dòng sau (dòng cuối: ~0.4s/word)
+        line_end = lines[i + 1][0] if i + 1 < len(lines) else line_start + 0.4 * count
+        estimates.extend(line_start + k * (line_end - line_start) / count for k in range(count))
+    return estimates
+
+
+def snapped_starts(extractor: GeminiKeywordExtractor, transcript: Transcript, index: WordTimingIndex, llm_starts):
+    raw = json.dumps([
+        {"text": f"callout {i}", "start": start, "end": start + 5.0, "mode": "BOTTOM_TITLE", "position": "bottom_center"}
+        for i, start in enumerate(llm_starts)
+    ])
+    return [o.start for o in extractor._parse_and_validate(raw, transcript, index)]
+
+
+def run_offline(args) -> int:
+    rng = random.Random(42)
+    extractor = GeminiKeywordExtractor(api_keys=["offline"], window_seconds=0)
+    worst_agreement = 1.0
+
+    print(f"{'transcript':<10} {'words':>6} {'json tokens':>12} {'lines tokens':>13} {'saved':>6} "
+          f"{'mean |Δt|':>10} {'agreement':>10}")
+    for label, duration in DURATIONS.items():
+        transcript = make_transcript(duration, rng)
+        words = transcript.words
+        json_tokens = estimate_tokens(prompt_for(transcript, "json"))
+        lines_tokens = estimate_tokens(prompt_for(transcript, "lines"))
+
+        targets = sorted(rng.sample(range(len(words)), min(args.targets, len(words))))
+        visible = times_visible_in_lines(encode_timed_lines(words))
+        index = WordTimingIndex(words)
+        baseline = snapped_starts(extractor, transcript, index, [words.starts[i] for i in targets])
+        compact = snapped_starts(extractor, transcript, index, [visible[i] for i in targets])
+
+        agreement = sum(a == b for a, b in zip(baseline, compact)) / len(targets)
+        mean_error = sum(abs(a - b) for a, b in zip(baseline, compact)) / len(targets)
+        worst_agreement = min(worst_agreement, agreement)
+        print(
+            f"{label:<10} {len(words):>6} {json_tokens:>12,} {lines_tokens:>13,} "
+            f"{1 - lines_tokens / json_tokens:>6.0%} {mean_error:>9.2f}s {agreement:>10.1%}"
+        )
+
+    if worst_agreement < args.min_agreement:
+        print(f"REGRESSION: agreement {worst_agreement:.1%} < {args.min_agreement:.0%}")
+        return 1
+    return 0
+
+
+async def run_live(path: Path) -> int:
+    transcript = Transcript.model_validate_json(path.read_text(encoding="utf-8"))
+    word_starts = set(transcript.words.starts)
+    results = {}
+    for prompt_format in ("json", "lines"):
+        extractor = GeminiKeywordExtractor(prompt_format=prompt_format)
+        started = time.perf_counter()
+        overlays = await extractor.extract(transcript)
+        elapsed = time.perf_counter() - started
+        results[prompt_format] = overlays
+        aligned = sum(o.start in word_starts for o in overlays) / len(overlays) if overlays else 0.0
+        print(
+            f"{prompt_format:<6} prompt≈{estimate_tokens(prompt_for(transcript, prompt_format)):>8,} tokens  "
+            f"latency={elapsed:6.1f}s  overlays={len(overlays):>3}  word-aligned={aligned:.0%}"
+        )
+
+    texts = [{o.text.casefold() for o in results[f]} for f in ("json", "lines")]
+    union = texts[0] | texts[1]
+    print(f"text overlap (Jaccard): {len(texts[0] & texts[1]) / len(union) if union else 1.0:.0%}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", type=int, default=500, help="số overlay giả lập mỗi transcript")
+    parser.add_argument("--min-agreement", type=float, default=0.85)
+    parser.add_argument("--live", type=Path, help="file JSON Transcript để chạy với Gemini thật")
+    args = parser.parse_args()
+
+    if args.live:
+        sys.exit(asyncio.run(run_live(args.live)))
+    sys.exit(run_offline(args))
+
+
+if __name__ == "__main__":
+    main()
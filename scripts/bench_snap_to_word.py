@@ -0,0 +1,90 @@
+"""
+Micro-benchmark snap-to-word: quét tuyến tính (thuật toán cũ) vs WordTimingIndex (bisect)
+
+    python scripts/bench_snap_to_word.py [--overlays 60] [--repeat 5]
+
+Transcript giả lập ~2 word/giây, có câu ngắt bằng dấu chấm và khoảng lặng.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.modules.video_processing.domain.timing_index import WordTimingIndex  # noqa: E402
+from src.modules.video_processing.domain.value_objects import WordTimings  # noqa: E402
+
+WORDS_PER_SECOND = 2.5
+DURATIONS = {"10 min": 600, "1 hour": 3600, "3 hours": 3 * 3600}
+
+
+def make_words(duration: float, rng: random.Random) -> WordTimings:
+    words, starts, ends, confidences = [], [], [], []
+    t = 0.0
+    while t < duration:
+        length = rng.uniform(0.15, 0.6)
+        sentence_end = rng.random() < 0.08
+        words.append(f"word{len(words) % 5000}" + ("." if sentence_end else ""))
+        starts.append(t)
+        ends.append(t + length)
+        confidences.append(rng.uniform(0.7, 1.0))
+        t += length + (rng.uniform(0.5, 1.5) if sentence_end else rng.uniform(0.0, 1 / WORDS_PER_SECOND - 0.15))
+    return WordTimings(words, starts, ends, confidences)
+
+
+def linear_snap(words: list, llm_start: float) -> float:
+    # Vòng lặp cũ trong GeminiKeywordExtractor._parse_and_validate (words: list[WordSegment])
+    snapped, min_diff = llm_start, 2.0
+    for w in words:
+        diff = abs(w.start - llm_start)
+        if diff < min_diff:
+            min_diff = diff
+            snapped = w.start
+    return snapped
+
+
+def indexed_snap(index: WordTimingIndex, llm_start: float) -> float:
+    snapped = index.nearest_sentence_start(llm_start, 0.6)
+    if snapped is None:
+        snapped = index.nearest_word_start(llm_start, 2.0)
+    return llm_start if snapped is None else snapped
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--overlays", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'transcript':<10} {'words':>7} {'linear':>11} {'index build':>12} {'index snap':>11} {'speedup':>8}")
+    for label, duration in DURATIONS.items():
+        words = make_words(duration, rng)
+        targets = [rng.uniform(0, duration) for _ in range(args.overlays)]
+
+        segments = list(words)
+        linear = best_of(args.repeat, lambda: [linear_snap(segments, t) for t in targets])
+        build = best_of(args.repeat, lambda: WordTimingIndex(words))
+        index = WordTimingIndex(words)
+        snap = best_of(args.repeat, lambda: [indexed_snap(index, t) for t in targets])
+
+        print(
+            f"{label:<10} {len(words):>7} {linear * 1e3:>9.1f}ms {build * 1e3:>10.2f}ms "
+            f"{snap * 1e3:>9.3f}ms {linear / (build + snap):>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,40 @@
-from fastapi import FastAPI
+import math
+from contextlib import asynccontextmanager
+import structlog
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from src.shared.config.settings import settings
 from src.modules.video_processing.api.routes import router as video_router
 from src.modules.video_upload.api.routes import router as upload_router
+from src.shared.database.session import engine, replica_engine, track_client_writes
+from src.modules.video_processing.infrastructure.adapters.cached_keyword_extractor import KeywordCacheStats
+from src.shared.monitoring.metrics import collect_keyword_cache_metrics, collect_pool_metrics, render_prometheus
+from src.shared.storage.s3_client import s3_client_manager
+
+logger = structlog.get_logger()
+
+# Thời điểm client ghi gần nhất (epoch): request sau của cùng client đọc primary thay vì replica
+LAST_WRITE_COOKIE = "last_write_at"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mở S3 client dùng chung lúc startup, đóng connection pool lúc shutdown
+    await s3_client_manager.start()
+    app.state.redis = Redis.from_url(settings.REDIS_URL)
+    yield
+    await app.state.redis.aclose()
+    await s3_client_manager.close()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     version="0.1.0",
-    description="Video processing platform API"
+    description="Video processing platform API",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -19,6 +46,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    try:
+        last_write_at = float(request.cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        last_write_at = None
+    with track_client_writes(last_write_at) as writes:
+        response = await call_next(request)
+    if writes.wrote and replica_engine is not None:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            str(writes.last_write_at),
+            max_age=math.ceil(settings.DB_REPLICA_STALENESS_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
 # Register routers
 app.include_router(video_router, prefix="/api/v1")
 app.include_router(upload_router, prefix="/api/v1")
@@ -31,6 +76,19 @@ async def health_check():
         "debug": settings.DEBUG
     }
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    # Prometheus scrape: trạng thái connection pool của process này + counter keyword cache của các worker
+    samples = collect_pool_metrics(engine)
+    if replica_engine is not None:
+        samples += collect_pool_metrics(replica_engine, name="replica")
+    try:
+        samples += collect_keyword_cache_metrics(await KeywordCacheStats.load(app.state.redis))
+    except (RedisError, OSError) as exc:
+        # Redis lỗi thì vẫn trả metrics của pool
+        logger.warning("Keyword cache stats unavailable", error=str(exc))
+    return render_prometheus(samples)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to One Click Video API"}
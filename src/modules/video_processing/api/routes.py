@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from uuid import UUID
 from typing import List
 from src.modules.video_processing.domain.entities import VideoJob
+from src.modules.video_processing.domain.value_objects import Transcript
 from src.modules.video_processing.application.handlers import CreateVideoJobUseCase, ProcessVideoJobUseCase
 from src.modules.video_processing.infrastructure.repositories import PostgresVideoRepository
-from src.shared.database.dependencies import DatabaseSession
+from src.shared.database.dependencies import DatabaseSession, ReadDatabaseSession
 
 
 router = APIRouter(prefix="/jobs", tags=["Video Jobs"])
@@ -22,14 +23,28 @@ async def create_job(
 @router.get("/{job_id}", response_model=VideoJob)
 async def get_job(
     job_id: UUID,
-    db: DatabaseSession
+    db: ReadDatabaseSession
 ):
     repo = PostgresVideoRepository(db)
-    job = await repo.get_by_id(job_id)
+    # Endpoint được poll liên tục → không đọc / gửi transcript (có endpoint riêng)
+    job = await repo.get_by_id(job_id, with_transcript=False)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return job
 
+@router.get("/{job_id}/transcript", response_model=Transcript)
+async def get_job_transcript(
+    job_id: UUID,
+    db: ReadDatabaseSession
+):
+    repo = PostgresVideoRepository(db)
+    job = await repo.get_by_id(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.transcript is None:
+        raise HTTPException(status_code=404, detail="Transcript not available")
+    return job.transcript
+
 @router.post("/{job_id}/process", response_model=VideoJob)
 async def process_job(
     job_id: UUID,
@@ -37,6 +52,8 @@ async def process_job(
 ):
     repo = PostgresVideoRepository(db)
     use_case = ProcessVideoJobUseCase(repo)
+    # Không bọc unit_of_work: mỗi chuyển trạng thái commit ngay (poller thấy "Processing"),
+    # không giữ transaction / lock row / connection qua các bước LLM, encode kéo dài vài phút
     job = await use_case.execute(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
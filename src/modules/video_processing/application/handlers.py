@@ -1,12 +1,18 @@
 import os
+from datetime import datetime, timedelta
 from uuid import UUID
-from typing import Optional
+from typing import AsyncContextManager, Callable, Optional
 import structlog
 
-from src.modules.video_processing.domain.entities import VideoJob
+from src.modules.video_processing.domain.entities import KeywordBatch, VideoJob
+from src.modules.video_processing.domain.value_objects import JobStatus, KeywordBatchState, Transcript
 from src.modules.video_processing.domain.ports import (
     IVideoRepository,
+    IKeywordBatchRepository,
     IKeywordExtractorPort,
+    IBatchKeywordExtractorPort,
+    IVideoEditorPort,
+    IStoragePort,
 )
 
 logger = structlog.get_logger()
@@ -17,9 +23,13 @@ class ProcessVideoJobUseCase:
         self,
         video_repo: IVideoRepository,
         keyword_extractor: Optional[IKeywordExtractorPort] = None,
+        video_editor: Optional[IVideoEditorPort] = None,
+        storage: Optional[IStoragePort] = None,
     ):
         self.video_repo = video_repo
         self.keyword_extractor = keyword_extractor
+        self.video_editor = video_editor
+        self.storage = storage
 
     async def execute(self, job_id: UUID) -> Optional[VideoJob]:
         job = await self.video_repo.get_by_id(job_id)
@@ -27,10 +37,21 @@ class ProcessVideoJobUseCase:
             return None
 
         job.mark_as_processing()
-        await self.video_repo.save(job)
+        await self.video_repo.update_status(job)
 
         # ── Pipeline steps ────────────────────────────────────────────────────
-        # Step 1: Silence removal (TODO: implement)
+        # Step 1: Silence removal — stream S3 → ffmpeg → S3 multipart, không qua /tmp
+        if self.video_editor and self.storage:
+            try:
+                output_path = await self._stream_remove_silence(job)
+                job.output_file_paths = [*job.output_file_paths, output_path]
+                await self.video_repo.save(job)
+            except Exception as exc:
+                logger.error("Silence removal failed", job_id=str(job_id), error=str(exc))
+                job.mark_as_failed()
+                await self.video_repo.update_status(job)
+                return job
+
         # Step 2: ASR / Transcription (TODO: implement)
 
         # Step 3: Keyword extraction → text overlays
@@ -57,6 +78,14 @@ class ProcessVideoJobUseCase:
 
         return job
 
+    async def _stream_remove_silence(self, job: VideoJob) -> str:
+        output_path = f"outputs/{job.id}/silence_removed.mp4"
+        logger.info("Running streaming silence removal", job_id=str(job.id), output_path=output_path)
+        async with self.storage.open_range_url(job.input_file_path) as source_url:
+            async with self.storage.open_stream_writer(output_path, "video/mp4") as writer:
+                await self.video_editor.stream_remove_silence(source_url, writer.write)
+        return output_path
+
 
 class CreateVideoJobUseCase:
     def __init__(self, video_repo: IVideoRepository):
@@ -66,3 +95,150 @@ class CreateVideoJobUseCase:
         job = VideoJob(user_id=user_id, input_file_path=input_file_path)
         await self.video_repo.save(job)
         return job
+
+
+# Mỗi lần mở = một session ngắn (một transaction); không giữ session trong lúc gọi batch API
+KeywordBatchRepositories = Callable[[], AsyncContextManager[tuple[IVideoRepository, IKeywordBatchRepository]]]
+
+
+async def _load_transcripts(video_repo: IVideoRepository, job_ids: list[UUID]) -> dict[str, Transcript]:
+    jobs = await video_repo.get_by_ids(job_ids)
+    await video_repo.load_transcripts(jobs)
+    return {str(job.id): job.transcript for job in jobs if job.transcript}
+
+
+class SubmitKeywordBatchUseCase:
+    """
+    Back-catalogue: claim các job đã xong mà chưa có text overlay rồi gửi một batch keyword
+    extraction (rẻ, không cần trả lời ngay). Kết quả do ApplyKeywordBatchesUseCase (beat) ghi
+    vào job khi batch xong. Job mới upload vẫn đi đường interactive trong ProcessVideoJobUseCase.
+    """
+
+    def __init__(
+        self,
+        repositories: KeywordBatchRepositories,
+        batch_extractor: IBatchKeywordExtractorPort,
+        max_attempts: int = 3,
+    ):
+        self.repositories = repositories
+        self.batch_extractor = batch_extractor
+        # Job lỗi / kết quả rỗng sau chừng này lần claim thì thôi, không submit lại mãi
+        self.max_attempts = max_attempts
+
+    async def execute(
+        self,
+        status: JobStatus = JobStatus.COMPLETED,
+        user_id: Optional[int] = None,
+        limit: int = 500,
+    ) -> Optional[KeywordBatch]:
+        async with self.repositories() as (video_repo, batch_repo):
+            batch = await batch_repo.claim(status, user_id, limit, self.max_attempts)
+            if batch is None:
+                logger.info("No jobs pending batch keyword extraction", status=status.value)
+                return None
+            transcripts = await _load_transcripts(video_repo, batch.job_ids)
+
+        try:
+            submitted = await self.batch_extractor.submit(transcripts)
+        except Exception:
+            await self._release(batch)
+            raise
+        if submitted is None:
+            await self._release(batch)
+            return None
+
+        batch.mark_as_submitted(*submitted)
+        async with self.repositories() as (_, batch_repo):
+            await batch_repo.mark_submitted(batch)
+        logger.info("Batch keyword extraction submitted", batch=batch.name, jobs=len(batch.job_ids))
+        return batch
+
+    async def _release(self, batch: KeywordBatch) -> None:
+        async with self.repositories() as (_, batch_repo):
+            await batch_repo.release(batch.id)
+
+
+class ApplyKeywordBatchesUseCase:
+    """
+    Chạy định kỳ (Celery beat): poll các batch đang mở; batch xong thì ghi overlays vào job,
+    batch lỗi / quá hạn thì nhả claim để lần submit sau thử lại.
+    """
+
+    # Claim mà chưa submit xong sau chừng này (worker chết giữa chừng) → nhả
+    SUBMIT_GRACE = timedelta(hours=1)
+
+    def __init__(
+        self,
+        repositories: KeywordBatchRepositories,
+        batch_extractor: IBatchKeywordExtractorPort,
+        timeout: timedelta,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.repositories = repositories
+        self.batch_extractor = batch_extractor
+        self.timeout = timeout
+        self._clock = clock
+
+    async def execute(self) -> list[VideoJob]:
+        async with self.repositories() as (_, batch_repo):
+            batches = await batch_repo.list_open()
+
+        updated = []
+        for batch in batches:
+            try:
+                updated += await self._advance(batch)
+            except Exception as exc:
+                # Batch khác vẫn được xử lý; batch này poll lại ở lần chạy sau
+                logger.warning("Keyword batch poll failed", batch=batch.name, batch_id=str(batch.id), error=str(exc))
+        return updated
+
+    async def _advance(self, batch: KeywordBatch) -> list[VideoJob]:
+        now = self._clock()
+        if batch.name is None:
+            if now - batch.created_at > self.SUBMIT_GRACE:
+                logger.warning("Releasing keyword batch that was never submitted", batch_id=str(batch.id))
+                await self._release(batch)
+            return []
+
+        state = await self.batch_extractor.poll(batch.name)
+        if state == KeywordBatchState.RUNNING:
+            if now - batch.submitted_at > self.timeout:
+                logger.warning("Keyword batch timed out, cancelling", batch=batch.name)
+                try:
+                    await self.batch_extractor.cancel(batch.name)
+                except Exception as exc:
+                    logger.warning("Keyword batch cancel failed", batch=batch.name, error=str(exc))
+                await self._release(batch)
+            return []
+        if state == KeywordBatchState.FAILED:
+            await self._release(batch)
+            return []
+
+        async with self.repositories() as (video_repo, _):
+            transcripts = await _load_transcripts(video_repo, batch.job_ids)
+        results = await self.batch_extractor.collect(batch.name, batch.requests, transcripts)
+        return await self._apply(batch, results)
+
+    async def _apply(self, batch: KeywordBatch, results: dict) -> list[VideoJob]:
+        updated = []
+        async with self.repositories() as (video_repo, batch_repo):
+            # Đọc lại lúc ghi (khoá row): trong lúc batch chạy job có thể đã có overlay, bị sửa hoặc bị xoá
+            for job in await video_repo.get_by_ids([UUID(key) for key in results], for_update=True):
+                if job.render_config.text_overlays:
+                    logger.info("Skip keyword batch result, job already has overlays", job_id=str(job.id))
+                    continue
+                job.render_config.text_overlays = results[str(job.id)]
+                await video_repo.save(job)
+                updated.append(job)
+            await batch_repo.release(batch.id)
+        logger.info(
+            "Batch keyword extraction applied",
+            batch=batch.name,
+            updated=len(updated),
+            failed=len(batch.job_ids) - len(results),
+        )
+        return updated
+
+    async def _release(self, batch: KeywordBatch) -> None:
+        async with self.repositories() as (_, batch_repo):
+            await batch_repo.release(batch.id)
@@ -1,20 +1,62 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 from uuid import UUID, uuid4
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from src.modules.video_processing.domain.value_objects import JobStatus, Transcript, RenderConfig
 
+TranscriptLoader = Callable[[], Optional[Transcript]]
+
+
+class TranscriptNotLoadedError(LookupError):
+    """Job lấy từ query danh sách — cần repository.load_transcripts() trước khi đọc transcript"""
+
+
+def _transcript_not_loaded() -> Optional[Transcript]:
+    raise TranscriptNotLoadedError("Transcript was not loaded for this job")
+
+
 class VideoJob(BaseModel):
     id: UUID = Field(default_factory=uuid4)
     user_id: int
     input_file_path: str
     status: JobStatus = JobStatus.UPLOADED
-    transcript: Optional[Transcript] = None
     render_config: RenderConfig = RenderConfig()
     output_file_paths: List[str] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Transcript (có thể vài MB) nằm ở bảng riêng, chỉ decode khi được truy cập lần đầu.
+    # Không phải field: model_dump / response của job không kèm transcript (GET /jobs/{id}/transcript)
+    _transcript: Optional[Transcript] = PrivateAttr(default=None)
+    _transcript_loader: Optional[TranscriptLoader] = PrivateAttr(default=None)
+
+    def __init__(self, transcript: Union[Transcript, dict, None] = None, **data: Any):
+        super().__init__(**data)
+        if transcript is not None:
+            self.transcript = transcript
+
+    @property
+    def transcript(self) -> Optional[Transcript]:
+        if self._transcript_loader is not None:
+            loader = self._transcript_loader
+            self._transcript = loader()
+            self._transcript_loader = None
+        return self._transcript
+
+    @transcript.setter
+    def transcript(self, value: Union[Transcript, dict, None]) -> None:
+        self._transcript_loader = None
+        self._transcript = Transcript.model_validate(value) if isinstance(value, dict) else value
+
+    @property
+    def transcript_loaded(self) -> bool:
+        return self._transcript_loader is None
+
+    def defer_transcript(self, loader: Optional[TranscriptLoader] = None) -> None:
+        """Gắn loader chạy ở lần đọc transcript đầu tiên; None = chưa load (đọc sẽ lỗi)"""
+        self._transcript = None
+        self._transcript_loader = loader or _transcript_not_loaded
+
     def mark_as_queued(self):
         self.status = JobStatus.QUEUED
         self.updated_at = datetime.utcnow()
@@ -31,3 +73,21 @@ class VideoJob(BaseModel):
     def mark_as_failed(self):
         self.status = JobStatus.FAILED
         self.updated_at = datetime.utcnow()
+
+
+class KeywordBatch(BaseModel):
+    """
+    Batch keyword extraction đang mở: các job đã claim + batch phía provider.
+    name / requests (dữ liệu adapter cần để ghép kết quả) chỉ có sau khi submit.
+    """
+    id: UUID = Field(default_factory=uuid4)
+    job_ids: List[UUID] = []
+    name: Optional[str] = None
+    requests: Dict[str, Any] = {}
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    submitted_at: Optional[datetime] = None
+
+    def mark_as_submitted(self, name: str, requests: Dict[str, Any]):
+        self.name = name
+        self.requests = requests
+        self.submitted_at = datetime.utcnow()
@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, AsyncContextManager, Awaitable, Callable, List, Mapping, Optional, Sequence
 from uuid import UUID
-from .entities import VideoJob
-from .value_objects import Transcript, TextOverlay
+from .entities import KeywordBatch, VideoJob
+from .value_objects import KeywordBatchState, Transcript, TextOverlay, TimestampRange
 
 class IVideoRepository(ABC):
     @abstractmethod
@@ -10,7 +10,13 @@ class IVideoRepository(ABC):
         pass
 
     @abstractmethod
-    async def get_by_id(self, job_id: UUID) -> Optional[VideoJob]:
+    async def update_status(self, job: VideoJob) -> None:
+        """Chỉ ghi status + updated_at của job"""
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, job_id: UUID, with_transcript: bool = True) -> Optional[VideoJob]:
+        """with_transcript=False: không đọc bảng transcript (job.transcript cần load_transcripts())"""
         pass
 
     @abstractmethod
@@ -25,11 +31,68 @@ class IVideoRepository(ABC):
     async def find_by_status(self, status: str) -> List[VideoJob]:
         pass
 
+    @abstractmethod
+    async def get_by_ids(self, job_ids: Sequence[UUID], for_update: bool = False) -> List[VideoJob]:
+        """Không load transcript; for_update=True khoá row tới hết transaction"""
+        pass
+
+    @abstractmethod
+    async def load_transcripts(self, jobs: Sequence[VideoJob]) -> None:
+        """Load transcript cho các job lấy từ query danh sách (mặc định không load)"""
+        pass
+
+
+class IKeywordBatchRepository(ABC):
+    @abstractmethod
+    async def claim(
+        self, status: str, user_id: Optional[int], limit: int, max_attempts: int
+    ) -> Optional[KeywordBatch]:
+        """
+        Tạo batch mới và claim tối đa `limit` job có transcript, chưa có text overlay,
+        chưa thuộc batch mở nào và chưa được claim đủ `max_attempts` lần. Mỗi lần claim
+        tính là một lần thử. None nếu không còn job nào.
+        """
+        pass
+
+    @abstractmethod
+    async def mark_submitted(self, batch: KeywordBatch) -> None:
+        pass
+
+    @abstractmethod
+    async def list_open(self) -> List[KeywordBatch]:
+        pass
+
+    @abstractmethod
+    async def release(self, batch_id: UUID) -> None:
+        """Xoá batch, nhả claim của các job trong đó (số lần thử được giữ lại)"""
+        pass
+
 class ITranscriptionPort(ABC):
     @abstractmethod
     async def transcribe(self, audio_path: str) -> Transcript:
         pass
 
+class IVideoEditorPort(ABC):
+    @abstractmethod
+    async def remove_silence(self, input_path: str, output_path: str) -> str:
+        """Cắt khoảng lặng file local → file local, trả về output path"""
+        pass
+
+    @abstractmethod
+    async def detect_kept_ranges(self, source_url: str) -> List[TimestampRange]:
+        """Các đoạn (giây, theo video gốc) được giữ lại sau khi cắt khoảng lặng"""
+        pass
+
+    @abstractmethod
+    async def stream_remove_silence(
+        self, source_url: str, sink: Callable[[bytes], Awaitable[None]]
+    ) -> int:
+        """
+        Đọc video qua URL (HTTP range), encode bản đã cắt khoảng lặng và đẩy từng chunk
+        output vào sink — không ghi file tạm. Trả về số byte đã ghi.
+        """
+        pass
+
 class IRenderEnginePort(ABC):
     @abstractmethod
     async def render(self, job_id: UUID, layers: list) -> str:
@@ -57,6 +120,16 @@ class IStoragePort(ABC):
         """Xóa file khỏi storage"""
         pass
 
+    @abstractmethod
+    def open_range_url(self, remote_path: str) -> AsyncContextManager[str]:
+        """URL local hỗ trợ HTTP Range để ffmpeg/auto-editor đọc object mà không tải về đĩa"""
+        pass
+
+    @abstractmethod
+    def open_stream_writer(self, remote_path: str, content_type: str) -> AsyncContextManager[Any]:
+        """Writer có async write(bytes): upload dần theo part, complete khi đóng, abort nếu lỗi"""
+        pass
+
 
 class IKeywordExtractorPort(ABC):
     """Port cho LLM service extract keyword từ transcript để tạo text overlay"""
@@ -68,3 +141,36 @@ class IKeywordExtractorPort(ABC):
         Sử dụng word-level timestamps để sync chính xác với video.
         """
         pass
+
+
+class IBatchKeywordExtractorPort(ABC):
+    """
+    Port extract keyword hàng loạt (offline, qua batch API) cho back-catalogue.
+    Batch có thể mất tới 24h → tách submit / poll / collect, caller không giữ gì mở trong lúc chờ.
+    """
+
+    @abstractmethod
+    async def submit(self, transcripts: Mapping[str, "Transcript"]) -> Optional[tuple[str, dict[str, Any]]]:
+        """
+        Gửi mọi transcript trong một batch, trả về (tên batch, requests) để lưu lại và truyền cho
+        collect(); None nếu không có transcript nào cần gửi.
+        """
+        pass
+
+    @abstractmethod
+    async def poll(self, name: str) -> "KeywordBatchState":
+        pass
+
+    @abstractmethod
+    async def collect(
+        self, name: str, requests: Mapping[str, Any], transcripts: Mapping[str, "Transcript"]
+    ) -> dict[str, list["TextOverlay"]]:
+        """
+        Kết quả của batch đã SUCCEEDED: key → overlays.
+        Job có request lỗi / response bị cắt không có trong kết quả (để lần chạy sau thử lại).
+        """
+        pass
+
+    @abstractmethod
+    async def cancel(self, name: str) -> None:
+        pass
@@ -0,0 +1,100 @@
+"""
+WordTimingIndex — tra cứu thời điểm trong transcript bằng bisect
+Build một lần cho mỗi transcript (O(n)), mỗi truy vấn O(log n) thay vì quét
+toàn bộ words cho từng overlay.
+"""
+
+import string
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Optional
+
+from src.modules.video_processing.domain.value_objects import WordTimings
+
+SENTENCE_END_CHARS = (".", "!", "?", "…", "。")
+# Khoảng lặng giữa 2 word đủ dài được coi như ranh giới câu (ASR không có dấu câu)
+SENTENCE_PAUSE_SECONDS = 0.8
+_STRIP_CHARS = string.punctuation + "…“”‘’«»"
+
+
+def normalize_word(word: str) -> str:
+    return word.strip().strip(_STRIP_CHARS).casefold()
+
+
+def _nearest(sorted_times: array, t: float, max_distance: float) -> Optional[float]:
+    """Giá trị gần t nhất (cách < max_distance); hoà thì lấy giá trị nhỏ hơn"""
+    pos = bisect_left(sorted_times, t)
+    best, best_diff = None, max_distance
+    for i in (pos - 1, pos):
+        if 0 <= i < len(sorted_times):
+            diff = abs(sorted_times[i] - t)
+            if diff < best_diff:
+                best, best_diff = sorted_times[i], diff
+    return best
+
+
+class WordTimingIndex:
+    def __init__(self, words: WordTimings, pause_seconds: float = SENTENCE_PAUSE_SECONDS) -> None:
+        self._words = words
+        starts, ends = words.starts, words.ends
+        n = len(words)
+
+        # Transcript ASR gần như luôn đã sắp theo start → không cần sort
+        if all(starts[i] <= starts[i + 1] for i in range(n - 1)):
+            self._order = range(n)
+            self._starts = starts
+            self._ends = ends
+        else:
+            self._order = sorted(range(n), key=starts.__getitem__)
+            self._starts = array("d", (starts[i] for i in self._order))
+            self._ends = array("d", (ends[i] for i in self._order))
+
+        self._sentence_starts = array("d")
+        prev_word, prev_end = None, None
+        for k, i in enumerate(self._order):
+            word = words.word(i)
+            if (
+                prev_word is None
+                or prev_word.rstrip().endswith(SENTENCE_END_CHARS)
+                or self._starts[k] - prev_end >= pause_seconds
+            ):
+                self._sentence_starts.append(self._starts[k])
+            prev_word, prev_end = word, self._ends[k]
+
+        # word chuẩn hoá → các start time (đã sort); build khi cần lần đầu
+        self._occurrences: Optional[Dict[str, array]] = None
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def nearest_word_start(self, t: float, max_distance: float) -> Optional[float]:
+        return _nearest(self._starts, t, max_distance)
+
+    def nearest_sentence_start(self, t: float, max_distance: float) -> Optional[float]:
+        return _nearest(self._sentence_starts, t, max_distance)
+
+    def word_end_at(self, t: float) -> Optional[float]:
+        """End của word đang được nói tại t (start <= t < end), None nếu t rơi vào khoảng lặng"""
+        k = bisect_right(self._starts, t) - 1
+        if k >= 0 and self._ends[k] > t:
+            return self._ends[k]
+        return None
+
+    def find_word(self, word: str, near: float, max_distance: float) -> Optional[float]:
+        """Start của lần xuất hiện `word` gần `near` nhất (so khớp không phân biệt hoa thường/dấu câu)"""
+        tokens = word.split()
+        key = normalize_word(tokens[0]) if tokens else ""
+        if not key:
+            return None
+        occurrences = self._word_occurrences().get(key)
+        if occurrences is None:
+            return None
+        return _nearest(occurrences, near, max_distance)
+
+    def _word_occurrences(self) -> Dict[str, array]:
+        if self._occurrences is None:
+            occurrences: Dict[str, array] = {}
+            for k, i in enumerate(self._order):
+                occurrences.setdefault(normalize_word(self._words.word(i)), array("d")).append(self._starts[k])
+            self._occurrences = occurrences
+        return self._occurrences
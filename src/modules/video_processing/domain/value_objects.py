@@ -1,6 +1,11 @@
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
 from enum import Enum
-from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Union, overload
+from pydantic import BaseModel, Field, GetCoreSchemaHandler, field_validator
+from pydantic_core import core_schema
 
 
 class JobStatus(str, Enum):
@@ -11,6 +16,12 @@ class JobStatus(str, Enum):
     FAILED = "Failed"
 
 
+class KeywordBatchState(str, Enum):
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"  # failed / cancelled / expired phía provider
+
+
 class WordSegment(BaseModel):
     word: str
     start: float
@@ -18,9 +29,223 @@ class WordSegment(BaseModel):
     confidence: float
 
 
+# ── Word timings (array-backed) ──────────────────────────────────────────────
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _le_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class WordTimings(Sequence):
+    """
+    Danh sách word của transcript lưu dạng cột: start/end/confidence là array('d'),
+    chữ của các word nối thành một chuỗi + offsets (word i = text[offsets[i]:offsets[i+1]]).
+    Vẫn dùng như list[WordSegment] (len, index, iterate) — WordSegment chỉ được tạo
+    khi truy cập từng phần tử. Immutable.
+    """
+
+    __slots__ = ("_text", "_offsets", "_starts", "_ends", "_confidences")
+
+    # magic, version, số word, độ dài text (bytes utf-8)
+    BINARY_MAGIC = b"TRW"
+    BINARY_VERSION = 2
+    _HEADER = struct.Struct("<3sBII")
+
+    def __init__(
+        self,
+        words: Iterable[str] = (),
+        starts: Iterable[float] = (),
+        ends: Iterable[float] = (),
+        confidences: Iterable[float] = (),
+    ) -> None:
+        words = list(words)
+        offsets = array("I", [0])
+        for w in words:
+            offsets.append(offsets[-1] + len(w))
+        self._text = "".join(words)
+        self._offsets = offsets
+        self._starts = array("d", starts)
+        self._ends = array("d", ends)
+        self._confidences = array("d", confidences)
+        if not len(words) == len(self._starts) == len(self._ends) == len(self._confidences):
+            raise ValueError("words, starts, ends, confidences phải cùng độ dài")
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Union[WordSegment, Mapping[str, Any]]]) -> "WordTimings":
+        words, starts, ends, confidences = [], array("d"), array("d"), array("d")
+        for i, seg in enumerate(segments):
+            if isinstance(seg, dict) or (not isinstance(seg, WordSegment) and isinstance(seg, Mapping)):
+                try:
+                    word, start, end, confidence = seg["word"], seg["start"], seg["end"], seg["confidence"]
+                except KeyError as exc:
+                    raise ValueError(f"word {i} thiếu field {exc}") from None
+            else:
+                try:
+                    word, start, end, confidence = seg.word, seg.start, seg.end, seg.confidence
+                except AttributeError:
+                    raise ValueError(f"word {i} phải là object word/start/end/confidence") from None
+            if not isinstance(word, str):
+                raise ValueError(f"word {i}: word phải là chuỗi")
+            # Pydantic chỉ bọc ValueError thành ValidationError → đổi TypeError (vd. start=None)
+            try:
+                values = float(start), float(end), float(confidence)
+            except TypeError as exc:
+                raise ValueError(f"word {i}: start/end/confidence phải là số ({exc})") from None
+            words.append(word)
+            starts.append(values[0])
+            ends.append(values[1])
+            confidences.append(values[2])
+        return cls(words, starts, ends, confidences)
+
+    # ── Sequence API ──────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    @overload
+    def __getitem__(self, index: int) -> WordSegment: ...
+    @overload
+    def __getitem__(self, index: slice) -> "WordTimings": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            rng = range(len(self))[index]
+            return WordTimings(
+                (self.word(i) for i in rng),
+                (self._starts[i] for i in rng),
+                (self._ends[i] for i in rng),
+                (self._confidences[i] for i in rng),
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("WordTimings index out of range")
+        return WordSegment.model_construct(
+            word=self.word(index),
+            start=self._starts[index],
+            end=self._ends[index],
+            confidence=self._confidences[index],
+        )
+
+    def __iter__(self) -> Iterator[WordSegment]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, WordTimings):
+            return (
+                self._text == other._text
+                and self._offsets == other._offsets
+                and self._starts == other._starts
+                and self._ends == other._ends
+                and self._confidences == other._confidences
+            )
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"WordTimings(<{len(self)} words>)"
+
+    # ── Columns ───────────────────────────────────────────────────────────────
+
+    def word(self, index: int) -> str:
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    @property
+    def starts(self) -> array:
+        """array('d') start (giây) — chỉ đọc"""
+        return self._starts
+
+    @property
+    def ends(self) -> array:
+        return self._ends
+
+    @property
+    def confidences(self) -> array:
+        return self._confidences
+
+    # ── Serialization ─────────────────────────────────────────────────────────
+
+    def to_dicts(self) -> List[dict]:
+        """Dạng JSON tương thích list[WordSegment]"""
+        text, offsets = self._text, self._offsets
+        return [
+            {"word": text[offsets[i]:offsets[i + 1]], "start": s, "end": e, "confidence": c}
+            for i, (s, e, c) in enumerate(zip(self._starts, self._ends, self._confidences))
+        ]
+
+    def to_bytes(self) -> bytes:
+        """header | start[n] | end[n] | confidence[n] (f64) | offsets[n+1] (u32, ký tự) | text utf-8"""
+        text = self._text.encode("utf-8")
+        return b"".join([
+            self._HEADER.pack(self.BINARY_MAGIC, self.BINARY_VERSION, len(self), len(text)),
+            _le_bytes(self._starts),
+            _le_bytes(self._ends),
+            _le_bytes(self._confidences),
+            _le_bytes(self._offsets),
+            text,
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WordTimings":
+        magic, version, n, text_size = cls._HEADER.unpack_from(data)
+        if magic != cls.BINARY_MAGIC or version != cls.BINARY_VERSION:
+            raise ValueError(f"Unsupported word timings encoding: {magic!r} v{version}")
+
+        offset = cls._HEADER.size
+        columns = []
+        for typecode, count in (("d", n), ("d", n), ("d", n), ("I", n + 1)):
+            size = array(typecode).itemsize * count
+            columns.append(_le_array(typecode, data[offset:offset + size]))
+            offset += size
+
+        timings = cls.__new__(cls)
+        timings._starts, timings._ends, timings._confidences, timings._offsets = columns
+        timings._text = data[offset:offset + text_size].decode("utf-8")
+        return timings
+
+    # ── Pydantic ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def _validate(cls, value: Any) -> "WordTimings":
+        if isinstance(value, WordTimings):
+            return value
+        if isinstance(value, (list, tuple)):
+            return cls.from_segments(value)
+        raise ValueError("words phải là list các word")
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        # Input/output JSON giữ nguyên dạng list[WordSegment]
+        word_dict = core_schema.typed_dict_schema({
+            "word": core_schema.typed_dict_field(core_schema.str_schema()),
+            "start": core_schema.typed_dict_field(core_schema.float_schema()),
+            "end": core_schema.typed_dict_field(core_schema.float_schema()),
+            "confidence": core_schema.typed_dict_field(core_schema.float_schema()),
+        })
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            json_schema_input_schema=handler.generate_schema(List[WordSegment]),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda v: v.to_dicts(), return_schema=core_schema.list_schema(word_dict)
+            ),
+        )
+
+
 class Transcript(BaseModel):
     full_text: str
-    words: list[WordSegment] = []
+    words: WordTimings = Field(default_factory=WordTimings)
 
 
 # ── Text Overlay Value Objects ───────────────────────────────────────────────
@@ -0,0 +1,219 @@
+"""
+Cache kết quả keyword extraction theo nội dung
+Key = sha256(transcript + fingerprint của extractor: model, temperature, prompt).
+Tra LRU trong process trước, rồi Redis; miss mới gọi LLM. Re-process, retry
+pipeline hay upload trùng với cùng transcript không tốn thêm quota Gemini.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from typing import Any, Optional
+
+import structlog
+from redis.exceptions import RedisError
+
+from src.modules.video_processing.domain.ports import IKeywordExtractorPort
+from src.modules.video_processing.domain.value_objects import TextOverlay, Transcript
+from src.shared.config.settings import settings
+
+logger = structlog.get_logger()
+
+CACHE_KEY_PREFIX = "kwx:v1:"
+# Hash cộng dồn counter của mọi worker; API đọc để render /metrics
+STATS_KEY = "kwx:stats"
+
+
+class LocalLRUCache:
+    """LRU + TTL trong process (một event loop, không cần lock)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class KeywordCacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    errors: int = 0
+    bypassed: int = 0
+
+    # Giá trị đã đẩy lên Redis ở lần flush trước
+    _flushed: dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return (self.local_hits + self.redis_hits) / lookups if lookups else 0.0
+
+    def counters(self) -> dict[str, int]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if not f.name.startswith("_")}
+
+    async def flush(self, redis: Any) -> None:
+        """
+        Cộng phần tăng thêm từ lần flush trước vào STATS_KEY.
+        Counter nằm trong process worker, còn /metrics do process API phục vụ → đi qua Redis.
+        Lỗi Redis thì giữ delta lại cho lần flush sau.
+        """
+        for name, value in self.counters().items():
+            delta = value - self._flushed.get(name, 0)
+            if not delta:
+                continue
+            try:
+                await redis.hincrby(STATS_KEY, name, delta)
+            except (RedisError, OSError) as exc:
+                logger.warning("Keyword cache stats flush failed", error=str(exc))
+                return
+            self._flushed[name] = value
+
+    @classmethod
+    async def load(cls, redis: Any) -> "KeywordCacheStats":
+        """Tổng counter của mọi worker (raise RedisError nếu Redis lỗi)"""
+        raw = await redis.hgetall(STATS_KEY)
+        values = {
+            (key.decode() if isinstance(key, bytes) else key): int(value)
+            for key, value in raw.items()
+        }
+        return cls(**{name: values.get(name, 0) for name in cls().counters()})
+
+
+# Dùng chung trong process worker → task sau vẫn hit LRU của task trước
+_local_cache = LocalLRUCache(settings.KEYWORD_CACHE_LOCAL_MAX_ENTRIES, settings.KEYWORD_CACHE_TTL_SECONDS)
+cache_stats = KeywordCacheStats()
+
+
+class CachedKeywordExtractor(IKeywordExtractorPort):
+    def __init__(
+        self,
+        inner: Any,
+        redis: Any = None,
+        local_cache: Optional[LocalLRUCache] = None,
+        stats: Optional[KeywordCacheStats] = None,
+        ttl_seconds: Optional[int] = None,
+        max_value_bytes: Optional[int] = None,
+        bypass: bool = False,
+    ) -> None:
+        """
+        inner: extractor thật, có `cache_fingerprint` và `extract_detailed` (GeminiKeywordExtractor)
+        redis: redis.asyncio client (None = chỉ dùng LRU local)
+        bypass: luôn gọi inner, không đọc/ghi cache
+        """
+        self.inner = inner
+        self.redis = redis
+        self.local_cache = local_cache if local_cache is not None else _local_cache
+        self.stats = stats if stats is not None else cache_stats
+        self.ttl_seconds = ttl_seconds or settings.KEYWORD_CACHE_TTL_SECONDS
+        self.max_value_bytes = max_value_bytes or settings.KEYWORD_CACHE_MAX_VALUE_BYTES
+        self.bypass = bypass
+
+    def cache_key(self, transcript: Transcript) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.inner.cache_fingerprint.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(transcript.full_text.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(transcript.words.to_bytes())
+        return CACHE_KEY_PREFIX + digest.hexdigest()
+
+    async def extract(self, transcript: Transcript, refresh: bool = False) -> list[TextOverlay]:
+        """refresh=True: bỏ qua giá trị đang cache, gọi lại LLM và ghi đè"""
+        if self.bypass:
+            self.stats.bypassed += 1
+            return await self.inner.extract(transcript)
+
+        key = self.cache_key(transcript)
+        if not refresh:
+            cached = await self._get(key)
+            if cached is not None:
+                return cached
+
+        self.stats.misses += 1
+        extraction = await self.inner.extract_detailed(transcript)
+        overlays = extraction.overlays
+        # Kết quả thiếu (window lỗi, response bị cắt, hết retry) hoặc rỗng → không cache, lần sau gọi lại
+        if extraction.complete and overlays:
+            await self._set(key, overlays)
+        logger.info(
+            "Keyword cache miss",
+            key=key,
+            overlay_count=len(overlays),
+            complete=extraction.complete,
+            hit_ratio=round(self.stats.hit_ratio, 3),
+        )
+        return overlays
+
+    async def _get(self, key: str) -> Optional[list[TextOverlay]]:
+        value = self.local_cache.get(key)
+        if value is not None:
+            self.stats.local_hits += 1
+            logger.info("Keyword cache hit", key=key, layer="local")
+            return self._decode(value)
+
+        if self.redis is None:
+            return None
+        try:
+            value = await self.redis.get(key)
+        except (RedisError, OSError) as exc:
+            self.stats.errors += 1
+            logger.warning("Keyword cache read failed", key=key, error=str(exc))
+            return None
+        if value is None:
+            return None
+
+        try:
+            overlays = self._decode(value)
+        except ValueError as exc:
+            # Giá trị hỏng / schema cũ → coi như miss, lần ghi sau sẽ đè
+            self.stats.errors += 1
+            logger.warning("Keyword cache value invalid", key=key, error=str(exc))
+            return None
+        self.stats.redis_hits += 1
+        self.local_cache.set(key, value)
+        logger.info("Keyword cache hit", key=key, layer="redis")
+        return overlays
+
+    async def _set(self, key: str, overlays: list[TextOverlay]) -> None:
+        value = json.dumps([o.model_dump(mode="json") for o in overlays], ensure_ascii=False).encode("utf-8")
+        if len(value) > self.max_value_bytes:
+            logger.info("Keyword cache skip oversized value", key=key, size=len(value))
+            return
+
+        self.local_cache.set(key, value)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(key, value, ex=self.ttl_seconds)
+        except (RedisError, OSError) as exc:
+            self.stats.errors += 1
+            logger.warning("Keyword cache write failed", key=key, error=str(exc))
+
+    @staticmethod
+    def _decode(value: bytes) -> list[TextOverlay]:
+        return [TextOverlay.model_validate(item) for item in json.loads(value)]
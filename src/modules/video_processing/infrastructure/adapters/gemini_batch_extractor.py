@@ -0,0 +1,306 @@
+"""
+Gemini Batch API — extract keyword hàng loạt cho back-catalogue
+submit: mọi transcript → một file JSONL (mỗi dòng một request, key = "<job key>#<part>")
+→ upload → tạo batch. poll: state của batch. collect: tải file kết quả → parse/snap/ghép
+như đường interactive. Batch trả kết quả trong vòng 24h nên mỗi bước là một lời gọi
+ngắn; caller lưu (tên batch, requests) và poll định kỳ thay vì chờ trong một task.
+Không đi qua pool key interactive (batch có quota riêng, rẻ hơn); job interactive vẫn
+dùng GeminiKeywordExtractor.
+Gọi REST bằng httpx (không qua SDK) để trỏ base_url vào stub server khi test.
+"""
+
+import json
+import uuid
+from dataclasses import asdict
+from typing import Any, Mapping, Optional
+
+import httpx
+import structlog
+from pydantic import TypeAdapter
+
+from src.modules.video_processing.domain.ports import IBatchKeywordExtractorPort
+from src.modules.video_processing.domain.timing_index import WordTimingIndex
+from src.modules.video_processing.domain.value_objects import KeywordBatchState, TextOverlay, Transcript
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import (
+    GEMINI_MODEL,
+    GEMINI_TEMPERATURE,
+    SYSTEM_PROMPT,
+    GeminiKeywordExtractor,
+    OverlayCandidate,
+    TranscriptWindow,
+)
+from src.shared.config.settings import settings
+
+logger = structlog.get_logger()
+
+BATCH_STATE_SUCCEEDED = "BATCH_STATE_SUCCEEDED"
+BATCH_TERMINAL_STATES = {
+    BATCH_STATE_SUCCEEDED,
+    "BATCH_STATE_FAILED",
+    "BATCH_STATE_CANCELLED",
+    "BATCH_STATE_EXPIRED",
+}
+
+
+class GeminiBatchError(RuntimeError):
+    pass
+
+
+def _inline_refs(schema: Any, defs: dict[str, Any]) -> Any:
+    """Thay $ref bằng định nghĩa trong $defs (schema gửi kèm request phải tự chứa)"""
+    if isinstance(schema, dict):
+        ref = schema.get("$ref")
+        if ref:
+            return _inline_refs(defs[ref.rsplit("/", 1)[-1]], defs)
+        return {k: _inline_refs(v, defs) for k, v in schema.items() if k != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_refs(item, defs) for item in schema]
+    return schema
+
+
+def overlay_json_schema() -> dict[str, Any]:
+    schema = TypeAdapter(list[OverlayCandidate]).json_schema()
+    return _inline_refs(schema, schema.get("$defs", {}))
+
+
+# ── REST client ───────────────────────────────────────────────────────────────
+
+class GeminiBatchClient:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        http: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.base_url = (base_url or settings.GEMINI_API_BASE_URL).rstrip("/")
+        self._http = http or httpx.AsyncClient(timeout=settings.GEMINI_HTTP_TIMEOUT_SECONDS)
+        self._headers = {"x-goog-api-key": api_key}
+
+    async def upload_file(self, data: bytes, display_name: str, mime_type: str = "application/jsonl") -> str:
+        """Resumable upload (start + upload/finalize), trả về tên file dạng "files/..." """
+        start = await self._http.post(
+            f"{self.base_url}/upload/v1beta/files",
+            headers={
+                **self._headers,
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(len(data)),
+                "X-Goog-Upload-Header-Content-Type": mime_type,
+            },
+            json={"file": {"display_name": display_name}},
+        )
+        self._check(start)
+        upload_url = start.headers.get("x-goog-upload-url")
+        if not upload_url:
+            raise GeminiBatchError("Upload start không trả về x-goog-upload-url")
+
+        finish = await self._http.post(
+            upload_url,
+            headers={
+                **self._headers,
+                "X-Goog-Upload-Offset": "0",
+                "X-Goog-Upload-Command": "upload, finalize",
+            },
+            content=data,
+        )
+        self._check(finish)
+        return finish.json()["file"]["name"]
+
+    async def create_batch(self, model: str, file_name: str, display_name: str) -> str:
+        response = await self._http.post(
+            f"{self.base_url}/v1beta/models/{model}:batchGenerateContent",
+            headers=self._headers,
+            json={"batch": {"display_name": display_name, "input_config": {"file_name": file_name}}},
+        )
+        self._check(response)
+        return response.json()["name"]
+
+    async def get_batch(self, name: str) -> dict[str, Any]:
+        response = await self._http.get(f"{self.base_url}/v1beta/{name}", headers=self._headers)
+        self._check(response)
+        return response.json()
+
+    async def cancel_batch(self, name: str) -> None:
+        response = await self._http.post(f"{self.base_url}/v1beta/{name}:cancel", headers=self._headers)
+        self._check(response)
+
+    async def download_file(self, file_name: str) -> bytes:
+        response = await self._http.get(
+            f"{self.base_url}/download/v1beta/{file_name}:download",
+            headers=self._headers,
+            params={"alt": "media"},
+        )
+        self._check(response)
+        return response.content
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    @staticmethod
+    def _check(response: httpx.Response) -> None:
+        if response.is_error:
+            raise GeminiBatchError(f"Gemini batch API {response.status_code}: {response.text[:500]}")
+
+
+def batch_state(operation: dict[str, Any]) -> Optional[str]:
+    return (operation.get("metadata") or {}).get("state") or operation.get("state")
+
+
+def responses_file(operation: dict[str, Any]) -> Optional[str]:
+    return (
+        (operation.get("response") or {}).get("responsesFile")
+        or ((operation.get("metadata") or {}).get("output") or {}).get("responsesFile")
+    )
+
+
+def response_text(record: dict[str, Any]) -> Optional[str]:
+    """Text của candidate đầu tiên trong một dòng kết quả; None nếu request đó lỗi"""
+    if record.get("error") or record.get("status"):
+        return None
+    candidates = (record.get("response") or {}).get("candidates") or []
+    if not candidates:
+        return None
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    text = "".join(part.get("text", "") for part in parts)
+    return text or None
+
+
+# ── Adapter ───────────────────────────────────────────────────────────────────
+
+class GeminiBatchKeywordExtractor(IBatchKeywordExtractorPort):
+    """
+    Dùng lại prompt / window / parse / snap của GeminiKeywordExtractor, chỉ khác đường gửi:
+    một batch cho cả loạt transcript thay vì từng request interactive.
+    """
+
+    def __init__(
+        self,
+        client: Optional[GeminiBatchClient] = None,
+        extractor: Optional[GeminiKeywordExtractor] = None,
+    ) -> None:
+        self.extractor = extractor or GeminiKeywordExtractor()
+        self.client = client or GeminiBatchClient(self.extractor.api_keys[0])
+
+    async def submit(self, transcripts: Mapping[str, Transcript]) -> Optional[tuple[str, dict[str, Any]]]:
+        # request key → {"job": job key, "window": TranscriptWindow | None} (JSON, lưu cùng batch)
+        requests: dict[str, Any] = {}
+        lines: list[str] = []
+        for key, transcript in transcripts.items():
+            if not transcript.full_text.strip():
+                continue
+            for part, (prompt, window) in enumerate(self.extractor.build_prompts(transcript), start=1):
+                request_key = f"{key}#{part}"
+                requests[request_key] = {"job": key, "window": asdict(window) if window else None}
+                lines.append(json.dumps({"key": request_key, "request": self._request_body(prompt)}, ensure_ascii=False))
+        if not lines:
+            return None
+
+        display_name = f"keyword-extraction-{uuid.uuid4().hex[:12]}"
+        file_name = await self.client.upload_file(("\n".join(lines) + "\n").encode("utf-8"), display_name)
+        batch_name = await self.client.create_batch(GEMINI_MODEL, file_name, display_name)
+        logger.info("Gemini batch submitted", batch=batch_name, jobs=len(transcripts), requests=len(lines))
+        return batch_name, requests
+
+    async def poll(self, name: str) -> KeywordBatchState:
+        state = batch_state(await self.client.get_batch(name))
+        if state == BATCH_STATE_SUCCEEDED:
+            return KeywordBatchState.SUCCEEDED
+        if state in BATCH_TERMINAL_STATES:
+            logger.warning("Gemini batch did not succeed", batch=name, state=state)
+            return KeywordBatchState.FAILED
+        logger.debug("Gemini batch pending", batch=name, state=state)
+        return KeywordBatchState.RUNNING
+
+    async def collect(
+        self, name: str, requests: Mapping[str, Any], transcripts: Mapping[str, Transcript]
+    ) -> dict[str, list[TextOverlay]]:
+        operation = await self.client.get_batch(name)
+        state = batch_state(operation)
+        if state != BATCH_STATE_SUCCEEDED:
+            raise GeminiBatchError(f"Batch {name} chưa thành công (state={state})")
+        output = responses_file(operation)
+        if not output:
+            raise GeminiBatchError(f"Batch {name} không có file kết quả")
+
+        targets = {
+            request_key: (target["job"], TranscriptWindow(**target["window"]) if target["window"] else None)
+            for request_key, target in requests.items()
+            if target["job"] in transcripts
+        }
+        results = self._collect(await self.client.download_file(output), targets, transcripts)
+        logger.info("Gemini batch collected", batch=name, jobs=len(results), failed_jobs=len(transcripts) - len(results))
+        return results
+
+    async def cancel(self, name: str) -> None:
+        await self.client.cancel_batch(name)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    # ── Private ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _request_body(prompt: str) -> dict[str, Any]:
+        return {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "system_instruction": {"parts": [{"text": SYSTEM_PROMPT}]},
+            "generation_config": {
+                "temperature": GEMINI_TEMPERATURE,
+                "response_mime_type": "application/json",
+                "response_json_schema": overlay_json_schema(),
+            },
+        }
+
+    def _collect(
+        self,
+        raw: bytes,
+        requests: dict[str, tuple[str, Optional[TranscriptWindow]]],
+        transcripts: Mapping[str, Transcript],
+    ) -> dict[str, list[TextOverlay]]:
+        """
+        Fan kết quả về từng job. Job có part lỗi hoặc response bị cắt bị bỏ (submit lại ở lần
+        sau): kết quả ghi vào job là vĩnh viễn, không lưu bản thiếu window.
+        """
+        overlays: dict[str, list[TextOverlay]] = {}
+        done: dict[str, int] = {}
+        indexes: dict[str, WordTimingIndex] = {}
+        for line in raw.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                # Một dòng hỏng không làm mất kết quả của cả batch
+                logger.warning("Gemini batch result line malformed", error=str(exc), line=line[:200])
+                continue
+            target = requests.get(record.get("key", ""))
+            if target is None:
+                continue
+            job_key, window = target
+            text = response_text(record)
+            if text is None:
+                logger.warning("Gemini batch request failed", key=record.get("key"), error=record.get("error"))
+                continue
+
+            transcript = transcripts[job_key]
+            index = indexes.get(job_key)
+            if index is None:
+                index = indexes[job_key] = WordTimingIndex(transcript.words)
+            try:
+                parsed = self.extractor.parse_response(text, transcript, index, window)
+            except ValueError as exc:
+                logger.warning("Gemini batch response invalid", key=record.get("key"), error=str(exc))
+                continue
+            if not parsed.complete:
+                continue
+            overlays.setdefault(job_key, []).extend(parsed.overlays)
+            done[job_key] = done.get(job_key, 0) + 1
+
+        parts = {}
+        for job_key, _ in requests.values():
+            parts[job_key] = parts.get(job_key, 0) + 1
+        return {
+            job_key: self.extractor.combine(job_overlays, windowed=parts[job_key] > 1)
+            for job_key, job_overlays in overlays.items()
+            if done[job_key] == parts[job_key]
+        }
@@ -0,0 +1,301 @@
+"""
+Pool API key Gemini dùng chung trong process
+Mỗi key có token bucket (RPM), cooldown theo Retry-After khi bị 429/503 và đếm
+request đang chạy. acquire() chọn key rảnh nhất còn token; không còn key dùng được
+thì chờ tới thời điểm key sớm nhất hồi lại, thay vì dồn hết vào key đầu tiên.
+
+Trạng thái (bucket, cooldown) sống suốt process worker; client HTTP thì gắn với
+event loop (mỗi Celery task là một asyncio.run) → tạo lại khi loop đổi và phải
+đóng qua close_key_pools() trước khi loop kết thúc; client của loop đã đóng không
+đóng lại được.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Optional
+
+import httpx
+import structlog
+from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
+
+from src.shared.config.settings import settings
+
+logger = structlog.get_logger()
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # httpx[http2] chưa cài → HTTP/1.1 keep-alive
+    HTTP2_AVAILABLE = False
+
+RATE_LIMIT_STATUS_CODES = (429, 503)
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)s\s*$")
+
+
+class AllKeysExhaustedError(RuntimeError):
+    """Không key nào dùng được trong thời gian chờ cho phép"""
+
+
+# ── Token bucket ──────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float, now: float) -> None:
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated_at = now
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+        self._updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Số giây tới khi có đủ 1 token"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate_per_second
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+# ── Key slot ──────────────────────────────────────────────────────────────────
+
+@dataclass
+class KeyStats:
+    requests: int = 0
+    rate_limited: int = 0
+
+
+@dataclass(eq=False)
+class GeminiKeySlot:
+    key: str
+    bucket: TokenBucket
+    cooldown_until: float = 0.0
+    in_flight: int = 0
+    stats: KeyStats = field(default_factory=KeyStats)
+    _client: Any = field(default=None, repr=False)
+    _http: Optional[httpx.AsyncClient] = field(default=None, repr=False)
+    _loop: Optional[asyncio.AbstractEventLoop] = field(default=None, repr=False)
+
+    @property
+    def label(self) -> str:
+        """Key rút gọn để log, không lộ key thật"""
+        return f"{self.key[:6]}…{self.key[-2:]}" if len(self.key) > 8 else "…"
+
+    def available_at(self, now: float) -> float:
+        return max(self.cooldown_until, now + self.bucket.wait_time(now))
+
+    def client(self) -> Any:
+        """genai.Client của key cho event loop hiện tại (connection HTTP giữ lại giữa các request)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._http is not None:
+                self._close_stale_http(self._http, self._loop)
+            self._http = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=settings.GEMINI_HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_keepalive_connections=settings.GEMINI_MAX_IN_FLIGHT_PER_KEY),
+            )
+            self._client = genai.Client(
+                api_key=self.key,
+                http_options=genai_types.HttpOptions(httpx_async_client=self._http),
+            )
+            self._loop = loop
+        return self._client
+
+    def _close_stale_http(self, http: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        Client cũ chỉ đóng được trên loop đã tạo ra nó. Loop đó còn chạy (thread khác) → đóng ở đó;
+        loop đã đóng thì connection không đóng sạch được nữa → đường được hỗ trợ là close_key_pools()
+        trước khi loop kết thúc (như _run_async của worker).
+        """
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(http.aclose(), loop)
+            return
+        logger.warning("Gemini HTTP client dropped without close; call close_key_pools() before the loop ends", key=self.label)
+
+    async def aclose(self) -> None:
+        http, self._http, self._client, self._loop = self._http, None, None, None
+        if http is not None:
+            await http.aclose()
+
+
+# ── Pool ──────────────────────────────────────────────────────────────────────
+
+class GeminiKeyPool:
+    def __init__(
+        self,
+        api_keys: list[str],
+        requests_per_minute: float = 10.0,
+        burst: int = 2,
+        max_in_flight_per_key: int = 4,
+        cooldown_seconds: float = 30.0,
+        acquire_timeout_seconds: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not api_keys:
+            raise ValueError("GeminiKeyPool cần ít nhất một API key")
+        self.max_in_flight_per_key = max_in_flight_per_key
+        self.cooldown_seconds = cooldown_seconds
+        self.acquire_timeout_seconds = acquire_timeout_seconds
+        self._clock = clock
+        now = clock()
+        self.slots = [
+            GeminiKeySlot(key=key, bucket=TokenBucket(requests_per_minute / 60.0, burst, now))
+            for key in api_keys
+        ]
+        # Chỉ giữ trong đoạn tính toán đồng bộ (không await) → dùng được từ mọi event loop
+        self._lock = threading.Lock()
+
+    def _try_reserve(self) -> tuple[Optional[GeminiKeySlot], float]:
+        """(slot đã trừ token, 0) hoặc (None, số giây nên chờ)"""
+        with self._lock:
+            now = self._clock()
+            ready = [
+                slot for slot in self.slots
+                if slot.cooldown_until <= now
+                and slot.in_flight < self.max_in_flight_per_key
+                and slot.bucket.wait_time(now) == 0
+            ]
+            if ready:
+                # Least-loaded: ít request đang chạy nhất, rồi nhiều token nhất, rồi ít dùng nhất
+                slot = min(ready, key=lambda s: (s.in_flight, -s.bucket.tokens, s.stats.requests))
+                slot.bucket.take(now)
+                slot.in_flight += 1
+                slot.stats.requests += 1
+                return slot, 0.0
+
+            waits = [
+                slot.available_at(now) - now
+                for slot in self.slots
+                if slot.in_flight < self.max_in_flight_per_key
+            ]
+            # Mọi key đều đầy in-flight → poll lại sau một nhịp ngắn
+            return None, min(waits) if waits else 0.05
+
+    async def acquire(self) -> GeminiKeySlot:
+        deadline = self._clock() + self.acquire_timeout_seconds
+        while True:
+            slot, wait = self._try_reserve()
+            if slot is not None:
+                return slot
+            if self._clock() + wait > deadline:
+                raise AllKeysExhaustedError(
+                    f"Không có Gemini API key khả dụng trong {self.acquire_timeout_seconds:.0f}s"
+                )
+            await asyncio.sleep(max(wait, 0.01))
+
+    def release(self, slot: GeminiKeySlot) -> None:
+        with self._lock:
+            slot.in_flight -= 1
+
+    def cooldown(self, slot: GeminiKeySlot, retry_after: Optional[float] = None) -> None:
+        """Key bị 429/503: tạm ngừng dùng trong Retry-After (hoặc cooldown mặc định)"""
+        seconds = retry_after if retry_after is not None else self.cooldown_seconds
+        with self._lock:
+            slot.cooldown_until = max(slot.cooldown_until, self._clock() + seconds)
+            slot.stats.rate_limited += 1
+        logger.warning("Gemini key cooling down", key=slot.label, seconds=round(seconds, 1))
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[GeminiKeySlot]:
+        slot = await self.acquire()
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            return [
+                {
+                    "key": slot.label,
+                    "in_flight": slot.in_flight,
+                    "requests": slot.stats.requests,
+                    "rate_limited": slot.stats.rate_limited,
+                    "cooldown_seconds": round(max(0.0, slot.cooldown_until - now), 1),
+                }
+                for slot in self.slots
+            ]
+
+    async def aclose(self) -> None:
+        for slot in self.slots:
+            await slot.aclose()
+
+
+# ── Lỗi rate limit ────────────────────────────────────────────────────────────
+
+def is_rate_limited(exc: BaseException) -> bool:
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in RATE_LIMIT_STATUS_CODES or exc.status == "RESOURCE_EXHAUSTED"
+    message = str(exc).lower()
+    return "429" in message or "503" in message or "quota" in message or "exhausted" in message
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Retry-After header, hoặc RetryInfo.retryDelay ("27s") trong body lỗi của Gemini"""
+    response = getattr(exc, "response", None)
+    header = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    details = getattr(exc, "details", None)
+    if isinstance(details, dict):
+        for item in details.get("error", {}).get("details", []) or []:
+            delay = item.get("retryDelay") if isinstance(item, dict) else None
+            match = _DURATION_RE.match(delay) if isinstance(delay, str) else None
+            if match:
+                return float(match.group(1))
+    return None
+
+
+# ── Registry trong process ────────────────────────────────────────────────────
+
+_pools: dict[tuple[str, ...], GeminiKeyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_key_pool(api_keys: list[str]) -> GeminiKeyPool:
+    """Mọi extractor cùng bộ key dùng chung một pool (bucket + cooldown)"""
+    pool_key = tuple(api_keys)
+    with _pools_lock:
+        pool = _pools.get(pool_key)
+        if pool is None:
+            pool = GeminiKeyPool(
+                list(api_keys),
+                requests_per_minute=settings.GEMINI_REQUESTS_PER_MINUTE,
+                burst=settings.GEMINI_BURST,
+                max_in_flight_per_key=settings.GEMINI_MAX_IN_FLIGHT_PER_KEY,
+                cooldown_seconds=settings.GEMINI_COOLDOWN_SECONDS,
+                acquire_timeout_seconds=settings.GEMINI_ACQUIRE_TIMEOUT_SECONDS,
+            )
+            _pools[pool_key] = pool
+        return pool
+
+
+async def close_key_pools() -> None:
+    """Đóng client HTTP của mọi pool (gọi trước khi event loop đóng)"""
+    for pool in list(_pools.values()):
+        await pool.aclose()
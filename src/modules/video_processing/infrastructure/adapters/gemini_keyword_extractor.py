@@ -3,22 +3,45 @@ Gemini Flash Keyword Extractor
 Implements IKeywordExtractorPort — phân tích transcript và trả về TextOverlay[]
 """
 
+import asyncio
+import hashlib
 import json
+import math
 import os
-import asyncio
+import time
 import structlog
-from typing import Any
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
 
-from google import genai
 from google.genai import types as genai_types
+from pydantic import BaseModel
 
 from src.modules.video_processing.domain.ports import IKeywordExtractorPort
+from src.modules.video_processing.domain.timing_index import WordTimingIndex
 from src.modules.video_processing.domain.value_objects import (
     Transcript,
     TextOverlay,
     TextOverlayMode,
     TextOverlayPosition,
+    WordTimings,
+)
+from src.modules.video_processing.infrastructure.adapters.gemini_key_pool import (
+    AllKeysExhaustedError,
+    GeminiKeyPool,
+    get_key_pool,
+    is_rate_limited,
+    retry_after_seconds,
 )
+from src.modules.video_processing.infrastructure.adapters.json_stream import JsonArrayStreamParser
+from src.modules.video_processing.infrastructure.adapters.transcript_prompt import (
+    PROMPT_FORMAT_JSON,
+    PROMPT_FORMATS,
+    encode_timed_lines,
+    encode_words_json,
+    estimate_tokens,
+)
+from src.shared.config.settings import settings
 
 logger = structlog.get_logger()
 
@@ -27,9 +50,7 @@ logger = structlog.get_logger()
 SYSTEM_PROMPT = """You are a professional video editor and content strategist specializing in YouTube and social media video production.
 Your job is to analyze a video transcript and identify the most impactful keywords and phrases to display as visual text overlays — similar to what top educational and marketing YouTube channels use.
 
-You will receive:
-- full_text: the complete spoken transcript
-- words: an array of word-level segments with start/end timestamps (seconds)
+You will receive the complete spoken transcript with timestamps in seconds (the exact format is described in the user message).
 
 Your task:
 Your task:
@@ -97,11 +118,104 @@ Word-level timestamps:
 
 Analyze this transcript and return the text overlay callouts as JSON."""
 
+# Format gọn (mặc định): không lặp key JSON / full_text, time làm tròn 0.1s
+LINES_PROMPT_TEMPLATE = """Video transcript, one phrase per line.
+Each line starts with t=<seconds>: the start time of the first word on that line. The words after it are spoken in order from that moment; a line never spans a pause, so estimate a later word's time from its position in the line.
+
+{timed_lines}
+
+Analyze this transcript and return the text overlay callouts as JSON."""
+
+# Windowed mode: thêm vào trước prompt transcript, ghi đè quota 15–30 của cả video
+WINDOW_PROMPT_TEMPLATE = """This is part {part} of {parts} of a longer video, covering {window_start:.1f}s to {window_end:.1f}s.
+Other parts are analyzed separately, so for THIS part only:
+- Return at most {max_callouts} callouts, including about {b_roll} B_ROLL_VIDEO (0 is fine if nothing fits).
+- Every "start" MUST be between {window_start:.1f} and {window_end:.1f}.
+
+"""
+
+
+
+class OverlayCandidate(BaseModel):
+    """response_schema cho Gemini structured output: mỗi phần tử của JSON array trả về"""
+    text: str
+    start: float
+    end: float
+    mode: TextOverlayMode
+    position: TextOverlayPosition
+    search_query: Optional[str] = None
+    highlight_word: Optional[str] = None
+    reason: Optional[str] = None
+
+
 # ── Constants ─────────────────────────────────────────────────────────────────
 
 MAX_RETRIES = 2
 MIN_GAP_SECONDS = 3.0
+# Snap-to-word: khoảng lệch tối đa giữa timestamp LLM trả về và word/câu thật
+WORD_SNAP_SECONDS = 2.0
+SENTENCE_SNAP_SECONDS = 0.6
+HIGHLIGHT_SNAP_SECONDS = 3.0
 GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_TEMPERATURE = 0.3
+# Ràng buộc toàn cục khi ghép kết quả các window (khớp quota trong SYSTEM_PROMPT)
+MAX_OVERLAYS = 30
+MAX_B_ROLLS = 7
+
+
+@dataclass(frozen=True)
+class TranscriptWindow:
+    """Cửa sổ thời gian của transcript; overlay chỉ được giữ nếu start nằm trong [own_start, own_end)"""
+    start: float
+    end: float
+    own_start: float
+    own_end: float
+    first_word: int
+    last_word: int  # exclusive
+
+
+@dataclass
+class KeywordExtraction:
+    """
+    Overlays kèm trạng thái: complete=False khi có window lỗi, response bị cắt hoặc hết retry
+    → overlays chỉ là một phần, không lưu lâu dài (cache, batch) để lần sau gọi lại.
+    """
+    overlays: list[TextOverlay]
+    complete: bool = True
+
+
+def plan_windows(transcript: Transcript, window_seconds: float, overlap_seconds: float) -> list[TranscriptWindow]:
+    """
+    Chia transcript thành các window dài window_seconds, chồng nhau overlap_seconds.
+    Vùng chồng được chia đôi cho 2 window kề nhau → mỗi overlay chỉ thuộc một window.
+    Video ngắn (vừa một window) → [] (dùng prompt nguyên transcript như cũ).
+    """
+    words = transcript.words
+    if window_seconds <= 0 or not len(words):
+        return []
+    starts = words.starts  # ASR trả word theo thứ tự thời gian → bisect được
+    begin, finish = starts[0], max(words.ends)
+    if finish - begin <= window_seconds:
+        return []
+
+    overlap_seconds = min(overlap_seconds, window_seconds / 2)
+    count = math.ceil((finish - begin - overlap_seconds) / (window_seconds - overlap_seconds))
+    # Chia đều để window cuối không bị quá ngắn
+    length = (finish - begin + (count - 1) * overlap_seconds) / count
+    step = length - overlap_seconds
+    windows: list[TranscriptWindow] = []
+    for i in range(count):
+        start = begin + i * step
+        end = start + length if i < count - 1 else finish
+        windows.append(TranscriptWindow(
+            start=start,
+            end=end,
+            own_start=-math.inf if i == 0 else begin + i * step + overlap_seconds / 2,
+            own_end=math.inf if i == count - 1 else begin + (i + 1) * step + overlap_seconds / 2,
+            first_word=bisect_left(starts, start),
+            last_word=bisect_left(starts, end) if i < count - 1 else len(words),
+        ))
+    return windows
 
 
 # ── Adapter ───────────────────────────────────────────────────────────────────
@@ -113,145 +227,338 @@ class GeminiKeywordExtractor(IKeywordExtractorPort):
     Enforce min-gap 3s giữa các overlay.
     """
 
-    def __init__(self, api_keys: list[str] | None = None) -> None:
+    def __init__(
+        self,
+        api_keys: list[str] | None = None,
+        key_pool: GeminiKeyPool | None = None,
+        window_seconds: float | None = None,
+        prompt_format: str | None = None,
+    ) -> None:
+        """
+        window_seconds: độ dài window khi chia transcript dài (0 = luôn gửi nguyên transcript)
+        prompt_format: "json" (format cũ) | "lines" (gọn) — mặc định KEYWORD_PROMPT_FORMAT
+        """
         if api_keys:
             self.api_keys = api_keys
         else:
-            keys_str = os.environ.get("GEMINI_API_KEYS", os.environ.get("GEMINI_API_KEY", ""))
+            keys_str = (
+                os.environ.get("GEMINI_API_KEYS")
+                or os.environ.get("GEMINI_API_KEY")
+                or settings.GEMINI_API_KEYS
+                or settings.GEMINI_API_KEY
+                or ""
+            )
             self.api_keys = [k.strip() for k in keys_str.split(",") if k.strip()]
-            
+
         if not self.api_keys:
             raise ValueError("GEMINI_API_KEYS chưa được set trong environment")
-        
-        # Initialize default client with the first key
-        self._keys_index = 0
-        self._client = genai.Client(api_key=self.api_keys[0])
+
+        # Pool dùng chung trong process: mọi job cùng bộ key chia sẻ bucket + cooldown
+        self._key_pool = key_pool or get_key_pool(self.api_keys)
+        self.window_seconds = settings.KEYWORD_WINDOW_SECONDS if window_seconds is None else window_seconds
+        self.window_overlap_seconds = settings.KEYWORD_WINDOW_OVERLAP_SECONDS
+        self.window_concurrency = max(1, settings.KEYWORD_WINDOW_CONCURRENCY)
+        self.prompt_format = prompt_format or settings.KEYWORD_PROMPT_FORMAT
+        if self.prompt_format not in PROMPT_FORMATS:
+            raise ValueError(f"prompt_format không hợp lệ: {self.prompt_format!r}")
+
+    @property
+    def cache_fingerprint(self) -> str:
+        """
+        Mọi thứ ngoài transcript quyết định output (model, prompt, tham số snap)
+        → đổi prompt / model thì cache key cũ tự hết hiệu lực.
+        """
+        parts = [
+            GEMINI_MODEL, str(GEMINI_TEMPERATURE), SYSTEM_PROMPT, USER_PROMPT_TEMPLATE,
+            LINES_PROMPT_TEMPLATE, self.prompt_format,
+            str(MIN_GAP_SECONDS), str(WORD_SNAP_SECONDS), str(SENTENCE_SNAP_SECONDS), str(HIGHLIGHT_SNAP_SECONDS),
+            WINDOW_PROMPT_TEMPLATE, str(self.window_seconds), str(self.window_overlap_seconds),
+            str(MAX_OVERLAYS), str(MAX_B_ROLLS),
+            json.dumps(OverlayCandidate.model_json_schema(), sort_keys=True),
+        ]
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
 
     async def extract(self, transcript: Transcript) -> list[TextOverlay]:
         """Phân tích transcript → TextOverlay[] với word-level sync"""
+        return (await self.extract_detailed(transcript)).overlays
+
+    async def extract_detailed(self, transcript: Transcript) -> KeywordExtraction:
+        """Như extract() nhưng cho biết kết quả có đầy đủ không (CachedKeywordExtractor dùng)"""
         if not transcript.full_text.strip():
             logger.warning("Empty transcript, skipping keyword extraction")
-            return []
+            return KeywordExtraction([])
+
+        # Build một lần, dùng lại cho mọi overlay, mọi window và mọi lần retry
+        index = WordTimingIndex(transcript.words)
+
+        prompts = self.build_prompts(transcript)
+        if prompts[0][1] is not None:
+            return await self._extract_windowed(transcript, prompts, index)
+
+        extraction = await self._extract_with_retry(prompts[0][0], transcript, index)
+        extraction.overlays = self.combine(extraction.overlays)
+        if extraction.overlays:
+            logger.info("Keyword extraction successful", count=len(extraction.overlays), complete=extraction.complete)
+        return extraction
 
-        words_json = json.dumps(
-            [w.model_dump() for w in transcript.words], ensure_ascii=False
+    def build_prompts(self, transcript: Transcript) -> list[tuple[str, TranscriptWindow | None]]:
+        """
+        User prompt cho từng request: [(prompt, None)] với transcript ngắn,
+        hoặc một prompt mỗi window (dùng chung cho gọi trực tiếp và Batch API).
+        """
+        windows = plan_windows(transcript, self.window_seconds, self.window_overlap_seconds)
+        if not windows:
+            return [(self._build_user_prompt(transcript.words, transcript.full_text), None)]
+
+        total = windows[-1].end - windows[0].start
+        prompts = []
+        for part, window in enumerate(windows, start=1):
+            share = (window.end - window.start) / total
+            words = transcript.words[window.first_word:window.last_word]
+            prompt = WINDOW_PROMPT_TEMPLATE.format(
+                part=part,
+                parts=len(windows),
+                window_start=window.start,
+                window_end=window.end,
+                max_callouts=math.ceil(MAX_OVERLAYS * share) + 1,
+                b_roll=math.ceil(MAX_B_ROLLS * share),
+            ) + self._build_user_prompt(words)
+            prompts.append((prompt, window))
+        return prompts
+
+    @staticmethod
+    def owned_by(overlays: list[TextOverlay], window: TranscriptWindow | None) -> list[TextOverlay]:
+        """Chỉ giữ overlay thuộc window (vùng chồng chia đôi → không trùng giữa 2 window)"""
+        if window is None:
+            return overlays
+        return [o for o in overlays if window.own_start <= o.start < window.own_end]
+
+    def combine(self, overlays: list[TextOverlay], windowed: bool = False) -> list[TextOverlay]:
+        """Ràng buộc toàn cục: min-gap, và quota tổng / B-Roll khi ghép nhiều window"""
+        overlays = self._enforce_min_gap(overlays)
+        return self._limit_overlays(overlays) if windowed else overlays
+
+    def parse_response(
+        self, raw: str, transcript: Transcript, index: WordTimingIndex, window: TranscriptWindow | None = None
+    ) -> KeywordExtraction:
+        """
+        Response đầy đủ (vd. từ Batch API) → overlays đã snap, thuộc window.
+        Giống đường streaming: response bị cắt vẫn giữ các phần tử đã đủ (complete=False).
+        """
+        parser = JsonArrayStreamParser()
+        items = parser.feed(raw)
+        complete = True
+        try:
+            parser.close()
+        except ValueError as exc:
+            if not items:
+                raise
+            logger.warning("Gemini response incomplete, keeping parsed overlays", count=len(items), error=str(exc))
+            complete = False
+        overlays = [overlay for overlay in (self._to_overlay(item, index) for item in items) if overlay is not None]
+        return KeywordExtraction(self.owned_by(overlays, window), complete)
+
+    async def _extract_windowed(
+        self, transcript: Transcript, prompts: list[tuple[str, TranscriptWindow | None]], index: WordTimingIndex
+    ) -> KeywordExtraction:
+        """
+        Mỗi window một request (song song, giới hạn bởi window_concurrency + key pool), rồi ghép.
+        Window lỗi bị bỏ qua (trừ khi lỗi hết) → complete=False.
+        """
+        semaphore = asyncio.Semaphore(self.window_concurrency)
+
+        async def run(part: int, prompt: str, window: TranscriptWindow | None) -> KeywordExtraction:
+            async with semaphore:
+                extraction = await self._extract_with_retry(prompt, transcript, index, part=part)
+            extraction.overlays = self.owned_by(extraction.overlays, window)
+            return extraction
+
+        logger.info("Windowed keyword extraction", windows=len(prompts), word_count=len(transcript.words))
+        results = await asyncio.gather(
+            *(run(part, prompt, window) for part, (prompt, window) in enumerate(prompts, start=1)),
+            return_exceptions=True,
         )
-        user_prompt = USER_PROMPT_TEMPLATE.format(
-            full_text=transcript.full_text,
-            words_json=words_json,
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if len(failures) == len(results):
+            raise failures[0]
+        for failure in failures:
+            logger.warning("Keyword extraction window failed", error=str(failure))
+
+        succeeded = [r for r in results if not isinstance(r, BaseException)]
+        overlays = self.combine([o for r in succeeded for o in r.overlays], windowed=True)
+        complete = not failures and all(r.complete for r in succeeded)
+        logger.info(
+            "Keyword extraction successful",
+            count=len(overlays),
+            windows=len(prompts),
+            failed_windows=len(failures),
+            complete=complete,
         )
+        return KeywordExtraction(overlays, complete)
 
+    async def _extract_with_retry(
+        self, user_prompt: str, transcript: Transcript, index: WordTimingIndex, part: int | None = None
+    ) -> KeywordExtraction:
+        """
+        Stream response, parse + snap từng overlay ngay khi phần tử JSON đóng ngoặc.
+        Response bị cắt / stream lỗi giữa chừng → giữ các overlay đã nhận thay vì gọi lại
+        (complete=False); chỉ retry khi chưa nhận được overlay hợp lệ nào. Hết retry → [] (complete=False).
+        """
         for attempt in range(1, MAX_RETRIES + 2):
+            parser = JsonArrayStreamParser()
+            overlays: list[TextOverlay] = []
+            started = time.perf_counter()
             try:
-                logger.info("Calling Gemini keyword extraction", attempt=attempt)
-                raw = await asyncio.to_thread(
-                    self._call_gemini, user_prompt
-                )
-                overlays = self._parse_and_validate(raw, transcript)
-                overlays = self._enforce_min_gap(overlays)
-                logger.info(
-                    "Keyword extraction successful",
-                    count=len(overlays),
-                )
-                return overlays
+                logger.info("Calling Gemini keyword extraction", attempt=attempt, part=part)
+                async for chunk in self._stream_gemini(user_prompt):
+                    for item in parser.feed(chunk):
+                        overlay = self._to_overlay(item, index)
+                        if overlay is None:
+                            continue
+                        if not overlays:
+                            logger.info(
+                                "First overlay received",
+                                part=part,
+                                elapsed_ms=round((time.perf_counter() - started) * 1000),
+                            )
+                        overlays.append(overlay)
+                parser.close()
+                if parser.items_invalid:
+                    logger.warning("Skipped malformed overlay items", count=parser.items_invalid, part=part)
+                return KeywordExtraction(overlays)
 
-            except (json.JSONDecodeError, ValueError) as exc:
+            except Exception as exc:
+                if overlays:
+                    logger.warning(
+                        "Gemini response incomplete, keeping parsed overlays",
+                        count=len(overlays),
+                        part=part,
+                        error=str(exc),
+                    )
+                    return KeywordExtraction(overlays, complete=False)
+                if not isinstance(exc, ValueError):
+                    raise
                 logger.warning(
                     "Parse error, retrying",
                     attempt=attempt,
+                    part=part,
                     error=str(exc),
                 )
                 if attempt > MAX_RETRIES:
-                    logger.error("Keyword extraction failed after all retries")
-                    return []
+                    logger.error("Keyword extraction failed after all retries", part=part)
+                    return KeywordExtraction([], complete=False)
 
-        return []
+        return KeywordExtraction([], complete=False)
 
     # ── Private ───────────────────────────────────────────────────────────────
 
-    def _call_gemini(self, user_prompt: str) -> str:
-        """Gọi Gemini API (có cơ chế xoay trần API keys nếu dính lỗi Quota 429/503)"""
-        attempts = 0
-        max_attempts = len(self.api_keys)
-        
-        while attempts < max_attempts:
-            try:
-                response = self._client.models.generate_content(
-                    model=GEMINI_MODEL,
-                    contents=user_prompt,
-                    config=genai_types.GenerateContentConfig(
-                        system_instruction=SYSTEM_PROMPT,
-                        temperature=0.3,
-                    ),
-                )
-                return response.text
-            except Exception as e:
-                error_msg = str(e).lower()
-                if "429" in error_msg or "503" in error_msg or "quota" in error_msg or "exhausted" in error_msg:
-                    logger.warning(f"Key {self.api_keys[self._keys_index][:10]}... gặp lỗi {e}. Đang xoay vòng Key mới.")
-                    self._keys_index = (self._keys_index + 1) % len(self.api_keys)
-                    self._client = genai.Client(api_key=self.api_keys[self._keys_index])
-                    attempts += 1
-                else:
-                    raise e
-                    
-        raise Exception("Toàn bộ Gemini API Keys đều đã cạn kiệt Quota hoặc gặp lỗi kết nối.")
-
-    def _parse_and_validate(self, raw: str, transcript: Transcript) -> list[TextOverlay]:
-        """Parse JSON response → list[TextOverlay] với Pydantic validation và Snap-to-word"""
-        # Xóa markdown code fences nếu model trả về
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            lines = cleaned.splitlines()
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].startswith("```"):
-                lines = lines[:-1]
-            cleaned = "\n".join(lines).strip()
-
-        data: list[dict[str, Any]] = json.loads(cleaned)
-        if not isinstance(data, list):
-            raise ValueError(f"Expected JSON array, got {type(data)}")
-
-        overlays: list[TextOverlay] = []
-        for item in data:
-            try:
-                # Snap to word algorithm
-                llm_start = float(item["start"])
-                # Tim word gan start nhat (sai so < 2s)
-                snapped_start = llm_start
-                min_diff = 2.0
-                for w in transcript.words:
-                    diff = abs(w.start - llm_start)
-                    if diff < min_diff:
-                        min_diff = diff
-                        snapped_start = w.start
-                
-                start_time = snapped_start
-                end_time = float(item["end"])
-                
-                # Dam bao thoi gian B-Roll theo luat
-                mode_str = item.get("mode", "CINEMATIC_CALLOUT")
-                if mode_str == "B_ROLL_VIDEO":
-                    end_time = max(start_time + 5.0, min(start_time + 10.0, end_time))
-
-                overlay = TextOverlay(
-                    text=item.get("text", ""),
-                    start=start_time,
-                    end=end_time,
-                    mode=TextOverlayMode(mode_str),
-                    position=TextOverlayPosition(
-                        item.get("position", "bottom_left")
-                    ),
-                    reason=item.get("reason"),
-                    search_query=item.get("search_query"),
-                    highlight_word=item.get("highlight_word"),
-                )
-                overlays.append(overlay)
-            except Exception as exc:
-                logger.warning("Skipping invalid overlay", item=item, error=str(exc))
+    def _build_user_prompt(self, words: WordTimings, full_text: str | None = None) -> str:
+        if self.prompt_format == PROMPT_FORMAT_JSON:
+            prompt = USER_PROMPT_TEMPLATE.format(
+                full_text=full_text if full_text is not None else " ".join(words.word(i) for i in range(len(words))),
+                words_json=encode_words_json(words),
+            )
+        else:
+            prompt = LINES_PROMPT_TEMPLATE.format(timed_lines=encode_timed_lines(words))
+        logger.debug("Built keyword prompt", format=self.prompt_format, estimated_tokens=estimate_tokens(prompt))
+        return prompt
+
+    async def _stream_gemini(self, user_prompt: str) -> AsyncIterator[str]:
+        """
+        Stream text từ Gemini (structured output theo OverlayCandidate) qua client async của key lấy từ pool.
+        429/503 trước khi nhận chunk nào → key đó cooldown theo Retry-After, thử key khác
+        (tối đa mỗi key một lần); lỗi sau khi đã nhận chunk thì ném ra cho caller giữ phần đã parse.
+        """
+        config = genai_types.GenerateContentConfig(
+            system_instruction=SYSTEM_PROMPT,
+            temperature=GEMINI_TEMPERATURE,
+            response_mime_type="application/json",
+            response_schema=list[OverlayCandidate],
+        )
+        for _ in range(len(self.api_keys)):
+            async with self._key_pool.lease() as slot:
+                received = False
+                try:
+                    stream = await slot.client().aio.models.generate_content_stream(
+                        model=GEMINI_MODEL,
+                        contents=user_prompt,
+                        config=config,
+                    )
+                    async for chunk in stream:
+                        if chunk.text:
+                            received = True
+                            yield chunk.text
+                    return
+                except Exception as exc:
+                    if received or not is_rate_limited(exc):
+                        raise
+                    logger.warning("Gemini key rate limited, rotating", key=slot.label, error=str(exc))
+                    self._key_pool.cooldown(slot, retry_after_seconds(exc))
+
+        raise AllKeysExhaustedError("Toàn bộ Gemini API Keys đều đã cạn kiệt Quota hoặc gặp lỗi kết nối.")
+
+    def _parse_and_validate(
+        self, raw: str, transcript: Transcript, index: WordTimingIndex | None = None
+    ) -> list[TextOverlay]:
+        """Parse JSON response đầy đủ → list[TextOverlay] với Pydantic validation và Snap-to-word"""
+        if index is None:
+            index = WordTimingIndex(transcript.words)
+
+        # Parser bỏ qua markdown code fence trước '[' nếu model trả về
+        parser = JsonArrayStreamParser()
+        items = parser.feed(raw)
+        parser.close()
+        return [overlay for overlay in (self._to_overlay(item, index) for item in items) if overlay is not None]
+
+    def _to_overlay(self, item: Any, index: WordTimingIndex) -> TextOverlay | None:
+        """Một phần tử JSON → TextOverlay đã snap; None (kèm log) nếu không hợp lệ"""
+        try:
+            mode_str = item.get("mode", "CINEMATIC_CALLOUT")
+            start_time = self._snap_start(
+                index, float(item["start"]), item.get("highlight_word"), mode_str
+            )
+            end_time = float(item["end"])
+            # Không cắt ngang word đang nói
+            end_time = index.word_end_at(end_time) or end_time
+
+            # Dam bao thoi gian B-Roll theo luat
+            if mode_str == "B_ROLL_VIDEO":
+                end_time = max(start_time + 5.0, min(start_time + 10.0, end_time))
+
+            return TextOverlay(
+                text=item.get("text", ""),
+                start=start_time,
+                end=end_time,
+                mode=TextOverlayMode(mode_str),
+                position=TextOverlayPosition(
+                    item.get("position", "bottom_left")
+                ),
+                reason=item.get("reason"),
+                search_query=item.get("search_query"),
+                highlight_word=item.get("highlight_word"),
+            )
+        except Exception as exc:
+            logger.warning("Skipping invalid overlay", item=item, error=str(exc))
+            return None
+
+    @staticmethod
+    def _snap_start(
+        index: WordTimingIndex, llm_start: float, highlight_word: str | None, mode: str
+    ) -> float:
+        """
+        Snap start của overlay vào transcript:
+        B-Roll → lần xuất hiện highlight_word gần nhất; còn lại → đầu câu nếu rất gần,
+        không thì word gần nhất (sai số < WORD_SNAP_SECONDS); không có → giữ nguyên.
+        """
+        if mode == "B_ROLL_VIDEO" and highlight_word:
+            snapped = index.find_word(highlight_word, llm_start, HIGHLIGHT_SNAP_SECONDS)
+            if snapped is not None:
+                return snapped
 
-        return overlays
+        snapped = index.nearest_sentence_start(llm_start, SENTENCE_SNAP_SECONDS)
+        if snapped is None:
+            snapped = index.nearest_word_start(llm_start, WORD_SNAP_SECONDS)
+        return llm_start if snapped is None else snapped
 
     def _enforce_min_gap(self, overlays: list[TextOverlay]) -> list[TextOverlay]:
         """
@@ -276,3 +583,25 @@ class GeminiKeywordExtractor(IKeywordExtractorPort):
                 )
 
         return result
+
+    @staticmethod
+    def _limit_overlays(overlays: list[TextOverlay]) -> list[TextOverlay]:
+        """
+        Áp quota toàn cục sau khi ghép window: tối đa MAX_B_ROLLS B-Roll và MAX_OVERLAYS tổng,
+        lấy mẫu đều theo thời gian để không dồn vào đầu video.
+        """
+        b_rolls = [o for o in overlays if o.mode == TextOverlayMode.B_ROLL_VIDEO]
+        texts = [o for o in overlays if o.mode != TextOverlayMode.B_ROLL_VIDEO]
+        b_rolls = _spread(b_rolls, MAX_B_ROLLS)
+        texts = _spread(texts, MAX_OVERLAYS - len(b_rolls))
+        return sorted(b_rolls + texts, key=lambda o: o.start)
+
+
+def _spread(items: list[TextOverlay], limit: int) -> list[TextOverlay]:
+    """Chọn `limit` phần tử cách đều nhau (items đã sort theo start)"""
+    if len(items) <= limit:
+        return items
+    if limit <= 0:
+        return []
+    step = len(items) / limit
+    return [items[int(i * step + step / 2)] for i in range(limit)]
@@ -0,0 +1,105 @@
+"""
+Parser JSON array tăng dần cho response streaming của LLM
+feed(chunk) trả về các object cấp 1 đã đóng ngoặc đủ ([{...}, {...}, ...]) ngay khi
+nhận xong, không chờ hết response. Response bị cắt giữa chừng → các object đã trả về
+vẫn dùng được, close() báo lỗi cho phần còn dở.
+"""
+
+import json
+from typing import Any
+
+
+class JsonArrayStreamParser:
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0  # vị trí tiếp theo cần quét trong _buffer
+        self._started = False  # đã gặp '[' mở array
+        self._finished = False  # đã gặp ']' đóng array
+        self._depth = 0  # độ sâu bên trong array (1 = giữa các phần tử)
+        self._in_string = False
+        self._escape = False
+        self._item_start = -1
+        self.items_parsed = 0
+        self.items_invalid = 0
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, chunk: str) -> list[Any]:
+        """Thêm text, trả về các phần tử hoàn chỉnh mới (ValueError nếu top-level là object)"""
+        if self._finished or not chunk:
+            return []
+        self._buffer += chunk
+        items: list[Any] = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            ch = buffer[i]
+            if not self._started:
+                # Bỏ qua code fence / whitespace trước '['
+                if ch == "[":
+                    self._started = True
+                    self._depth = 1
+                elif ch == "{":
+                    raise ValueError("Expected JSON array, got object")
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth == 1:
+                    self._item_start = i
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 1:
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finished = True
+                    self._scalar_item(buffer, i, items)
+                    break
+                if self._depth == 1:
+                    self._emit(buffer[self._item_start:i + 1], items)
+                    self._item_start = -1
+            elif ch == "," and self._depth == 1:
+                self._scalar_item(buffer, i, items)
+            elif self._depth == 1 and self._item_start < 0 and not ch.isspace():
+                self._item_start = i  # số / true / false / null
+            i += 1
+
+        # Giữ lại phần chưa xong của phần tử đang dở, bỏ phần đã xử lý
+        keep_from = self._item_start if self._item_start >= 0 else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._item_start >= 0:
+            self._item_start = 0
+        self.items_parsed += len(items)
+        return items
+
+    def close(self) -> None:
+        """Gọi khi hết stream; ValueError nếu array chưa đóng (response bị cắt)"""
+        if not self._started:
+            raise ValueError("No JSON array in response")
+        if not self._finished:
+            raise ValueError(f"Truncated JSON array after {self.items_parsed} items")
+
+    def _scalar_item(self, buffer: str, end: int, items: list[Any]) -> None:
+        """Phần tử không phải object/array/string kết thúc tại dấu ',' hoặc ']'"""
+        if self._item_start >= 0:
+            text = buffer[self._item_start:end].strip()
+            if text:
+                self._emit(text, items)
+            self._item_start = -1
+
+    def _emit(self, text: str, items: list[Any]) -> None:
+        # Một phần tử hỏng không kéo theo cả array: bỏ qua, đếm lại
+        try:
+            items.append(json.loads(text))
+        except json.JSONDecodeError:
+            self.items_invalid += 1
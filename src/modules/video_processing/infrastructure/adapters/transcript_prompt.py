@@ -0,0 +1,78 @@
+"""
+Encode transcript cho prompt Gemini
+- "lines": mỗi dòng một cụm từ, mở đầu bằng start time của word đầu
+      t=12.3 strategy is the long-term
+      t=13.9 plan.
+      t=15.0 tactics are the short-term
+  Ngắt dòng ở cuối câu, khoảng lặng, hoặc khi đủ max_words_per_line; time làm tròn 0.1s,
+  bỏ confidence và không gửi full_text lần hai. Timestamp của word giữa dòng do LLM
+  nội suy — snap-to-word (WordTimingIndex) kéo về word thật sau đó.
+- "json" (mặc định): format cũ, full_text + JSON từng WordSegment. Giữ làm mặc định tới khi
+  scripts/bench_prompt_encoding.py --live được chạy với Gemini thật và kết quả được ghi lại;
+  số đo offline bên dưới chưa đủ để đổi.
+"""
+
+import json
+import math
+import re
+
+from src.modules.video_processing.domain.timing_index import SENTENCE_END_CHARS, SENTENCE_PAUSE_SECONDS
+from src.modules.video_processing.domain.value_objects import WordTimings
+
+PROMPT_FORMAT_LINES = "lines"
+PROMPT_FORMAT_JSON = "json"
+PROMPT_FORMATS = (PROMPT_FORMAT_LINES, PROMPT_FORMAT_JSON)
+
+# Đo bằng scripts/bench_prompt_encoding.py (transcript 1 giờ): 4 word/dòng giảm ~92% token so
+# với json mà ~92% overlay vẫn snap đúng word như format cũ; 10 word/dòng chỉ còn ~70%
+MAX_WORDS_PER_LINE = 4
+
+_TOKEN_RE = re.compile(r"\d|[^\W\d_]+|[^\w\s]")
+
+
+def encode_timed_lines(
+    words: WordTimings,
+    max_words_per_line: int = MAX_WORDS_PER_LINE,
+    pause_seconds: float = SENTENCE_PAUSE_SECONDS,
+) -> str:
+    starts, ends = words.starts, words.ends
+    lines: list[str] = []
+    current: list[str] = []
+    line_start, prev_end = 0.0, 0.0
+
+    def flush() -> None:
+        if current:
+            lines.append(f"t={line_start:.1f} " + " ".join(current))
+            current.clear()
+
+    for i in range(len(words)):
+        word = words.word(i).strip()
+        if not word:
+            continue
+        if current and (len(current) >= max_words_per_line or starts[i] - prev_end >= pause_seconds):
+            flush()
+        if not current:
+            line_start = starts[i]
+        current.append(word)
+        prev_end = ends[i]
+        if word.endswith(SENTENCE_END_CHARS):
+            flush()
+    flush()
+    return "\n".join(lines)
+
+
+def encode_words_json(words: WordTimings) -> str:
+    return json.dumps(words.to_dicts(), ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Ước lượng số token offline (không gọi count_tokens): chữ ~4 ký tự/token,
+    mỗi chữ số và dấu câu một token như tokenizer SentencePiece của Gemini.
+    Thô, dùng để so sánh tương đối giữa các format.
+    """
+    tokens = 0
+    for match in _TOKEN_RE.finditer(text):
+        piece = match.group()
+        tokens += math.ceil(len(piece) / 4) if piece[0].isalpha() else 1
+    return tokens
@@ -1,11 +1,20 @@
 import subprocess
 import os
 import asyncio
+import json
+import tempfile
+from fractions import Fraction
+from typing import Awaitable, Callable, List
 from src.modules.video_processing.domain.ports import IVideoEditorPort
+from src.modules.video_processing.domain.value_objects import TimestampRange
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+STREAM_READ_SIZE = 1024 * 1024
+# auto-editor đánh dấu đoạn bị cắt bằng speed rất lớn (99999)
+CUT_SPEED = 99999
+
 class AutoEditorAdapter(IVideoEditorPort):
     def __init__(self, temp_dir: str = "/tmp"):
         self.temp_dir = temp_dir
@@ -52,3 +61,135 @@ class AutoEditorAdapter(IVideoEditorPort):
         except Exception as e:
             logger.exception("Error during silence removal", error=str(e))
             raise
+
+    async def detect_kept_ranges(self, source_url: str) -> List[TimestampRange]:
+        """
+        Chỉ chạy phân tích của auto-editor, export timeline v3 (JSON vài KB)
+        thay vì render cả video ra đĩa.
+        auto-editor không nhận URL trực tiếp (input URL có thể bị chuyển cho yt-dlp tải
+        nguyên file về): ffmpeg đọc source qua URL và chỉ ghi track audio (mono 16 kHz)
+        ra file tạm, auto-editor phân tích file local đó.
+        """
+        with tempfile.TemporaryDirectory(dir=self.temp_dir) as work_dir:
+            audio_path = os.path.join(work_dir, "audio.wav")
+            timeline_path = os.path.join(work_dir, "timeline.v3")
+            await self._run(
+                "ffmpeg audio extraction",
+                ["ffmpeg", "-v", "error", "-i", source_url, "-vn", "-ac", "1", "-ar", "16000",
+                 "-c:a", "pcm_s16le", "-y", audio_path],
+            )
+            await self._run(
+                "auto-editor analysis",
+                ["auto-editor", audio_path,
+                 "--export", "v3",
+                 "--output", timeline_path,
+                 "--silent-threshold", "0.03",
+                 "--margin", "0.2sec",
+                 "--no-open"],
+            )
+            with open(timeline_path) as f:
+                return self._parse_v3_timeline(json.load(f))
+
+    @staticmethod
+    async def _run(step: str, cmd: List[str]) -> None:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            error_msg = stderr.decode(errors="replace").strip()
+            logger.error(f"{step} failed", returncode=process.returncode, error=error_msg)
+            raise Exception(f"{step} failed with return code {process.returncode}: {error_msg}")
+
+    async def stream_remove_silence(
+        self, source_url: str, sink: Callable[[bytes], Awaitable[None]]
+    ) -> int:
+        """
+        auto-editor quyết định cắt ở đâu, ffmpeg đọc input qua URL, giữ các đoạn đó
+        và ghi fragmented MP4 ra stdout → sink (vd. S3 multipart writer).
+        fMP4 không cần seek ngược để ghi moov nên stream được qua pipe.
+        """
+        ranges = await self.detect_kept_ranges(source_url)
+        if not ranges:
+            raise Exception("Auto-editor found no non-silent segments")
+
+        cmd = self._build_stream_command(source_url, ranges)
+        logger.info("Starting streaming silence removal", segments=len(ranges))
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        # Đọc stderr song song, tránh ffmpeg bị block khi pipe stderr đầy
+        stderr_task = asyncio.create_task(process.stderr.read())
+        bytes_written = 0
+        try:
+            while True:
+                chunk = await process.stdout.read(STREAM_READ_SIZE)
+                if not chunk:
+                    break
+                await sink(chunk)
+                bytes_written += len(chunk)
+            returncode = await process.wait()
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            stderr_task.cancel()
+            raise
+
+        stderr = await stderr_task
+        if returncode != 0:
+            error_msg = stderr.decode(errors="replace").strip()
+            logger.error("ffmpeg streaming render failed", returncode=returncode, error=error_msg)
+            raise Exception(f"ffmpeg failed with return code {returncode}: {error_msg}")
+
+        logger.info("Streaming silence removal completed", bytes_written=bytes_written)
+        return bytes_written
+
+    @staticmethod
+    def _parse_v3_timeline(timeline: dict) -> List[TimestampRange]:
+        """
+        Clip của layer đầu tiên (video, hoặc audio khi input chỉ có audio) → khoảng thời gian
+        (giây) trên source, gộp đoạn liền nhau. Trong v3: "start" là vị trí trên timeline output,
+        "offset" là vị trí trên source, "dur" là độ dài trên timeline (source = dur * speed).
+        """
+        timebase = Fraction(timeline["timebase"])
+        layers = [layer for layer in (*(timeline.get("v") or []), *(timeline.get("a") or [])) if layer]
+        ranges: List[TimestampRange] = []
+        for clip in sorted(layers[0] if layers else [], key=lambda c: c["offset"]):
+            speed = clip.get("speed", 1.0)
+            if speed <= 0 or speed >= CUT_SPEED:
+                continue
+            start = float(clip["offset"] / timebase)
+            end = float((clip["offset"] + clip["dur"] * speed) / timebase)
+            if ranges and start <= ranges[-1].end + 1e-6:
+                ranges[-1].end = max(ranges[-1].end, end)
+            elif end > start:
+                ranges.append(TimestampRange(start=start, end=end))
+        return ranges
+
+    @staticmethod
+    def _build_stream_command(source_url: str, ranges: List[TimestampRange]) -> List[str]:
+        keep = "+".join(f"between(t,{r.start:.3f},{r.end:.3f})" for r in ranges)
+        filter_graph = (
+            f"[0:v]select='{keep}',setpts=N/FRAME_RATE/TB[v];"
+            f"[0:a]aselect='{keep}',asetpts=N/SR/TB[a]"
+        )
+        return [
+            "ffmpeg",
+            "-v", "error",
+            "-i", source_url,
+            "-filter_complex", filter_graph,
+            "-map", "[v]",
+            "-map", "[a]",
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", "20",
+            "-c:a", "aac",
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+            "-f", "mp4",
+            "pipe:1"
+        ]
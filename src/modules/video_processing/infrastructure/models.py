@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, JSON, DateTime, Enum as SQLEnum, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, ARRAY
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, Text, Enum as SQLEnum, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, ARRAY, JSONB
 from src.shared.database.base import Base
 from src.modules.video_processing.domain.value_objects import JobStatus
 import uuid
@@ -11,8 +11,54 @@ class VideoJobModel(Base):
     user_id = Column(Integer, nullable=False)
     input_file_path = Column(String, nullable=False)
     status = Column(SQLEnum(JobStatus), default=JobStatus.UPLOADED)
-    transcript = Column(JSON, nullable=True)
-    render_config = Column(JSON, nullable=True)
+    render_config = Column(JSONB, nullable=True)
     output_file_paths = Column(ARRAY(String), default=[])
     created_at = Column(DateTime, nullable=False)
     updated_at = Column(DateTime, nullable=False)
+
+
+class VideoJobTranscriptModel(Base):
+    """Word-level transcript của job, mã hoá dạng cột (transcript_codec)"""
+    __tablename__ = "video_job_transcripts"
+
+    job_id = Column(
+        PostgresUUID(as_uuid=True),
+        ForeignKey("video_jobs.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    full_text = Column(Text, nullable=False)
+    word_count = Column(Integer, nullable=False)
+    words = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class KeywordBatchModel(Base):
+    """Gemini batch keyword extraction đang mở (name = None khi đã claim job nhưng chưa submit xong)"""
+    __tablename__ = "keyword_batches"
+
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String, nullable=True, unique=True)
+    requests = Column(JSONB, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    submitted_at = Column(DateTime, nullable=True)
+
+
+class KeywordBatchJobModel(Base):
+    """
+    Claim: job đang nằm trong một batch mở thì không bị submit lần nữa.
+    Row giữ lại sau khi batch đóng (batch_id = NULL) để đếm số lần thử của job.
+    """
+    __tablename__ = "keyword_batch_jobs"
+
+    job_id = Column(
+        PostgresUUID(as_uuid=True),
+        ForeignKey("video_jobs.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    batch_id = Column(
+        PostgresUUID(as_uuid=True),
+        ForeignKey("keyword_batches.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True
+    )
+    attempts = Column(Integer, nullable=False, default=1)
@@ -1,71 +1,302 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
 from uuid import UUID
-from sqlalchemy import select, delete
+import structlog
+from sqlalchemy import cast, delete, exists, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PostgresUUID, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.modules.video_processing.domain.entities import VideoJob
+from src.shared.database.unit_of_work import after_commit, commit_unless_in_unit_of_work
+from src.modules.video_processing.domain.entities import KeywordBatch, VideoJob
 from src.modules.video_processing.domain.value_objects import JobStatus, Transcript, RenderConfig
-from src.modules.video_processing.domain.ports import IVideoRepository
-from .models import VideoJobModel
+from src.modules.video_processing.domain.ports import IKeywordBatchRepository, IVideoRepository
+from .models import KeywordBatchJobModel, KeywordBatchModel, VideoJobModel, VideoJobTranscriptModel
+from .transcript_codec import decode_words, encode_words
+
+logger = structlog.get_logger()
+
+# Không bao giờ ghi lại sau khi insert
+_IMMUTABLE_COLUMNS = ('id', 'created_at')
+
 
 class PostgresVideoRepository(IVideoRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
+        # Giá trị cột đã commit của từng job (đọc từ DB hoặc ghi thành công) → save chỉ gửi cột đã đổi
+        self._snapshots: Dict[UUID, Dict[str, Any]] = {}
+        # Blob transcript đang có trong DB (None = chưa có row); job không có key = chưa biết
+        self._transcript_snapshots: Dict[UUID, Optional[bytes]] = {}
 
     async def save(self, job: VideoJob) -> None:
-        model_data = job.dict()
-        if job.transcript:
-            model_data['transcript'] = job.transcript.dict()
-        if job.render_config:
-            model_data['render_config'] = job.render_config.dict()
-        
-        stmt = select(VideoJobModel).where(VideoJobModel.id == job.id)
-        result = await self.session.execute(stmt)
-        existing_model = result.scalar_one_or_none()
+        if not await self._save_job_row(job):
+            return
+        await self._save_transcript(job)
+        await commit_unless_in_unit_of_work(self.session)
+
+    async def _save_job_row(self, job: VideoJob) -> bool:
+        """False nếu row của job đã bị xoá ở nơi khác (không insert lại)"""
+        # transcript không phải field → model_dump không kích hoạt lazy load
+        model_data = job.model_dump()
+        snapshot = self._snapshots.get(job.id)
 
-        if existing_model:
-            for key, value in model_data.items():
-                setattr(existing_model, key, value)
+        if snapshot is None:
+            # Job mới tạo trong process này
+            await self._upsert(model_data)
         else:
-            new_model = VideoJobModel(**model_data)
-            self.session.add(new_model)
-        
-        await self.session.commit()
+            changed = {
+                key: value
+                for key, value in model_data.items()
+                if key not in _IMMUTABLE_COLUMNS and snapshot.get(key) != value
+            }
+            if not changed:
+                return True
+            stmt = update(VideoJobModel).where(VideoJobModel.id == job.id).values(**changed)
+            result = await self.session.execute(stmt)
+            if not result.rowcount:
+                # Vd. bị purge trong lúc pipeline đang chạy → không hồi sinh job
+                logger.warning("Skip saving job deleted elsewhere", job_id=str(job.id))
+                self._snapshots.pop(job.id, None)
+                self._transcript_snapshots.pop(job.id, None)
+                return False
+
+        self._after_commit(self._snapshots, job.id, model_data)
+        return True
+
+    def _after_commit(self, snapshots: Dict[UUID, Any], job_id: UUID, value: Any) -> None:
+        """Snapshot chỉ cập nhật khi transaction commit; rollback → lần save sau diff với giá trị cũ"""
+        def apply() -> None:
+            snapshots[job_id] = value
+        after_commit(self.session, apply)
+
+    async def _save_transcript(self, job: VideoJob) -> None:
+        if not job.transcript_loaded:
+            # Chưa từng đọc → không thể đã bị sửa
+            return
+
+        stored = self._transcript_snapshots.get(job.id)
+        transcript = job.transcript
+        if transcript is None:
+            if stored is not None:
+                await self.session.execute(
+                    delete(VideoJobTranscriptModel).where(VideoJobTranscriptModel.job_id == job.id)
+                )
+                self._after_commit(self._transcript_snapshots, job.id, None)
+            return
+
+        blob = encode_words(transcript.words)
+        if blob == stored:
+            return
+        values = {
+            'job_id': job.id,
+            'full_text': transcript.full_text,
+            'word_count': len(transcript.words),
+            'words': blob,
+            'updated_at': datetime.utcnow(),
+        }
+        stmt = insert(VideoJobTranscriptModel).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VideoJobTranscriptModel.job_id],
+            set_={key: stmt.excluded[key] for key in values if key != 'job_id'}
+        )
+        await self.session.execute(stmt)
+        self._after_commit(self._transcript_snapshots, job.id, blob)
 
-    async def get_by_id(self, job_id: UUID) -> Optional[VideoJob]:
-        stmt = select(VideoJobModel).where(VideoJobModel.id == job_id)
+    async def update_status(self, job: VideoJob) -> None:
+        """Chỉ ghi status + updated_at (chuyển trạng thái), không chạm transcript"""
+        stmt = (
+            update(VideoJobModel)
+            .where(VideoJobModel.id == job.id)
+            .values(status=job.status, updated_at=job.updated_at)
+        )
+        await self.session.execute(stmt)
+        status, updated_at = job.status, job.updated_at
+
+        def apply() -> None:
+            snapshot = self._snapshots.get(job.id)
+            if snapshot is not None:
+                snapshot.update(status=status, updated_at=updated_at)
+
+        after_commit(self.session, apply)
+        await commit_unless_in_unit_of_work(self.session)
+
+    async def _upsert(self, model_data: Dict[str, Any]) -> None:
+        # Upsert một câu lệnh thay vì SELECT rồi INSERT/UPDATE
+        stmt = insert(VideoJobModel).values(**model_data)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VideoJobModel.id],
+            set_={
+                key: stmt.excluded[key]
+                for key in model_data
+                if key not in _IMMUTABLE_COLUMNS
+            }
+        )
+        await self.session.execute(stmt)
+
+    async def get_by_id(self, job_id: UUID, with_transcript: bool = True) -> Optional[VideoJob]:
+        if not with_transcript:
+            result = await self.session.execute(select(VideoJobModel).where(VideoJobModel.id == job_id))
+            model = result.scalar_one_or_none()
+            return self._to_domain(model) if model else None
+
+        # Lấy blob transcript cùng round trip nhưng chỉ decode khi job.transcript được đọc
+        stmt = (
+            select(VideoJobModel, VideoJobTranscriptModel.full_text, VideoJobTranscriptModel.words)
+            .outerjoin(VideoJobTranscriptModel, VideoJobTranscriptModel.job_id == VideoJobModel.id)
+            .where(VideoJobModel.id == job_id)
+        )
         result = await self.session.execute(stmt)
-        model = result.scalar_one_or_none()
-        if not model:
+        row = result.one_or_none()
+        if not row:
             return None
-        
-        return self._to_domain(model)
+
+        model, full_text, blob = row
+        job = self._to_domain(model)
+        self._attach_transcript(job, full_text, blob)
+        return job
 
     async def get_by_user_id(self, user_id: int) -> List[VideoJob]:
+        # Không load transcript — gọi load_transcripts() nếu cần
         stmt = select(VideoJobModel).where(VideoJobModel.user_id == user_id)
         result = await self.session.execute(stmt)
         models = result.scalars().all()
         return [self._to_domain(m) for m in models]
 
+    async def get_by_ids(self, job_ids: Sequence[UUID], for_update: bool = False) -> List[VideoJob]:
+        if not job_ids:
+            return []
+        stmt = select(VideoJobModel).where(VideoJobModel.id.in_(list(job_ids)))
+        if for_update:
+            stmt = stmt.with_for_update()
+        result = await self.session.execute(stmt)
+        return [self._to_domain(m) for m in result.scalars().all()]
+
+    async def load_transcripts(self, jobs: Sequence[VideoJob]) -> None:
+        """Load transcript cho nhiều job trong một query (vẫn decode lazy)"""
+        if not jobs:
+            return
+        stmt = (
+            select(VideoJobTranscriptModel.job_id, VideoJobTranscriptModel.full_text, VideoJobTranscriptModel.words)
+            .where(VideoJobTranscriptModel.job_id.in_([job.id for job in jobs]))
+        )
+        result = await self.session.execute(stmt)
+        found = {job_id: (full_text, blob) for job_id, full_text, blob in result.all()}
+        for job in jobs:
+            self._attach_transcript(job, *found.get(job.id, (None, None)))
+
     async def delete(self, job_id: UUID) -> None:
+        # video_job_transcripts xoá theo ON DELETE CASCADE
         stmt = delete(VideoJobModel).where(VideoJobModel.id == job_id)
         await self.session.execute(stmt)
-        await self.session.commit()
+        self._snapshots.pop(job_id, None)
+        self._transcript_snapshots.pop(job_id, None)
+        await commit_unless_in_unit_of_work(self.session)
 
     async def find_by_status(self, status: str) -> List[VideoJob]:
+        # Không load transcript — gọi load_transcripts() nếu cần
         stmt = select(VideoJobModel).where(VideoJobModel.status == status)
         result = await self.session.execute(stmt)
         models = result.scalars().all()
         return [self._to_domain(m) for m in models]
 
+    def _attach_transcript(self, job: VideoJob, full_text: Optional[str], blob: Optional[bytes]) -> None:
+        self._transcript_snapshots[job.id] = blob
+        if blob is None:
+            job.transcript = None
+            return
+        job.defer_transcript(lambda: Transcript.model_construct(full_text=full_text, words=decode_words(blob)))
+
     def _to_domain(self, model: VideoJobModel) -> VideoJob:
-        return VideoJob(
+        job = VideoJob(
             id=model.id,
             user_id=model.user_id,
             input_file_path=model.input_file_path,
             status=model.status,
-            transcript=Transcript(**model.transcript) if model.transcript else None,
             render_config=RenderConfig(**model.render_config) if model.render_config else RenderConfig(),
             output_file_paths=model.output_file_paths,
             created_at=model.created_at,
             updated_at=model.updated_at
         )
+        job.defer_transcript()
+        # Giá trị vừa đọc là giá trị đã commit
+        self._snapshots[job.id] = job.model_dump()
+        return job
+
+
+class PostgresKeywordBatchRepository(IKeywordBatchRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def claim(
+        self, status: str, user_id: Optional[int], limit: int, max_attempts: int
+    ) -> Optional[KeywordBatch]:
+        batch = KeywordBatch()
+        await self.session.execute(insert(KeywordBatchModel).values(id=batch.id, created_at=batch.created_at))
+
+        # Lọc trong SQL (không kéo mọi job theo status về Python). Job đã thử max_attempts lần
+        # (batch lỗi, kết quả rỗng / hỏng lặp lại) không được claim nữa
+        overlays = VideoJobModel.render_config['text_overlays']
+        unavailable = (
+            exists()
+            .where(KeywordBatchJobModel.job_id == VideoJobModel.id)
+            .where(or_(KeywordBatchJobModel.batch_id.isnot(None), KeywordBatchJobModel.attempts >= max_attempts))
+        )
+        candidates = (
+            select(VideoJobModel.id, literal(batch.id, PostgresUUID(as_uuid=True)), literal(1))
+            .join(VideoJobTranscriptModel, VideoJobTranscriptModel.job_id == VideoJobModel.id)
+            .where(VideoJobModel.status == status)
+            .where(VideoJobTranscriptModel.word_count > 0)
+            .where(or_(overlays.is_(None), overlays == cast('[]', JSONB)))
+            .where(~unavailable)
+            .order_by(VideoJobModel.created_at, VideoJobModel.id)
+            .limit(limit)
+        )
+        if user_id is not None:
+            candidates = candidates.where(VideoJobModel.user_id == user_id)
+        stmt = insert(KeywordBatchJobModel).from_select(['job_id', 'batch_id', 'attempts'], candidates)
+        # Job đã thử trước đó → tăng attempts; job vừa bị batch khác claim đồng thời
+        # (batch_id khác NULL) thì bỏ qua thay vì submit hai lần
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[KeywordBatchJobModel.job_id],
+            set_={'batch_id': stmt.excluded.batch_id, 'attempts': KeywordBatchJobModel.attempts + 1},
+            where=KeywordBatchJobModel.batch_id.is_(None),
+        ).returning(KeywordBatchJobModel.job_id)
+        result = await self.session.execute(stmt)
+        batch.job_ids = list(result.scalars().all())
+
+        if not batch.job_ids:
+            await self.session.execute(delete(KeywordBatchModel).where(KeywordBatchModel.id == batch.id))
+        await commit_unless_in_unit_of_work(self.session)
+        return batch if batch.job_ids else None
+
+    async def mark_submitted(self, batch: KeywordBatch) -> None:
+        stmt = (
+            update(KeywordBatchModel)
+            .where(KeywordBatchModel.id == batch.id)
+            .values(name=batch.name, requests=batch.requests, submitted_at=batch.submitted_at)
+        )
+        await self.session.execute(stmt)
+        await commit_unless_in_unit_of_work(self.session)
+
+    async def list_open(self) -> List[KeywordBatch]:
+        stmt = (
+            select(KeywordBatchModel, func.array_agg(KeywordBatchJobModel.job_id))
+            .join(KeywordBatchJobModel, KeywordBatchJobModel.batch_id == KeywordBatchModel.id)
+            .group_by(KeywordBatchModel.id)
+            .order_by(KeywordBatchModel.created_at)
+        )
+        result = await self.session.execute(stmt)
+        return [
+            KeywordBatch(
+                id=model.id,
+                job_ids=job_ids,
+                name=model.name,
+                requests=model.requests or {},
+                created_at=model.created_at,
+                submitted_at=model.submitted_at,
+            )
+            for model, job_ids in result.all()
+        ]
+
+    async def release(self, batch_id: UUID) -> None:
+        # keyword_batch_jobs.batch_id → NULL (ON DELETE SET NULL): nhả claim, giữ số lần thử
+        await self.session.execute(delete(KeywordBatchModel).where(KeywordBatchModel.id == batch_id))
+        await commit_unless_in_unit_of_work(self.session)
@@ -1,72 +1,138 @@
-import aioboto3
+import os
+import aiofiles
+from contextlib import asynccontextmanager
 from botocore.exceptions import ClientError
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional
+from boto3.s3.transfer import TransferConfig
 from ...domain.ports import IStoragePort
 from src.shared.config.settings import settings
+from src.shared.storage.s3_client import S3ClientManager, s3_client_manager
+from src.shared.storage.range_reader import S3RangeProxy, S3RangeReader
+from src.shared.storage.multipart_writer import S3MultipartWriter
+from src.shared.storage.transfer import (
+    BandwidthLimiter, ThrottledFile, TransferProgress, TransferStats, build_transfer_config
+)
+
+ProgressCallback = Callable[[TransferStats], None]
 
 class S3StorageService(IStoragePort):
-    def __init__(self):
-        self.session = aioboto3.Session()
+    def __init__(
+        self,
+        client_manager: Optional[S3ClientManager] = None,
+        transfer_config: Optional[TransferConfig] = None,
+        max_bandwidth: Optional[int] = None,
+    ):
+        # Dùng chung S3 client long-lived thay vì mở client mới cho mỗi call
+        self.client_manager = client_manager or s3_client_manager
+        # Part size / concurrency cho upload/download nhiều part song song
+        self.transfer_config = transfer_config or build_transfer_config()
+        # Giới hạn băng thông (bytes/giây) cho mỗi transfer, None = không giới hạn
+        self.max_bandwidth = max_bandwidth if max_bandwidth is not None else self.transfer_config.max_bandwidth
         self.bucket_name = settings.S3_BUCKET_NAME
         self.region = settings.AWS_REGION
 
-    async def upload_file(self, local_path: str, remote_path: str) -> str:
+    async def upload_file(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> str:
         """Upload file và trả về public/internal URL"""
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        ) as s3:
-            try:
-                await s3.upload_file(local_path, self.bucket_name, remote_path)
-                return f"s3://{self.bucket_name}/{remote_path}"
-            except ClientError as e:
-                # Log error here if you have a logger
-                raise e
+        s3 = await self.client_manager.get_client()
+        progress = TransferProgress(
+            "upload", remote_path,
+            total_bytes=os.path.getsize(local_path),
+            on_progress=progress_callback
+        )
+        try:
+            async with aiofiles.open(local_path, "rb") as fileobj:
+                await s3.upload_fileobj(
+                    self._throttle(fileobj),
+                    self.bucket_name,
+                    remote_path,
+                    Callback=progress,
+                    Config=self.transfer_config
+                )
+            progress.finish()
+            return f"s3://{self.bucket_name}/{remote_path}"
+        except ClientError as e:
+            # Log error here if you have a logger
+            raise e
 
-    async def download_file(self, remote_path: str, local_path: str) -> None:
+    async def download_file(
+        self,
+        remote_path: str,
+        local_path: str,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> None:
         """Download file từ storage về local"""
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        ) as s3:
-            try:
-                await s3.download_file(self.bucket_name, remote_path, local_path)
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        # aioboto3 gọi Callback với tổng số byte đã tải (cộng dồn)
+        progress = TransferProgress(
+            "download", remote_path,
+            cumulative=True,
+            on_progress=progress_callback
+        )
+        try:
+            async with aiofiles.open(local_path, "wb") as fileobj:
+                await s3.download_fileobj(
+                    self.bucket_name,
+                    remote_path,
+                    self._throttle(fileobj),
+                    Callback=progress,
+                    Config=self.transfer_config
+                )
+            progress.finish()
+        except ClientError as e:
+            raise e
+
+    def open_range_reader(self, remote_path: str) -> S3RangeReader:
+        """Đọc object theo range (seek/read) thay vì download_file cả object về đĩa"""
+        return S3RangeReader(self._to_key(remote_path), self.bucket_name, self.client_manager)
+
+    @asynccontextmanager
+    async def open_range_url(self, remote_path: str) -> AsyncIterator[str]:
+        async with S3RangeProxy(self.open_range_reader(remote_path)) as url:
+            yield url
+
+    def open_stream_writer(self, remote_path: str, content_type: str) -> S3MultipartWriter:
+        return S3MultipartWriter(
+            self._to_key(remote_path),
+            content_type,
+            bucket_name=self.bucket_name,
+            client_manager=self.client_manager
+        )
 
     async def generate_presigned_url(self, remote_path: str, expiration: int = 3600) -> str:
         """Tạo URL tạm thời để upload/download trực tiếp"""
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        ) as s3:
-            try:
-                # Mặc định là 'put_object' để upload, nếu cần download thì đổi thành 'get_object'
-                # Trong bài toán của mình, thường dùng để upload trực tiếp từ client.
-                url = await s3.generate_presigned_url(
-                    ClientMethod='put_object',
-                    Params={'Bucket': self.bucket_name, 'Key': remote_path},
-                    ExpiresIn=expiration
-                )
-                return url
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        try:
+            # Mặc định là 'put_object' để upload, nếu cần download thì đổi thành 'get_object'
+            # Trong bài toán của mình, thường dùng để upload trực tiếp từ client.
+            url = await s3.generate_presigned_url(
+                ClientMethod='put_object',
+                Params={'Bucket': self.bucket_name, 'Key': remote_path},
+                ExpiresIn=expiration
+            )
+            return url
+        except ClientError as e:
+            raise e
 
     async def delete_file(self, remote_path: str) -> None:
         """Xóa file khỏi storage"""
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        ) as s3:
-            try:
-                await s3.delete_object(Bucket=self.bucket_name, Key=remote_path)
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        try:
+            await s3.delete_object(Bucket=self.bucket_name, Key=remote_path)
+        except ClientError as e:
+            raise e
+
+    def _to_key(self, remote_path: str) -> str:
+        # Chấp nhận cả key lẫn URL dạng s3://bucket/key (giá trị upload_file trả về)
+        prefix = f"s3://{self.bucket_name}/"
+        return remote_path[len(prefix):] if remote_path.startswith(prefix) else remote_path
+
+    def _throttle(self, fileobj):
+        # aioboto3 bỏ qua TransferConfig.max_bandwidth → tự giới hạn ở tầng file I/O
+        if not self.max_bandwidth:
+            return fileobj
+        return ThrottledFile(fileobj, BandwidthLimiter(self.max_bandwidth))
@@ -0,0 +1,58 @@
+"""
+Compact binary encoding cho word-level transcript (bảng video_job_transcripts)
+Ghi dạng WordTimings.to_bytes() (v2: các cột array + text nối liền + offsets).
+Vẫn đọc được blob v1 (string table + word index) đã ghi trước đó:
+
+    header | start[n] f64 | end[n] f64 | confidence[n] f64 | word_index[n] u32
+           | string_len[m] u32 | string table (utf-8, m từ không trùng)
+"""
+
+import struct
+import sys
+from array import array
+from typing import Iterable, Union
+
+from src.modules.video_processing.domain.value_objects import WordSegment, WordTimings
+
+MAGIC = WordTimings.BINARY_MAGIC
+LEGACY_VERSION = 1
+# magic, version, số word, số string trong string table
+_LEGACY_HEADER = struct.Struct("<3sBII")
+
+
+def encode_words(words: Union[WordTimings, Iterable[WordSegment]]) -> bytes:
+    if not isinstance(words, WordTimings):
+        words = WordTimings.from_segments(words)
+    return words.to_bytes()
+
+
+def decode_words(data: bytes) -> WordTimings:
+    magic, version = data[:3], data[3] if len(data) > 3 else None
+    if magic == MAGIC and version == LEGACY_VERSION:
+        return _decode_legacy(data)
+    return WordTimings.from_bytes(data)
+
+
+def _decode_legacy(data: bytes) -> WordTimings:
+    _, _, n, m = _LEGACY_HEADER.unpack_from(data)
+    offset = _LEGACY_HEADER.size
+
+    def take(typecode: str, count: int) -> array:
+        nonlocal offset
+        size = array(typecode).itemsize * count
+        values = array(typecode)
+        values.frombytes(data[offset:offset + size])
+        if sys.byteorder == "big":
+            values.byteswap()
+        offset += size
+        return values
+
+    starts, ends, confidences = take("d", n), take("d", n), take("d", n)
+    word_index, string_lengths = take("I", n), take("I", m)
+
+    strings = []
+    for length in string_lengths:
+        strings.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    return WordTimings((strings[i] for i in word_index), starts, ends, confidences)
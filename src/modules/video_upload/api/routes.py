@@ -1,21 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
 from uuid import uuid4, UUID
 from datetime import datetime
-from typing import List
+from typing import Optional
+from functools import lru_cache
+from botocore.exceptions import ClientError
+import structlog
 
-from src.shared.database.dependencies import DatabaseSession
+from src.shared.database.dependencies import DatabaseSession, ReadDatabaseSession
+from src.shared.security.dependencies import CurrentUserId, OptionalUserId
+from src.worker.celery_app import celery_app
 from ..infrastructure.repositories import VideoRepository
 from ..infrastructure.adapters.s3_multipart import S3MultipartStorageAdapter
+from ..application.handlers import PurgeVideosUseCase
 from ..domain.ports import CompletedPart
+from ..domain.services import PartSizingRule
 from .schemas import (
     InitiateUploadRequest, InitiateUploadResponse,
     GetPresignedUrlRequest, GetPresignedUrlResponse,
-    CompleteUploadRequest, VideoResponse
+    GetPresignedUrlsBatchRequest, GetPresignedUrlsBatchResponse, PresignedPartUrl,
+    CompleteUploadRequest, VideoResponse,
+    VideoListCursor, VideoListResponse, DEFAULT_VIDEO_PAGE_SIZE, MAX_VIDEO_PAGE_SIZE,
+    BulkDeleteRequest, BulkDeleteResponse,
+    ListUploadedPartsResponse, UploadedPartItem
 )
 
 router = APIRouter(prefix="/uploads", tags=["Video Upload"])
+logger = structlog.get_logger()
 
-# Dependency to get storage adapter
+# Dependency to get storage adapter (một instance dùng chung, client S3 được pool sẵn)
+@lru_cache
 def get_storage():
     return S3MultipartStorageAdapter()
 
@@ -23,10 +36,12 @@ def get_storage():
 async def initiate_upload(
     request: InitiateUploadRequest,
     db: DatabaseSession,
+    user_id: OptionalUserId,
     storage: S3MultipartStorageAdapter = Depends(get_storage)
 ):
     # Create video record in DB first
     repo = VideoRepository(db)
+    part_plan = PartSizingRule.recommend(request.file_size)
     
     # Generate S3 key: uploads/{uuid}/{filename}
     video_id = uuid4()
@@ -39,8 +54,10 @@ async def initiate_upload(
     # Save to DB
     await repo.create({
         "id": video_id,
+        "user_id": user_id,
         "original_filename": request.filename,
         "s3_key": s3_key,
+        "upload_id": s3_response.upload_id,
         "status": "uploading",
         "created_at": datetime.utcnow()
     })
@@ -48,7 +65,9 @@ async def initiate_upload(
     return InitiateUploadResponse(
         upload_id=s3_response.upload_id,
         video_id=video_id,
-        key=s3_key
+        key=s3_key,
+        part_size=part_plan.part_size,
+        part_count=part_plan.part_count
     )
 
 @router.post("/presigned-url", response_model=GetPresignedUrlResponse)
@@ -69,10 +88,61 @@ async def get_presigned_url(
     )
     return GetPresignedUrlResponse(url=url)
 
+@router.post("/presigned-urls", response_model=GetPresignedUrlsBatchResponse)
+async def get_presigned_urls_batch(
+    request: GetPresignedUrlsBatchRequest,
+    db: DatabaseSession,
+    storage: S3MultipartStorageAdapter = Depends(get_storage)
+):
+    # 1 DB lookup + ký cả batch, client prefetch trước một cửa sổ part URLs
+    repo = VideoRepository(db)
+    video = await repo.get_by_id(request.video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    urls = await storage.generate_presigned_urls_for_parts(
+        remote_path=video.s3_key,
+        upload_id=request.upload_id,
+        part_numbers=request.resolve_part_numbers()
+    )
+    return GetPresignedUrlsBatchResponse(
+        urls=[PresignedPartUrl(part_number=n, url=u) for n, u in urls.items()]
+    )
+
+@router.get("/{video_id}/parts", response_model=ListUploadedPartsResponse)
+async def list_uploaded_parts(
+    video_id: UUID,
+    upload_id: str,
+    db: ReadDatabaseSession,
+    storage: S3MultipartStorageAdapter = Depends(get_storage)
+):
+    # Client resume upload: chỉ gửi lại những part S3 chưa có
+    repo = VideoRepository(db)
+    video = await repo.get_by_id(video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    try:
+        parts = await storage.list_uploaded_parts(video.s3_key, upload_id)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+            raise HTTPException(status_code=404, detail="Upload not found")
+        raise
+
+    return ListUploadedPartsResponse(
+        video_id=video.id,
+        upload_id=upload_id,
+        parts=[
+            UploadedPartItem(part_number=p.part_number, etag=p.etag, size=p.size)
+            for p in parts
+        ]
+    )
+
 @router.post("/complete")
 async def complete_upload(
     request: CompleteUploadRequest,
     db: DatabaseSession,
+    background_tasks: BackgroundTasks,
     storage: S3MultipartStorageAdapter = Depends(get_storage)
 ):
     repo = VideoRepository(db)
@@ -93,12 +163,11 @@ async def complete_upload(
         parts=domain_parts
     )
     
-    # Get file info from S3
-    try:
-        info = await storage.get_object_info(video.s3_key)
-        file_size = info.get("size")
-    except Exception as e:
-        print(f"Failed to get object info: {e}")
+    # File size = tổng size các part client gửi (không head_object trên critical path).
+    # Client cũ không gửi Size → để worker probe điền sau.
+    if request.parts and all(p.size is not None for p in request.parts):
+        file_size = sum(p.size for p in request.parts)
+    else:
         file_size = None
 
     # Update DB status
@@ -108,13 +177,23 @@ async def complete_upload(
         file_size_bytes=file_size,
         completed_at=datetime.utcnow()
     )
+
+    # Duration / codec / resolution / thumbnail: worker probe sau khi đã trả response
+    background_tasks.add_task(_enqueue_metadata_probe, video.id)
     
     return {"status": "success", "video_id": video.id}
 
+def _enqueue_metadata_probe(video_id: UUID) -> None:
+    try:
+        celery_app.send_task("probe_video_metadata_task", args=[str(video_id)])
+    except Exception as e:
+        # Upload đã complete; thiếu metadata không phải lỗi của request
+        logger.warning("Failed to enqueue metadata probe", video_id=str(video_id), error=str(e))
+
 @router.get("/{video_id}/download")
 async def get_download_url(
     video_id: UUID,
-    db: DatabaseSession,
+    db: ReadDatabaseSession,
     disposition: str = "inline",
     storage: S3MultipartStorageAdapter = Depends(get_storage)
 ):
@@ -127,32 +206,65 @@ async def get_download_url(
     url = await storage.generate_download_url(video.s3_key, filename=filename)
     return {"url": url}
 
+@router.post("/bulk-delete", response_model=BulkDeleteResponse)
+async def bulk_delete_videos(
+    request: BulkDeleteRequest,
+    db: DatabaseSession,
+    user_id: CurrentUserId,
+    storage: S3MultipartStorageAdapter = Depends(get_storage)
+):
+    use_case = PurgeVideosUseCase(VideoRepository(db), storage)
+    # Chỉ xoá trong thư viện của user gọi
+    if request.video_ids is not None:
+        result = await use_case.execute(request.video_ids, user_id=user_id)
+    else:
+        result = await use_case.execute_matching(
+            user_id=user_id,
+            status=request.filter.status,
+            created_before=request.filter.created_before
+        )
+    return BulkDeleteResponse(**result.model_dump())
+
 @router.delete("/{video_id}")
 async def delete_video(
     video_id: UUID,
     db: DatabaseSession,
+    user_id: CurrentUserId,
     storage: S3MultipartStorageAdapter = Depends(get_storage)
 ):
-    repo = VideoRepository(db)
-    video = await repo.get_by_id(video_id)
-    if not video:
+    result = await PurgeVideosUseCase(VideoRepository(db), storage).execute([video_id], user_id=user_id)
+    if result.failed_video_ids:
+        # Giữ row để có thể xoá lại, tránh để object mồ côi trên S3
+        raise HTTPException(status_code=502, detail="Failed to delete video files from storage")
+    if not result.deleted_video_ids:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    # Delete from S3
-    try:
-        await storage.delete_object(video.s3_key)
-    except Exception as e:
-        print(f"Failed to delete from S3: {e}")
-        # Continue to delete from DB even if S3 fails (or handle as needed)
-    
-    # Delete from DB
-    await repo.delete(video_id)
-    
     return {"status": "success", "message": "Video purged"}
 
-@router.get("/my-videos", response_model=List[VideoResponse])
-async def list_videos(db: DatabaseSession):
+@router.get("/my-videos", response_model=VideoListResponse)
+async def list_videos(
+    db: ReadDatabaseSession,
+    user_id: OptionalUserId,
+    limit: int = Query(DEFAULT_VIDEO_PAGE_SIZE, ge=1, le=MAX_VIDEO_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None
+):
     repo = VideoRepository(db)
-    # user_id is None for now as auth is not implemented
-    videos = await repo.get_by_user_id(user_id=None)
-    return videos
+    after = None
+    if cursor:
+        try:
+            position = VideoListCursor.decode(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (position.created_at, position.id)
+
+    # Cùng owner với /initiate (X-User-Id; không có header → video user_id NULL)
+    # Lấy dư 1 dòng để biết còn trang sau hay không
+    rows = await repo.list_by_user(user_id=user_id, limit=limit + 1, after=after, status=status)
+    items = [VideoResponse.model_validate(row) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = VideoListCursor(created_at=last.created_at, id=last.id).encode()
+    return VideoListResponse(items=items, next_cursor=next_cursor)
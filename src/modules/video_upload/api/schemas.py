@@ -1,16 +1,29 @@
-from pydantic import BaseModel, Field
+import base64
+import json
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
+from ..domain.services import PartSizingRule
+
+S3_MAX_PART_NUMBER = PartSizingRule.MAX_PARTS
+MAX_PRESIGNED_BATCH_SIZE = 1_000
+MAX_BULK_DELETE_IDS = 1_000
+DEFAULT_VIDEO_PAGE_SIZE = 50
+MAX_VIDEO_PAGE_SIZE = 200
 
 class InitiateUploadRequest(BaseModel):
     filename: str
     content_type: str
+    # Dung lượng file khai báo → server đề xuất part size / part count
+    file_size: Optional[int] = Field(None, ge=0, le=PartSizingRule.MAX_OBJECT_SIZE)
 
 class InitiateUploadResponse(BaseModel):
     upload_id: str
     video_id: UUID
     key: str
+    part_size: int
+    part_count: Optional[int] = None
 
 class GetPresignedUrlRequest(BaseModel):
     video_id: UUID
@@ -20,9 +33,53 @@ class GetPresignedUrlRequest(BaseModel):
 class GetPresignedUrlResponse(BaseModel):
     url: str
 
+class GetPresignedUrlsBatchRequest(BaseModel):
+    """Lấy URL cho nhiều part một lần: truyền part_numbers HOẶC (start_part, count)"""
+    video_id: UUID
+    upload_id: str
+    part_numbers: Optional[List[int]] = None
+    start_part: Optional[int] = Field(None, ge=1, le=S3_MAX_PART_NUMBER)
+    count: Optional[int] = Field(None, ge=1, le=MAX_PRESIGNED_BATCH_SIZE)
+
+    @model_validator(mode="after")
+    def validate_selection(self):
+        if (self.part_numbers is None) == (self.start_part is None):
+            raise ValueError("Cần truyền part_numbers hoặc start_part, không được cả hai")
+        if self.part_numbers is not None:
+            if not 1 <= len(self.part_numbers) <= MAX_PRESIGNED_BATCH_SIZE:
+                raise ValueError(f"part_numbers phải có 1-{MAX_PRESIGNED_BATCH_SIZE} phần tử")
+            if any(not 1 <= n <= S3_MAX_PART_NUMBER for n in self.part_numbers):
+                raise ValueError(f"part_number phải nằm trong [1, {S3_MAX_PART_NUMBER}]")
+        return self
+
+    def resolve_part_numbers(self) -> List[int]:
+        if self.part_numbers is not None:
+            return sorted(set(self.part_numbers))
+        end = min(self.start_part + (self.count or 1), S3_MAX_PART_NUMBER + 1)
+        return list(range(self.start_part, end))
+
+class PresignedPartUrl(BaseModel):
+    part_number: int
+    url: str
+
+class GetPresignedUrlsBatchResponse(BaseModel):
+    urls: List[PresignedPartUrl]
+
+class UploadedPartItem(BaseModel):
+    part_number: int
+    etag: str
+    size: int
+
+class ListUploadedPartsResponse(BaseModel):
+    video_id: UUID
+    upload_id: str
+    parts: List[UploadedPartItem]
+
 class PartItem(BaseModel):
     part_number: int = Field(alias="PartNumber")
     etag: str = Field(alias="ETag")
+    # Kích thước part client đã gửi — để tính file_size mà không cần head_object
+    size: Optional[int] = Field(None, alias="Size", ge=0)
 
 class CompleteUploadRequest(BaseModel):
     video_id: UUID
@@ -34,7 +91,62 @@ class VideoResponse(BaseModel):
     original_filename: str
     status: str
     file_size_bytes: Optional[int]
+    duration_sec: Optional[float] = None
+    video_codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+class VideoListCursor(BaseModel):
+    """Vị trí keyset (created_at, id) của dòng cuối trang, encode base64url cho client"""
+    created_at: datetime
+    id: UUID
+
+    def encode(self) -> str:
+        raw = json.dumps([self.created_at.isoformat(), str(self.id)]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "VideoListCursor":
+        """ValueError nếu cursor không hợp lệ"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created_at, video_id = json.loads(raw)
+            return cls(created_at=created_at, id=video_id)
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+
+class VideoListResponse(BaseModel):
+    items: List[VideoResponse]
+    next_cursor: Optional[str] = None
+
+class BulkDeleteFilter(BaseModel):
+    status: Optional[str] = None
+    created_before: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_criteria(self) -> "BulkDeleteFilter":
+        # Filter rỗng = xoá cả thư viện → không cho phép
+        if self.status is None and self.created_before is None:
+            raise ValueError("Filter needs at least one criterion")
+        return self
+
+class BulkDeleteRequest(BaseModel):
+    """Xoá theo danh sách id hoặc theo filter (chỉ một trong hai)"""
+    video_ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=MAX_BULK_DELETE_IDS)
+    filter: Optional[BulkDeleteFilter] = None
+
+    @model_validator(mode="after")
+    def check_target(self) -> "BulkDeleteRequest":
+        if (self.video_ids is None) == (self.filter is None):
+            raise ValueError("Provide either video_ids or filter")
+        return self
+
+class BulkDeleteResponse(BaseModel):
+    deleted_video_ids: List[UUID]
+    failed_video_ids: List[UUID]
+    not_found_video_ids: List[UUID]
+    deleted_objects: int
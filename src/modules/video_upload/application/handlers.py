@@ -0,0 +1,278 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from uuid import UUID
+import structlog
+from botocore.exceptions import ClientError
+
+from src.modules.video_upload.domain.ports import IMultipartStoragePort, IMediaProbePort
+from src.modules.video_upload.domain.value_objects import MediaInfo, PurgeResult, ReapResult
+from src.modules.video_upload.infrastructure.models import VideoModel
+from src.modules.video_upload.infrastructure.repositories import VideoRepository
+
+logger = structlog.get_logger()
+
+
+def _is_no_such_upload(exc: ClientError) -> bool:
+    return exc.response.get("Error", {}).get("Code") == "NoSuchUpload"
+
+
+class ReapAbandonedUploadsUseCase:
+    """
+    Dọn các video kẹt ở 'uploading' quá TTL:
+    abort multipart upload trên S3 (giới hạn concurrency) rồi đánh dấu 'abandoned'.
+    """
+
+    def __init__(
+        self,
+        video_repo: VideoRepository,
+        storage: IMultipartStoragePort,
+        ttl: timedelta,
+        concurrency: int = 8,
+        batch_size: int = 500,
+    ):
+        self.video_repo = video_repo
+        self.storage = storage
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+    async def execute(self, now: Optional[datetime] = None) -> ReapResult:
+        cutoff = (now or datetime.utcnow()) - self.ttl
+        semaphore = asyncio.Semaphore(self.concurrency)
+        result = ReapResult()
+        after: Optional[Tuple[datetime, UUID]] = None
+
+        while True:
+            # Cursor (created_at, id) luôn tiến: row lỗi không bị chọn lại ở đầu batch sau
+            videos = await self.video_repo.find_stale_uploads(cutoff, self.batch_size, after=after)
+            if not videos:
+                break
+            after = (videos[-1].created_at, videos[-1].id)
+            result.scanned += len(videos)
+
+            outcomes = await asyncio.gather(
+                *(self._reap_one(video, semaphore) for video in videos)
+            )
+            reaped_ids: List[UUID] = []
+            for video, outcome in zip(videos, outcomes):
+                if outcome is None:
+                    continue
+                aborted, reclaimed = outcome
+                reaped_ids.append(video.id)
+                result.aborted_uploads += aborted
+                result.bytes_reclaimed += reclaimed
+
+            # Guard 'uploading': upload /complete giữa lúc scan và lúc UPDATE không bị lật thành abandoned
+            result.videos_abandoned += await self.video_repo.bulk_update_status(
+                reaped_ids, "abandoned", from_status="uploading"
+            )
+
+            if len(videos) < self.batch_size:
+                break
+
+        logger.info(
+            "Upload reaper finished",
+            scanned=result.scanned,
+            aborted_uploads=result.aborted_uploads,
+            videos_abandoned=result.videos_abandoned,
+            bytes_reclaimed=result.bytes_reclaimed,
+        )
+        return result
+
+    async def _reap_one(self, video: VideoModel, semaphore: asyncio.Semaphore) -> Optional[Tuple[int, int]]:
+        """
+        Trả về (số upload đã abort, bytes giải phóng); None nếu lỗi hoặc mọi upload id đều
+        NoSuchUpload (có thể vừa được /complete) → không đánh dấu abandoned
+        """
+        async with semaphore:
+            try:
+                if video.upload_id:
+                    upload_ids = [video.upload_id]
+                else:
+                    # Row cũ chưa lưu upload_id → tìm theo key
+                    upload_ids = await self.storage.list_multipart_upload_ids(video.s3_key)
+
+                aborted, reclaimed = 0, 0
+                for upload_id in upload_ids:
+                    try:
+                        parts = await self.storage.list_uploaded_parts(video.s3_key, upload_id)
+                        await self.storage.abort_multipart_upload(video.s3_key, upload_id)
+                    except ClientError as e:
+                        if _is_no_such_upload(e):
+                            continue  # Đã bị abort/complete trước đó
+                        raise
+                    aborted += 1
+                    reclaimed += sum(p.size for p in parts)
+                if upload_ids and not aborted:
+                    logger.info("Skip reaping upload that no longer exists", video_id=str(video.id))
+                    return None
+                return aborted, reclaimed
+            except Exception as exc:
+                logger.warning(
+                    "Failed to reap abandoned upload",
+                    video_id=str(video.id),
+                    error=str(exc),
+                )
+                return None
+
+
+class ProbeVideoMetadataUseCase:
+    """
+    Chạy sau khi upload complete (ngoài request): ffprobe đọc object theo range
+    (chỉ kéo header + 1 keyframe) để điền duration, codec, resolution và thumbnail.
+    """
+
+    THUMBNAIL_CONTENT_TYPE = "image/jpeg"
+
+    def __init__(
+        self,
+        video_repo: VideoRepository,
+        storage: IMultipartStoragePort,
+        probe: IMediaProbePort,
+    ):
+        self.video_repo = video_repo
+        self.storage = storage
+        self.probe = probe
+
+    async def execute(self, video_id: UUID) -> Optional[MediaInfo]:
+        video = await self.video_repo.get_by_id(video_id)
+        if not video or video.status != "completed":
+            logger.warning("Skip metadata probe", video_id=str(video_id))
+            return None
+
+        # ffprobe/ffmpeg đọc qua proxy range local: chỉ kéo moov atom + keyframe,
+        # block cache dùng chung giữa probe và thumbnail
+        async with self.storage.open_range_url(video.s3_key) as source_url:
+            info = await self.probe.probe(source_url)
+
+            fields = {
+                "duration_sec": info.duration_sec,
+                "video_codec": info.video_codec,
+                "width": info.width,
+                "height": info.height,
+            }
+            if video.file_size_bytes is None and info.size_bytes is not None:
+                fields["file_size_bytes"] = info.size_bytes
+
+            try:
+                # Frame ở ~10% thời lượng thường đẹp hơn frame đen đầu video
+                at_sec = min((info.duration_sec or 0.0) * 0.1, 5.0)
+                thumbnail = await self.probe.extract_thumbnail(source_url, at_sec)
+                thumbnail_key = f"uploads/{video.id}/thumbnail.jpg"
+                await self.storage.put_object(thumbnail_key, thumbnail, self.THUMBNAIL_CONTENT_TYPE)
+                fields["thumbnail_url"] = thumbnail_key
+            except Exception as exc:
+                # Thiếu thumbnail không làm mất metadata đã probe được
+                logger.warning("Failed to extract thumbnail", video_id=str(video.id), error=str(exc))
+
+        await self.video_repo.update_fields(video.id, **fields)
+        logger.info("Video metadata probed", video_id=str(video.id), **fields)
+        return info
+
+
+class PurgeVideosUseCase:
+    """
+    Xoá hàng loạt video: mọi object dưới prefix uploads/{id}/ (file gốc, thumbnail,
+    artifact dẫn xuất) và outputs/{job_id}/ của các job xử lý video đó (bản render)
+    bằng DeleteObjects theo batch 1000 key, rồi xoá DB rows bằng một câu DELETE.
+    Video nào xoá S3 lỗi thì giữ lại row để lần sau thử lại.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        video_repo: VideoRepository,
+        storage: IMultipartStoragePort,
+        concurrency: int = 8,
+    ):
+        self.video_repo = video_repo
+        self.storage = storage
+        self.concurrency = concurrency
+
+    async def execute(self, video_ids: List[UUID], user_id: Optional[int] = None) -> PurgeResult:
+        """user_id: chỉ xoá video của user này; id của người khác báo là not found"""
+        result = PurgeResult()
+        for i in range(0, len(video_ids), self.BATCH_SIZE):
+            chunk = video_ids[i:i + self.BATCH_SIZE]
+            videos = await self.video_repo.get_by_ids(chunk, user_id=user_id)
+            found = {v.id for v in videos}
+            result.not_found_video_ids.extend(video_id for video_id in chunk if video_id not in found)
+            await self._purge(videos, result)
+        return result
+
+    async def execute_matching(
+        self,
+        user_id: Optional[int],
+        status: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+    ) -> PurgeResult:
+        result = PurgeResult()
+        after: Optional[Tuple[datetime, UUID]] = None
+        while True:
+            # Cursor (created_at, id) luôn tiến: row xoá lỗi không chặn các row phía sau
+            videos = await self.video_repo.find_for_purge(
+                user_id, self.BATCH_SIZE, status=status, created_before=created_before, after=after
+            )
+            if not videos:
+                break
+            after = (videos[-1].created_at, videos[-1].id)
+            await self._purge(videos, result)
+            if len(videos) < self.BATCH_SIZE:
+                break
+        return result
+
+    async def _purge(self, videos: List[VideoModel], result: PurgeResult) -> int:
+        if not videos:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        job_ids = await self.video_repo.find_processing_job_ids([v.s3_key for v in videos])
+        key_lists = await asyncio.gather(
+            *(self._collect_keys(v, job_ids.get(v.s3_key, []), semaphore) for v in videos)
+        )
+
+        keys_by_video = {v.id: keys for v, keys in zip(videos, key_lists) if keys is not None}
+        all_keys = [key for keys in keys_by_video.values() for key in keys]
+        failed_keys = set(await self.storage.delete_objects(all_keys)) if all_keys else set()
+
+        purgeable = [
+            video_id for video_id, keys in keys_by_video.items()
+            if not failed_keys.intersection(keys)
+        ]
+        deleted_ids = await self.video_repo.delete_many(purgeable)
+
+        purgeable_ids = set(purgeable)
+        result.deleted_video_ids.extend(deleted_ids)
+        result.failed_video_ids.extend(v.id for v in videos if v.id not in purgeable_ids)
+        result.deleted_objects += len(all_keys) - len(failed_keys)
+        logger.info(
+            "Purged videos",
+            deleted=len(deleted_ids),
+            failed=len(videos) - len(purgeable),
+            objects=len(all_keys) - len(failed_keys),
+        )
+        return len(deleted_ids)
+
+    async def _collect_keys(
+        self, video: VideoModel, job_ids: List[UUID], semaphore: asyncio.Semaphore
+    ) -> Optional[List[str]]:
+        """Các key cần xoá của một video, None nếu không liệt kê / abort được"""
+        async with semaphore:
+            try:
+                if video.status == "uploading" and video.upload_id:
+                    # Part đã upload của multipart dang dở không hiện trong ListObjects
+                    try:
+                        await self.storage.abort_multipart_upload(video.s3_key, video.upload_id)
+                    except ClientError as e:
+                        if not _is_no_such_upload(e):
+                            raise
+                keys = await self.storage.list_object_keys(f"uploads/{video.id}/")
+                if video.s3_key not in keys:
+                    keys.append(video.s3_key)
+                for job_id in job_ids:
+                    keys += await self.storage.list_object_keys(f"outputs/{job_id}/")
+                return keys
+            except Exception as exc:
+                logger.warning("Failed to list objects for purge", video_id=str(video.id), error=str(exc))
+                return None
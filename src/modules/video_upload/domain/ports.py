@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncContextManager
 from pydantic import BaseModel
+from .value_objects import MediaInfo
 
 class InitiateResponse(BaseModel):
     upload_id: str
@@ -10,6 +11,11 @@ class CompletedPart(BaseModel):
     part_number: int
     etag: str
 
+class UploadedPart(BaseModel):
+    part_number: int
+    etag: str
+    size: int
+
 class IMultipartStoragePort(ABC):
     @abstractmethod
     async def initiate_multipart_upload(self, remote_path: str, content_type: str) -> InitiateResponse:
@@ -25,6 +31,16 @@ class IMultipartStoragePort(ABC):
     ) -> str:
         pass
 
+    @abstractmethod
+    async def generate_presigned_urls_for_parts(
+        self,
+        remote_path: str,
+        upload_id: str,
+        part_numbers: List[int],
+        expiration: int = 3600
+    ) -> Dict[int, str]:
+        pass
+
     @abstractmethod
     async def complete_multipart_upload(
         self, 
@@ -34,6 +50,20 @@ class IMultipartStoragePort(ABC):
     ) -> str:
         pass
 
+    @abstractmethod
+    async def list_uploaded_parts(
+        self,
+        remote_path: str,
+        upload_id: str
+    ) -> List[UploadedPart]:
+        """Các part S3 đã nhận (phân trang qua ListParts) để client resume upload"""
+        pass
+
+    @abstractmethod
+    async def list_multipart_upload_ids(self, remote_path: str) -> List[str]:
+        """UploadId của các multipart upload còn dang dở cho key này"""
+        pass
+
     @abstractmethod
     async def abort_multipart_upload(
         self, 
@@ -49,3 +79,33 @@ class IMultipartStoragePort(ABC):
     @abstractmethod
     async def get_object_info(self, remote_path: str) -> Dict[str, Any]:
         pass
+
+    @abstractmethod
+    async def put_object(self, remote_path: str, body: bytes, content_type: str) -> str:
+        pass
+
+    @abstractmethod
+    async def list_object_keys(self, prefix: str) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def delete_objects(self, remote_paths: List[str]) -> List[str]:
+        """Xoá nhiều object (batch DeleteObjects), trả về các key xoá thất bại"""
+        pass
+
+    @abstractmethod
+    def open_range_url(self, remote_path: str) -> AsyncContextManager[str]:
+        """URL local hỗ trợ HTTP Range (đọc object theo từng đoạn, có block cache)"""
+        pass
+
+class IMediaProbePort(ABC):
+    """Port đọc metadata / thumbnail từ video qua URL (đọc theo range, không tải cả file)"""
+
+    @abstractmethod
+    async def probe(self, source_url: str) -> MediaInfo:
+        pass
+
+    @abstractmethod
+    async def extract_thumbnail(self, source_url: str, at_sec: float) -> bytes:
+        """Trả về ảnh JPEG của frame tại at_sec"""
+        pass
@@ -0,0 +1,46 @@
+import math
+from typing import Optional
+from src.modules.video_upload.domain.value_objects import PartPlan
+
+MiB = 1024 * 1024
+GiB = 1024 * MiB
+TiB = 1024 * GiB
+
+
+class PartSizingRule:
+    """
+    Domain Service: chọn part size cho S3 multipart theo dung lượng file.
+    - Tôn trọng giới hạn S3: part 5 MiB – 5 GiB, tối đa 10,000 part, object tối đa 5 TiB
+    - File càng lớn thì part càng lớn để giảm số request và overhead mỗi part
+    """
+
+    MIN_PART_SIZE = 5 * MiB
+    MAX_PART_SIZE = 5 * GiB
+    MAX_PARTS = 10_000
+    MAX_OBJECT_SIZE = 5 * TiB
+    DEFAULT_PART_SIZE = 10 * MiB
+
+    # (file size tối đa, part size mục tiêu)
+    TIERS = [
+        (1 * GiB, 10 * MiB),
+        (10 * GiB, 32 * MiB),
+        (100 * GiB, 128 * MiB),
+    ]
+    LARGEST_TIER_PART_SIZE = 512 * MiB
+
+    @classmethod
+    def recommend(cls, file_size: Optional[int]) -> PartPlan:
+        if file_size is None:
+            return PartPlan(part_size=cls.DEFAULT_PART_SIZE)
+        if file_size < 0 or file_size > cls.MAX_OBJECT_SIZE:
+            raise ValueError(f"file_size phải nằm trong [0, {cls.MAX_OBJECT_SIZE}] bytes")
+
+        target = next(
+            (part_size for max_size, part_size in cls.TIERS if file_size <= max_size),
+            cls.LARGEST_TIER_PART_SIZE,
+        )
+        # Part nhỏ nhất để không vượt quá 10,000 part, làm tròn lên MiB
+        required = math.ceil(math.ceil(file_size / cls.MAX_PARTS) / MiB) * MiB
+        part_size = min(max(target, required, cls.MIN_PART_SIZE), cls.MAX_PART_SIZE)
+        part_count = max(1, math.ceil(file_size / part_size))
+        return PartPlan(part_size=part_size, part_count=part_count)
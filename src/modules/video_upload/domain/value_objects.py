@@ -0,0 +1,35 @@
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class PartPlan(BaseModel):
+    """Value Object: cách chia file thành các part cho S3 multipart upload"""
+    part_size: int
+    part_count: Optional[int] = None
+
+
+class MediaInfo(BaseModel):
+    """Value Object: metadata đọc được từ file video (ffprobe)"""
+    duration_sec: Optional[float] = None
+    size_bytes: Optional[int] = None
+    video_codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+class ReapResult(BaseModel):
+    """Kết quả một lượt dọn multipart upload bị bỏ dở"""
+    scanned: int = 0
+    aborted_uploads: int = 0
+    videos_abandoned: int = 0
+    bytes_reclaimed: int = 0
+
+
+class PurgeResult(BaseModel):
+    """Kết quả xoá hàng loạt video (S3 objects + DB rows)"""
+    deleted_video_ids: List[UUID] = []
+    failed_video_ids: List[UUID] = []
+    # Không tồn tại hoặc không thuộc user gọi → không xoá
+    not_found_video_ids: List[UUID] = []
+    deleted_objects: int = 0
@@ -0,0 +1,94 @@
+"""
+FFprobe Media Probe Adapter
+Implements IMediaProbePort — ffprobe/ffmpeg đọc video qua HTTP range request,
+chỉ kéo phần header (moov atom) và một keyframe thay vì tải toàn bộ file.
+"""
+
+import asyncio
+import json
+import structlog
+from typing import Any, Optional
+
+from src.modules.video_upload.domain.ports import IMediaProbePort
+from src.modules.video_upload.domain.value_objects import MediaInfo
+
+logger = structlog.get_logger()
+
+PROBE_TIMEOUT_SECONDS = 60
+THUMBNAIL_WIDTH = 640
+
+
+class FFprobeMediaProbeAdapter(IMediaProbePort):
+    def __init__(self, timeout: float = PROBE_TIMEOUT_SECONDS) -> None:
+        self.timeout = timeout
+
+    async def probe(self, source_url: str) -> MediaInfo:
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-print_format", "json",
+            "-show_format",
+            "-show_streams",
+            "-select_streams", "v:0",
+            source_url,
+        ]
+        stdout = await self._run(cmd, "ffprobe")
+        return self._parse_probe_output(json.loads(stdout or b"{}"))
+
+    async def extract_thumbnail(self, source_url: str, at_sec: float) -> bytes:
+        # -ss trước -i: seek theo index (chỉ đọc range chứa keyframe gần nhất)
+        cmd = [
+            "ffmpeg",
+            "-v", "error",
+            "-ss", f"{max(at_sec, 0.0):.3f}",
+            "-i", source_url,
+            "-frames:v", "1",
+            "-vf", f"scale={THUMBNAIL_WIDTH}:-2",
+            "-f", "image2",
+            "-c:v", "mjpeg",
+            "pipe:1",
+        ]
+        return await self._run(cmd, "ffmpeg thumbnail")
+
+    # ── Private ───────────────────────────────────────────────────────────────
+
+    async def _run(self, cmd: list[str], name: str) -> bytes:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise RuntimeError(f"{name} timed out after {self.timeout}s")
+
+        if process.returncode != 0:
+            error_msg = stderr.decode(errors="replace").strip()
+            logger.error(f"{name} failed", returncode=process.returncode, error=error_msg)
+            raise RuntimeError(f"{name} failed with return code {process.returncode}: {error_msg}")
+        return stdout
+
+    @staticmethod
+    def _parse_probe_output(data: dict[str, Any]) -> MediaInfo:
+        fmt = data.get("format", {})
+        streams = data.get("streams") or [{}]
+        video = streams[0]
+
+        def _float(value: Any) -> Optional[float]:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+
+        duration = _float(fmt.get("duration")) or _float(video.get("duration"))
+        size = _float(fmt.get("size"))
+        return MediaInfo(
+            duration_sec=duration,
+            size_bytes=int(size) if size is not None else None,
+            video_codec=video.get("codec_name"),
+            width=video.get("width"),
+            height=video.get("height"),
+        )
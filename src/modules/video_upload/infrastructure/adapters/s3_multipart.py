@@ -1,179 +1,169 @@
-import aioboto3
-from botocore.exceptions import ClientError
-from typing import List, Dict, Any
-from src.modules.video_upload.domain.ports import IMultipartStoragePort, InitiateResponse, CompletedPart
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, AsyncIterator, Optional
+from src.modules.video_upload.domain.ports import IMultipartStoragePort, InitiateResponse, CompletedPart, UploadedPart
 from src.shared.config.settings import settings
-from botocore.config import Config
+from src.shared.storage.s3_client import S3ClientManager, s3_client_manager
+from src.shared.storage.s3_presigner import S3Presigner
+from src.shared.storage.range_reader import S3RangeProxy, S3RangeReader
+
+# Giới hạn số key của một request DeleteObjects
+DELETE_OBJECTS_BATCH_SIZE = 1000
 
 class S3MultipartStorageAdapter(IMultipartStoragePort):
-    def __init__(self):
-        self.session = aioboto3.Session()
+    def __init__(self, client_manager: Optional[S3ClientManager] = None):
+        # Dùng chung S3 client long-lived thay vì mở client mới cho mỗi call
+        self.client_manager = client_manager or s3_client_manager
+        # Presigned URL ký local (thuần CPU), không cần client
+        self.presigner = S3Presigner()
         self.bucket_name = settings.S3_BUCKET_NAME
         self.region = settings.AWS_REGION
 
-    def _get_config(self):
-        return Config(
-            signature_version="s3v4",
-            s3={'addressing_style': 'virtual'}
-        )
-
     async def initiate_multipart_upload(self, remote_path: str, content_type: str) -> InitiateResponse:
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
-            config=self._get_config()
-        ) as s3:
-            try:
-                response = await s3.create_multipart_upload(
-                    Bucket=self.bucket_name,
-                    Key=remote_path,
-                    ContentType=content_type
-                )
-                return InitiateResponse(
-                    upload_id=response['UploadId'],
-                    key=remote_path
-                )
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        response = await s3.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=remote_path,
+            ContentType=content_type
+        )
+        return InitiateResponse(
+            upload_id=response['UploadId'],
+            key=remote_path
+        )
 
     async def generate_presigned_url_for_part(
-        self, 
-        remote_path: str, 
-        upload_id: str, 
+        self,
+        remote_path: str,
+        upload_id: str,
         part_number: int,
         expiration: int = 3600
     ) -> str:
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
-            config=self._get_config()
-        ) as s3:
-            try:
-                url = await s3.generate_presigned_url(
-                    ClientMethod='upload_part',
-                    Params={
-                        'Bucket': self.bucket_name,
-                        'Key': remote_path,
-                        'UploadId': upload_id,
-                        'PartNumber': part_number
-                    },
-                    ExpiresIn=expiration
-                )
-                return url
-            except ClientError as e:
-                raise e
+        return self.presigner.presign_upload_part(
+            remote_path, upload_id, part_number, expiration
+        )
+
+    async def generate_presigned_urls_for_parts(
+        self,
+        remote_path: str,
+        upload_id: str,
+        part_numbers: List[int],
+        expiration: int = 3600
+    ) -> Dict[int, str]:
+        return self.presigner.presign_upload_parts(
+            remote_path, upload_id, part_numbers, expiration
+        )
 
     async def complete_multipart_upload(
-        self, 
-        remote_path: str, 
-        upload_id: str, 
+        self,
+        remote_path: str,
+        upload_id: str,
         parts: List[CompletedPart]
     ) -> str:
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
-            config=self._get_config()
-        ) as s3:
-            try:
-                # S3 requires parts to be sorted by PartNumber
-                sorted_parts = sorted([
-                    {'PartNumber': p.part_number, 'ETag': p.etag}
-                    for p in parts
-                ], key=lambda x: x['PartNumber'])
-
-                await s3.complete_multipart_upload(
-                    Bucket=self.bucket_name,
-                    Key=remote_path,
-                    UploadId=upload_id,
-                    MultipartUpload={'Parts': sorted_parts}
-                )
-                return f"s3://{self.bucket_name}/{remote_path}"
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        # S3 requires parts to be sorted by PartNumber
+        sorted_parts = sorted([
+            {'PartNumber': p.part_number, 'ETag': p.etag}
+            for p in parts
+        ], key=lambda x: x['PartNumber'])
+
+        await s3.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=remote_path,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': sorted_parts}
+        )
+        return f"s3://{self.bucket_name}/{remote_path}"
+
+    async def list_uploaded_parts(
+        self,
+        remote_path: str,
+        upload_id: str
+    ) -> List[UploadedPart]:
+        s3 = await self.client_manager.get_client()
+        paginator = s3.get_paginator('list_parts')
+        parts: List[UploadedPart] = []
+        async for page in paginator.paginate(
+            Bucket=self.bucket_name,
+            Key=remote_path,
+            UploadId=upload_id
+        ):
+            for p in page.get('Parts', []):
+                parts.append(UploadedPart(
+                    part_number=p['PartNumber'],
+                    etag=p['ETag'].strip('"'),
+                    size=p['Size']
+                ))
+        return parts
+
+    async def list_multipart_upload_ids(self, remote_path: str) -> List[str]:
+        s3 = await self.client_manager.get_client()
+        paginator = s3.get_paginator('list_multipart_uploads')
+        upload_ids: List[str] = []
+        async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=remote_path):
+            upload_ids.extend(
+                u['UploadId'] for u in page.get('Uploads', []) if u['Key'] == remote_path
+            )
+        return upload_ids
 
     async def abort_multipart_upload(
-        self, 
-        remote_path: str, 
+        self,
+        remote_path: str,
         upload_id: str
     ) -> None:
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
-            config=self._get_config()
-        ) as s3:
-            try:
-                await s3.abort_multipart_upload(
-                    Bucket=self.bucket_name,
-                    Key=remote_path,
-                    UploadId=upload_id
-                )
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        await s3.abort_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=remote_path,
+            UploadId=upload_id
+        )
 
     async def generate_download_url(self, remote_path: str, expiration: int = 3600, filename: str = None) -> str:
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
-            config=self._get_config()
-        ) as s3:
-            try:
-                params = {'Bucket': self.bucket_name, 'Key': remote_path}
-                if filename:
-                    # Set response content disposition to suggest filename for download
-                    params['ResponseContentDisposition'] = f'attachment; filename="{filename}"'
-
-                url = await s3.generate_presigned_url(
-                    ClientMethod='get_object',
-                    Params=params,
-                    ExpiresIn=expiration
-                )
-                return url
-            except ClientError as e:
-                raise e
+        return self.presigner.presign_get_object(remote_path, expiration, filename=filename)
 
     async def delete_object(self, remote_path: str) -> None:
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
-            config=self._get_config()
-        ) as s3:
-            try:
-                await s3.delete_object(Bucket=self.bucket_name, Key=remote_path)
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        await s3.delete_object(Bucket=self.bucket_name, Key=remote_path)
+
+    async def list_object_keys(self, prefix: str) -> List[str]:
+        s3 = await self.client_manager.get_client()
+        paginator = s3.get_paginator('list_objects_v2')
+        keys: List[str] = []
+        async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return keys
+
+    async def delete_objects(self, remote_paths: List[str]) -> List[str]:
+        s3 = await self.client_manager.get_client()
+        failed: List[str] = []
+        for i in range(0, len(remote_paths), DELETE_OBJECTS_BATCH_SIZE):
+            batch = remote_paths[i:i + DELETE_OBJECTS_BATCH_SIZE]
+            # Quiet: S3 chỉ trả về các key lỗi
+            response = await s3.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            failed.extend(err['Key'] for err in response.get('Errors', []))
+        return failed
 
     async def get_object_info(self, remote_path: str) -> Dict[str, Any]:
-        async with self.session.client(
-            "s3",
-            region_name=self.region,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
-            config=self._get_config()
-        ) as s3:
-            try:
-                response = await s3.head_object(Bucket=self.bucket_name, Key=remote_path)
-                return {
-                    "size": response.get('ContentLength', 0),
-                    "content_type": response.get('ContentType', 'application/octet-stream')
-                }
-            except ClientError as e:
-                raise e
+        s3 = await self.client_manager.get_client()
+        response = await s3.head_object(Bucket=self.bucket_name, Key=remote_path)
+        return {
+            "size": response.get('ContentLength', 0),
+            "content_type": response.get('ContentType', 'application/octet-stream')
+        }
+
+    async def put_object(self, remote_path: str, body: bytes, content_type: str) -> str:
+        s3 = await self.client_manager.get_client()
+        await s3.put_object(
+            Bucket=self.bucket_name,
+            Key=remote_path,
+            Body=body,
+            ContentType=content_type
+        )
+        return f"s3://{self.bucket_name}/{remote_path}"
+
+    @asynccontextmanager
+    async def open_range_url(self, remote_path: str) -> AsyncIterator[str]:
+        reader = S3RangeReader(remote_path, self.bucket_name, self.client_manager)
+        async with S3RangeProxy(reader) as url:
+            yield url
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, BigInteger, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, Float, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 from src.shared.database.base import Base
 import uuid
@@ -10,9 +10,19 @@ class VideoModel(Base):
     user_id = Column(Integer, nullable=True)
     original_filename = Column(String(255), nullable=False)
     s3_key = Column(String(500), nullable=False)
+    upload_id = Column(String(255), nullable=True)
     status = Column(String(20), server_default="uploading")
     file_size_bytes = Column(BigInteger, nullable=True)
     duration_sec = Column(Float, nullable=True)
     thumbnail_url = Column(String(500), nullable=True)
+    video_codec = Column(String(50), nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
     created_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_videos_status_created_at", "status", "created_at"),
+        # Keyset pagination /my-videos: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_videos_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+    )
@@ -1,18 +1,45 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from typing import List, Optional
+from sqlalchemy import select, insert, update, delete, tuple_, any_, bindparam, table, column, String
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PostgresUUID
+from sqlalchemy.engine import Row
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
+from datetime import datetime
+from src.shared.database.unit_of_work import commit_unless_in_unit_of_work
 from .models import VideoModel
 
+# Cột cần cho danh sách video (VideoResponse) — không load cả ORM object
+VIDEO_LIST_COLUMNS = (
+    VideoModel.id,
+    VideoModel.original_filename,
+    VideoModel.status,
+    VideoModel.file_size_bytes,
+    VideoModel.duration_sec,
+    VideoModel.video_codec,
+    VideoModel.width,
+    VideoModel.height,
+    VideoModel.created_at,
+)
+
+# Job xử lý của module video_processing (input_file_path = s3_key của video); chỉ cần 2 cột
+# để tìm output render khi purge, không import model của module kia
+_video_jobs = table(
+    "video_jobs",
+    column("id", PostgresUUID(as_uuid=True)),
+    column("input_file_path", String),
+)
+
 class VideoRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def create(self, video_data: dict) -> VideoModel:
-        video = VideoModel(**video_data)
-        self.session.add(video)
-        await self.session.commit()
-        await self.session.refresh(video)
+        # INSERT ... RETURNING: server defaults có ngay, không cần refresh (SELECT thứ 2)
+        result = await self.session.execute(
+            insert(VideoModel).values(**video_data).returning(VideoModel)
+        )
+        video = result.scalar_one()
+        await commit_unless_in_unit_of_work(self.session)
         return video
 
     async def get_by_id(self, video_id: UUID) -> Optional[VideoModel]:
@@ -21,6 +48,40 @@ class VideoRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_by_ids(self, video_ids: List[UUID], user_id: Optional[int] = None) -> List[VideoModel]:
+        """user_id: chỉ trả về video của user này (id của người khác coi như không tồn tại)"""
+        if not video_ids:
+            return []
+        query = select(VideoModel).where(VideoModel.id == any_(self._uuid_array(video_ids)))
+        if user_id is not None:
+            query = query.where(VideoModel.user_id == user_id)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def find_for_purge(
+        self,
+        user_id: Optional[int],
+        limit: int,
+        status: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, UUID]] = None,
+    ) -> List[VideoModel]:
+        """Keyset theo (created_at, id): after = (created_at, id) của dòng cuối batch trước"""
+        query = (
+            select(VideoModel)
+            .where(VideoModel.user_id == user_id)
+            .order_by(VideoModel.created_at, VideoModel.id)
+            .limit(limit)
+        )
+        if status:
+            query = query.where(VideoModel.status == status)
+        if created_before:
+            query = query.where(VideoModel.created_at < created_before)
+        if after:
+            query = query.where(tuple_(VideoModel.created_at, VideoModel.id) > tuple_(*after))
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
     async def get_by_user_id(self, user_id: int) -> List[VideoModel]:
         result = await self.session.execute(
             select(VideoModel)
@@ -29,6 +90,30 @@ class VideoRepository:
         )
         return list(result.scalars().all())
 
+    async def list_by_user(
+        self,
+        user_id: Optional[int],
+        limit: int,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        status: Optional[str] = None,
+    ) -> List[Row]:
+        """
+        Keyset pagination theo (created_at, id) DESC, dùng index
+        (user_id, created_at DESC, id DESC). after = (created_at, id) của dòng cuối trang trước.
+        """
+        query = (
+            select(*VIDEO_LIST_COLUMNS)
+            .where(VideoModel.user_id == user_id)
+            .order_by(VideoModel.created_at.desc(), VideoModel.id.desc())
+            .limit(limit)
+        )
+        if status:
+            query = query.where(VideoModel.status == status)
+        if after:
+            query = query.where(tuple_(VideoModel.created_at, VideoModel.id) < tuple_(*after))
+        result = await self.session.execute(query)
+        return list(result.all())
+
     async def update_status(self, video_id: UUID, status: str, **kwargs) -> Optional[VideoModel]:
         query = (
             update(VideoModel)
@@ -37,13 +122,94 @@ class VideoRepository:
             .returning(VideoModel)
         )
         result = await self.session.execute(query)
-        await self.session.commit()
+        await commit_unless_in_unit_of_work(self.session)
+        return result.scalar_one_or_none()
+
+    async def update_fields(self, video_id: UUID, **kwargs) -> Optional[VideoModel]:
+        """UPDATE một số cột (không đổi status), vd. metadata từ worker probe"""
+        result = await self.session.execute(
+            update(VideoModel)
+            .where(VideoModel.id == video_id)
+            .values(**kwargs)
+            .returning(VideoModel)
+        )
+        await commit_unless_in_unit_of_work(self.session)
         return result.scalar_one_or_none()
 
+    async def find_stale_uploads(
+        self,
+        created_before: datetime,
+        limit: int,
+        after: Optional[Tuple[datetime, UUID]] = None,
+    ) -> List[VideoModel]:
+        """
+        Video vẫn 'uploading' quá TTL (dùng index (status, created_at)).
+        Keyset theo (created_at, id): after = (created_at, id) của dòng cuối batch trước.
+        """
+        query = (
+            select(VideoModel)
+            .where(VideoModel.status == "uploading")
+            .where(VideoModel.created_at < created_before)
+            .order_by(VideoModel.created_at, VideoModel.id)
+            .limit(limit)
+        )
+        if after:
+            query = query.where(tuple_(VideoModel.created_at, VideoModel.id) > tuple_(*after))
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def bulk_update_status(
+        self, video_ids: List[UUID], status: str, from_status: Optional[str] = None
+    ) -> int:
+        """from_status: chỉ đổi row còn ở trạng thái này (vd. upload vừa /complete thì bỏ qua)"""
+        if not video_ids:
+            return 0
+        query = (
+            update(VideoModel)
+            .where(VideoModel.id == any_(self._uuid_array(video_ids)))
+            .values(status=status)
+        )
+        if from_status is not None:
+            query = query.where(VideoModel.status == from_status)
+        result = await self.session.execute(query)
+        await commit_unless_in_unit_of_work(self.session)
+        return result.rowcount
+
+    async def delete_many(self, video_ids: List[UUID]) -> List[UUID]:
+        """Một câu DELETE ... WHERE id = ANY(:ids) RETURNING id, một commit"""
+        if not video_ids:
+            return []
+        result = await self.session.execute(
+            delete(VideoModel)
+            .where(VideoModel.id == any_(self._uuid_array(video_ids)))
+            .returning(VideoModel.id)
+        )
+        deleted_ids = list(result.scalars().all())
+        await commit_unless_in_unit_of_work(self.session)
+        return deleted_ids
+
+    async def find_processing_job_ids(self, s3_keys: List[str]) -> Dict[str, List[UUID]]:
+        """s3_key → id các job xử lý video đó (output nằm dưới outputs/{job_id}/)"""
+        if not s3_keys:
+            return {}
+        result = await self.session.execute(
+            select(_video_jobs.c.input_file_path, _video_jobs.c.id)
+            .where(_video_jobs.c.input_file_path == any_(bindparam("s3_keys", list(s3_keys), type_=ARRAY(String))))
+        )
+        job_ids: Dict[str, List[UUID]] = {}
+        for s3_key, job_id in result.all():
+            job_ids.setdefault(s3_key, []).append(job_id)
+        return job_ids
+
+    @staticmethod
+    def _uuid_array(video_ids: List[UUID]):
+        # Một bind param kiểu uuid[] thay vì IN (...) với N param
+        return bindparam("video_ids", list(video_ids), type_=ARRAY(PostgresUUID(as_uuid=True)))
+
     async def delete(self, video_id: UUID) -> bool:
-        video = await self.get_by_id(video_id)
-        if video:
-            await self.session.delete(video)
-            await self.session.commit()
-            return True
-        return False
+        result = await self.session.execute(
+            delete(VideoModel).where(VideoModel.id == video_id).returning(VideoModel.id)
+        )
+        deleted = result.scalar_one_or_none() is not None
+        await commit_unless_in_unit_of_work(self.session)
+        return deleted
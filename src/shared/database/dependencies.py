@@ -1,7 +1,10 @@
 from typing import Annotated
 from fastapi import Depends
-from src.shared.database.session import get_async_session
+from src.shared.database.session import get_async_session, get_read_session
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Alias using Annotated for clean and type-safe dependency injection
 DatabaseSession = Annotated[AsyncSession, Depends(get_async_session)]
+
+# Route chỉ đọc (dashboard, listing, download) → read replica khi được cấu hình
+ReadDatabaseSession = Annotated[AsyncSession, Depends(get_read_session)]
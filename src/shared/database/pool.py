@@ -0,0 +1,58 @@
+"""
+Connection pool có đo thời gian chờ
+AsyncAdaptedQueuePool mặc định không cho biết request phải chờ bao lâu để lấy
+connection — đây là dấu hiệu đầu tiên khi pool quá nhỏ so với tải.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolWaitStats:
+    """Thống kê cộng dồn thời gian checkout (chờ slot + mở connection mới + pre-ping)"""
+
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    timeouts: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool ghi lại thời gian mỗi lần lấy connection"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def connect(self):
+        # Đo ở connect() thay vì _do_get() vì QueuePool._do_get tự gọi đệ quy
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.observe_timeout()
+            raise
+        self.wait_stats.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> "InstrumentedAsyncPool":
+        # engine.dispose() tạo pool mới → giữ số liệu cộng dồn
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
@@ -1,23 +1,136 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from src.shared.config.settings import settings
+from src.shared.config.settings import Settings, settings
+from src.shared.database.pool import InstrumentedAsyncPool
+
+
+def _prepared_statement_name() -> str:
+    # Tên duy nhất: qua pgbouncer, connection server có thể đã có statement trùng tên
+    return f"__asyncpg_{uuid4()}__"
+
+
+def build_engine_kwargs(config: Settings) -> Dict[str, Any]:
+    """Tham số create_async_engine từ Settings (pool + asyncpg connect_args)"""
+    connect_args: Dict[str, Any] = {}
+    if config.DB_PGBOUNCER:
+        # Transaction mode: mỗi transaction có thể rơi vào connection server khác
+        # → prepared statement của asyncpg / SQLAlchemy không dùng lại được.
+        # pgbouncer cũng từ chối startup parameter lạ nên statement_timeout
+        # được áp ở phía client (command_timeout).
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = _prepared_statement_name
+        if config.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["command_timeout"] = config.DB_STATEMENT_TIMEOUT_MS / 1000
+    elif config.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)}
+
+    return {
+        "echo": config.DB_ECHO,
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": config.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+class ClientWrites:
+    """
+    Read-after-write theo client: thời điểm client ghi vào primary gần nhất (epoch, lấy từ
+    cookie của các request trước) và request hiện tại có commit hay không.
+    """
+
+    def __init__(self, last_write_at: Optional[float] = None) -> None:
+        self.last_write_at = last_write_at
+        self.wrote = False
+
+    def mark(self) -> None:
+        self.wrote = True
+        self.last_write_at = time.time()
+
+    def wrote_within(self, seconds: float) -> bool:
+        # Timestamp ở tương lai (cookie bị sửa) không được ép đọc primary mãi
+        return self.last_write_at is not None and 0 <= time.time() - self.last_write_at < seconds
+
+
+_client_writes: ContextVar[Optional[ClientWrites]] = ContextVar("client_writes", default=None)
+
+
+@contextmanager
+def track_client_writes(last_write_at: Optional[float] = None) -> Iterator[ClientWrites]:
+    """Gắn ClientWrites cho request hiện tại (middleware API); ngoài block không theo dõi gì"""
+    writes = ClientWrites(last_write_at)
+    token = _client_writes.set(writes)
+    try:
+        yield writes
+    finally:
+        _client_writes.reset(token)
+
+
+class TrackedAsyncSession(AsyncSession):
+    """Commit thành công vào primary → đánh dấu client của request hiện tại vừa ghi"""
+
+    async def commit(self) -> None:
+        await super().commit()
+        writes = _client_writes.get()
+        if writes is not None:
+            writes.mark()
+
 
 # Create async engine
-# Note: echo=True will log all SQL queries (good for dev)
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True
-)
+# Note: DB_ECHO=True will log all SQL queries (good for dev)
+engine = create_async_engine(settings.DATABASE_URL, **build_engine_kwargs(settings))
 
 # Create session factory
 async_session_maker = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=TrackedAsyncSession,
     expire_on_commit=False,
     autoflush=False
 )
 
+# Read replica (tuỳ chọn): cùng cấu hình pool, pool riêng
+replica_engine = (
+    create_async_engine(settings.DATABASE_REPLICA_URL, **build_engine_kwargs(settings))
+    if settings.DATABASE_REPLICA_URL
+    else None
+)
+replica_session_maker = (
+    async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    if replica_engine is not None
+    else None
+)
+
+
+def read_session_maker() -> async_sessionmaker:
+    """
+    Replica nếu có, trừ khi chính client này vừa ghi vào primary trong
+    DB_REPLICA_STALENESS_SECONDS (replica có thể chưa thấy thay đổi) → đọc từ primary.
+    Client khác vẫn đọc replica.
+    """
+    if replica_session_maker is None:
+        return async_session_maker
+    writes = _client_writes.get()
+    if writes is not None and writes.wrote_within(settings.DB_REPLICA_STALENESS_SECONDS):
+        return async_session_maker
+    return replica_session_maker
+
+
 async def get_async_session():
     """Dependency for providing async session to FastAPI routes or application logic"""
     async with async_session_maker() as session:
         yield session
+
+
+async def get_read_session():
+    """Dependency cho route chỉ đọc — không dùng session này để ghi"""
+    async with read_session_maker()() as session:
+        yield session
@@ -0,0 +1,74 @@
+"""
+Unit of work
+Mặc định mỗi method ghi của repository tự commit (1 round trip cho COMMIT).
+Trong unit_of_work(session), các repository dùng chung session bỏ qua commit
+riêng; toàn bộ thay đổi được commit một lần khi thoát block, rollback nếu lỗi.
+
+    async with unit_of_work(db):
+        await repo.update_status(...)
+        await other_repo.save(...)
+
+Chỉ bọc nhóm ghi ngắn, liên quan nhau. Không bọc cả pipeline / lời gọi ngoài (LLM,
+ffmpeg, S3): transaction mở suốt thời gian đó giữ lock row, giữ connection (pgbouncer
+transaction mode không trả về pool được) và các thay đổi trạng thái chưa ai thấy.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+UNIT_OF_WORK_KEY = "unit_of_work"
+AFTER_COMMIT_KEY = "after_commit"
+
+
+def in_unit_of_work(session: AsyncSession) -> bool:
+    return bool(session.info.get(UNIT_OF_WORK_KEY))
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Chạy callback khi transaction hiện tại commit thành công, bỏ đi nếu rollback
+    (vd. repository chỉ cập nhật cache "giá trị đang có trong DB" sau khi đã commit thật)
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+def _run_after_commit(session: AsyncSession) -> None:
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        callback()
+
+
+def _discard_after_commit(session: AsyncSession) -> None:
+    session.info.pop(AFTER_COMMIT_KEY, None)
+
+
+async def commit_unless_in_unit_of_work(session: AsyncSession) -> None:
+    """Repository gọi thay cho session.commit()"""
+    if not in_unit_of_work(session):
+        try:
+            await session.commit()
+        except BaseException:
+            _discard_after_commit(session)
+            raise
+        _run_after_commit(session)
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    if in_unit_of_work(session):
+        # Lồng nhau → nhập vào transaction bên ngoài, commit ở block ngoài cùng
+        yield session
+        return
+
+    session.info[UNIT_OF_WORK_KEY] = True
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        _discard_after_commit(session)
+        await session.rollback()
+        raise
+    finally:
+        session.info.pop(UNIT_OF_WORK_KEY, None)
+    _run_after_commit(session)
@@ -0,0 +1,63 @@
+"""
+Metrics dạng Prometheus text exposition (GET /metrics)
+Chỉ cần vài gauge/counter của connection pool và keyword cache nên tự render,
+không thêm dependency prometheus_client.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.shared.database.pool import InstrumentedAsyncPool
+
+# (tên, loại, mô tả, labels, giá trị)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def collect_pool_metrics(engine: AsyncEngine, name: str = "primary") -> List[Sample]:
+    pool = engine.sync_engine.pool
+    labels = {"engine": name}
+    samples: List[Sample] = [
+        ("db_pool_size", "gauge", "Configured pool size", labels, pool.size()),
+        ("db_pool_checked_out", "gauge", "Connections currently checked out", labels, pool.checkedout()),
+        ("db_pool_checked_in", "gauge", "Idle connections in the pool", labels, pool.checkedin()),
+        # QueuePool.overflow() âm khi pool chưa mở đủ pool_size connection
+        ("db_pool_overflow", "gauge", "Connections opened beyond pool size", labels, max(pool.overflow(), 0)),
+    ]
+    if isinstance(pool, InstrumentedAsyncPool):
+        stats = pool.wait_stats
+        samples += [
+            ("db_pool_checkouts_total", "counter", "Pool checkouts", labels, stats.count),
+            ("db_pool_checkout_seconds_total", "counter", "Total seconds spent acquiring connections", labels, stats.total_seconds),
+            ("db_pool_checkout_seconds_max", "gauge", "Slowest checkout since start", labels, stats.max_seconds),
+            ("db_pool_timeouts_total", "counter", "Checkouts that hit pool_timeout", labels, stats.timeouts),
+        ]
+    return samples
+
+
+def collect_keyword_cache_metrics(stats: Any) -> List[Sample]:
+    """stats: KeywordCacheStats (tổng của mọi worker, đọc từ Redis)"""
+    return [
+        ("keyword_cache_local_hits_total", "counter", "Keyword lookups served by the in-process LRU", {}, stats.local_hits),
+        ("keyword_cache_redis_hits_total", "counter", "Keyword lookups served by Redis", {}, stats.redis_hits),
+        ("keyword_cache_misses_total", "counter", "Keyword lookups that called the LLM", {}, stats.misses),
+        ("keyword_cache_errors_total", "counter", "Keyword cache Redis errors and invalid values", {}, stats.errors),
+        ("keyword_cache_bypassed_total", "counter", "Keyword extractions with the cache disabled", {}, stats.bypassed),
+    ]
+
+
+def render_prometheus(samples: Iterable[Sample]) -> str:
+    # HELP/TYPE chỉ in một lần cho mỗi metric, các series (labels khác nhau) đi liền nhau
+    grouped: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        grouped.setdefault(sample[0], []).append(sample)
+
+    lines = []
+    for name, series in grouped.items():
+        _, kind, help_text, _, _ = series[0]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for _, _, _, labels, value in series:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,19 @@
+from typing import Annotated, Optional
+from fastapi import Depends, Header, HTTPException
+
+# Chưa có auth trong service: gateway phía trước xác thực và set X-User-Id cho request
+
+
+def get_optional_user_id(x_user_id: Optional[int] = Header(None)) -> Optional[int]:
+    return x_user_id
+
+
+def get_current_user_id(x_user_id: Optional[int] = Header(None)) -> int:
+    """Endpoint thao tác theo user (vd. xoá theo filter) không được chạy khi thiếu user → 401"""
+    if x_user_id is None:
+        raise HTTPException(status_code=401, detail="Missing user identity")
+    return x_user_id
+
+
+CurrentUserId = Annotated[int, Depends(get_current_user_id)]
+OptionalUserId = Annotated[Optional[int], Depends(get_optional_user_id)]
@@ -0,0 +1,169 @@
+"""
+Streaming S3 multipart writer
+Ghi một stream (vd. stdout của ffmpeg) thẳng lên S3: mỗi khi buffer đủ một part
+thì upload_part ngay, song song với việc encoder tiếp tục ghi. Không cần file
+tạm trên đĩa; bộ nhớ tối đa ≈ part_size × (max_in_flight + 1).
+"""
+
+import asyncio
+from typing import Any, Optional
+
+import structlog
+
+from src.shared.config.settings import settings
+from src.shared.storage.s3_client import S3ClientManager, s3_client_manager
+
+logger = structlog.get_logger()
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # Giới hạn của S3 (trừ part cuối)
+
+
+class S3MultipartWriter:
+    """
+    async with S3MultipartWriter("outputs/x.mp4", "video/mp4") as writer:
+        await writer.write(chunk)
+    → complete khi thoát bình thường, abort nếu có exception.
+    """
+
+    def __init__(
+        self,
+        remote_path: str,
+        content_type: str = "application/octet-stream",
+        bucket_name: Optional[str] = None,
+        client_manager: Optional[S3ClientManager] = None,
+        part_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        self.remote_path = remote_path
+        self.content_type = content_type
+        self.bucket_name = bucket_name or settings.S3_BUCKET_NAME
+        self.client_manager = client_manager or s3_client_manager
+        self.part_size = max(part_size or settings.S3_STREAM_PART_SIZE, MIN_PART_SIZE)
+        self.max_in_flight = max_in_flight or settings.S3_STREAM_MAX_IN_FLIGHT_PARTS
+        self.bytes_written = 0
+        self.upload_id: Optional[str] = None
+        self._buffer = bytearray()
+        self._next_part = 1
+        self._parts: dict[int, str] = {}
+        self._pending: set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    async def __aenter__(self) -> "S3MultipartWriter":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None:
+            await self.abort()
+            return
+        try:
+            await self.close()
+        except BaseException:
+            await self.abort()
+            raise
+
+    # ── Public ────────────────────────────────────────────────────────────────
+
+    async def write(self, data: bytes) -> None:
+        if self._closed:
+            raise ValueError("write() sau khi writer đã đóng")
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            chunk = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            await self._submit_part(chunk)
+
+    async def close(self) -> str:
+        """Upload phần còn lại và complete; trả về s3:// URL"""
+        if self._closed:
+            return f"s3://{self.bucket_name}/{self.remote_path}"
+        if self._buffer or self._next_part == 1:
+            # Part cuối được phép < 5 MiB; object rỗng vẫn cần 1 part
+            await self._submit_part(bytes(self._buffer))
+            self._buffer.clear()
+        await self._drain()
+        self._closed = True
+
+        s3 = await self.client_manager.get_client()
+        await s3.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.remote_path,
+            UploadId=self.upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": number, "ETag": etag}
+                    for number, etag in sorted(self._parts.items())
+                ]
+            },
+        )
+        logger.info(
+            "Streaming multipart upload completed",
+            key=self.remote_path,
+            parts=len(self._parts),
+            bytes=self.bytes_written,
+        )
+        return f"s3://{self.bucket_name}/{self.remote_path}"
+
+    async def abort(self) -> None:
+        self._closed = True
+        pending = list(self._pending)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if self.upload_id is None:
+            return
+        try:
+            s3 = await self.client_manager.get_client()
+            await s3.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=self.remote_path, UploadId=self.upload_id
+            )
+        except Exception as exc:
+            # Reaper / lifecycle rule sẽ dọn nốt nếu abort thất bại
+            logger.warning("Failed to abort streaming upload", key=self.remote_path, error=str(exc))
+
+    # ── Private ───────────────────────────────────────────────────────────────
+
+    async def _submit_part(self, body: bytes) -> None:
+        if self.upload_id is None:
+            s3 = await self.client_manager.get_client()
+            response = await s3.create_multipart_upload(
+                Bucket=self.bucket_name, Key=self.remote_path, ContentType=self.content_type
+            )
+            self.upload_id = response["UploadId"]
+
+        # Backpressure: quá max_in_flight part đang upload thì write() chờ
+        await self._slots.acquire()
+        self._raise_failed()
+        part_number = self._next_part
+        self._next_part += 1
+        task = asyncio.create_task(self._upload_part(part_number, body))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _upload_part(self, part_number: int, body: bytes) -> None:
+        try:
+            s3 = await self.client_manager.get_client()
+            response = await s3.upload_part(
+                Bucket=self.bucket_name,
+                Key=self.remote_path,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            self._parts[part_number] = response["ETag"]
+        except Exception as exc:
+            self._error = self._error or exc
+        finally:
+            self._slots.release()
+
+    def _raise_failed(self) -> None:
+        # Part lỗi → dừng ngay ở write() kế tiếp thay vì encode hết rồi mới biết
+        if self._error is not None:
+            raise self._error
+
+    async def _drain(self) -> None:
+        if self._pending:
+            await asyncio.gather(*self._pending)
+        self._raise_failed()
@@ -0,0 +1,328 @@
+"""
+Ranged S3 reads
+Đọc một S3 object như file seekable bằng GetObject có header Range, kèm block
+cache nhỏ (LRU). ffprobe/ffmpeg đọc qua S3RangeProxy — một HTTP server local hỗ
+trợ Range — nên probe metadata chỉ kéo moov atom + vài keyframe (~1 MB) thay vì
+tải cả file về đĩa. Đọc tuần tự dài (extract audio, render) chuyển sang GET theo
+chunk lớn, chunk kế tiếp được prefetch trong lúc ffmpeg đang đọc chunk hiện tại.
+"""
+
+import asyncio
+import io
+import re
+import socket
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional
+
+import structlog
+
+from src.shared.config.settings import settings
+from src.shared.storage.s3_client import S3ClientManager, s3_client_manager
+
+logger = structlog.get_logger()
+
+_RANGE_HEADER = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class S3RangeReader:
+    """
+    File-like async reader trên một S3 object.
+    - Chia object thành block cố định; block thiếu liền nhau được gộp thành 1 GET.
+    - Cache LRU tối đa cache_blocks block, dùng chung cho mọi lần đọc.
+    - iter_range đọc tuần tự quá readahead_blocks block → GET mỗi lần readahead_blocks
+      block, không qua cache, luôn có một chunk đang tải trước (0 = tắt).
+    - bytes_fetched / requests để đo lượng dữ liệu thực sự kéo từ S3.
+    """
+
+    def __init__(
+        self,
+        remote_path: str,
+        bucket_name: Optional[str] = None,
+        client_manager: Optional[S3ClientManager] = None,
+        block_size: Optional[int] = None,
+        cache_blocks: Optional[int] = None,
+        readahead_blocks: Optional[int] = None,
+    ) -> None:
+        self.remote_path = remote_path
+        self.bucket_name = bucket_name or settings.S3_BUCKET_NAME
+        self.client_manager = client_manager or s3_client_manager
+        self.block_size = block_size or settings.S3_RANGE_BLOCK_SIZE
+        self.cache_blocks = cache_blocks or settings.S3_RANGE_CACHE_BLOCKS
+        self.readahead_blocks = (
+            settings.S3_RANGE_READAHEAD_BLOCKS if readahead_blocks is None else readahead_blocks
+        )
+        self.content_type = "application/octet-stream"
+        self.bytes_fetched = 0
+        self.requests = 0
+        self._size: Optional[int] = None
+        self._position = 0
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+
+    # ── File-like API ─────────────────────────────────────────────────────────
+
+    async def size(self) -> int:
+        if self._size is None:
+            s3 = await self.client_manager.get_client()
+            response = await s3.head_object(Bucket=self.bucket_name, Key=self.remote_path)
+            self._size = response["ContentLength"]
+            self.content_type = response.get("ContentType", self.content_type)
+            self.requests += 1
+        return self._size
+
+    def tell(self) -> int:
+        return self._position
+
+    async def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = await self.size() + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("negative seek position")
+        self._position = position
+        return position
+
+    async def read(self, n: int = -1) -> bytes:
+        size = await self.size()
+        end = size if n is None or n < 0 else min(self._position + n, size)
+        data = await self.read_range(self._position, end)
+        self._position += len(data)
+        return data
+
+    async def read_range(self, start: int, end: int) -> bytes:
+        """Đọc [start, end) — không đổi vị trí con trỏ"""
+        end = min(end, await self.size())
+        if start >= end:
+            return b""
+        first, last = start // self.block_size, (end - 1) // self.block_size
+        blocks = await self._get_blocks(first, last)
+        data = b"".join(blocks)
+        offset = start - first * self.block_size
+        return data[offset:offset + (end - start)]
+
+    async def iter_range(self, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Stream [start, end) theo từng block. readahead_blocks block đầu đi qua block cache,
+        chỉ fetch khi consumer cần tới (probe đọc header rồi đóng connection). Consumer đọc
+        tiếp → coi là đọc tuần tự: GET theo chunk, chunk sau tải song song với chunk đang gửi.
+        """
+        end = min(end, await self.size())
+        position = start
+        warmup_end = end
+        if self.readahead_blocks > 0:
+            warmup_end = min((start // self.block_size + self.readahead_blocks) * self.block_size, end)
+        while position < warmup_end:
+            block_end = min((position // self.block_size + 1) * self.block_size, end)
+            yield await self.read_range(position, block_end)
+            position = block_end
+        if position >= end:
+            return
+
+        chunk_size = self.readahead_blocks * self.block_size
+        pending: Optional[asyncio.Task] = asyncio.create_task(
+            self._fetch_range(position, min(position + chunk_size, end))
+        )
+        try:
+            while pending is not None:
+                data = await pending
+                if not data:
+                    raise EOFError(f"S3 trả về rỗng tại offset {position}")
+                position += len(data)
+                pending = (
+                    asyncio.create_task(self._fetch_range(position, min(position + chunk_size, end)))
+                    if position < end
+                    else None
+                )
+                for offset in range(0, len(data), self.block_size):
+                    yield data[offset:offset + self.block_size]
+        finally:
+            # Consumer đóng connection (ffmpeg seek) → bỏ chunk đang prefetch
+            if pending is not None:
+                pending.cancel()
+
+    # ── Block cache ───────────────────────────────────────────────────────────
+
+    async def _get_blocks(self, first: int, last: int) -> list[bytes]:
+        missing = [i for i in range(first, last + 1) if i not in self._blocks]
+        # Gộp các block thiếu liền nhau thành một ranged GET
+        run_start = None
+        for i, index in enumerate(missing):
+            if run_start is None:
+                run_start = index
+            if i + 1 == len(missing) or missing[i + 1] != index + 1:
+                await self._fetch_blocks(run_start, index)
+                run_start = None
+
+        blocks = []
+        for index in range(first, last + 1):
+            block = self._blocks.get(index)
+            if block is None:
+                # Range vượt quá dung lượng cache → block vừa fetch đã bị evict
+                await self._fetch_blocks(index, index)
+                block = self._blocks[index]
+            self._blocks.move_to_end(index)
+            blocks.append(block)
+        return blocks
+
+    async def _fetch_blocks(self, first: int, last: int) -> None:
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, await self.size())
+        data = await self._fetch_range(start, end)
+
+        for index in range(first, last + 1):
+            offset = (index - first) * self.block_size
+            self._blocks[index] = data[offset:offset + self.block_size]
+            self._blocks.move_to_end(index)
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+
+    async def _fetch_range(self, start: int, end: int) -> bytes:
+        """Một ranged GET cho [start, end)"""
+        s3 = await self.client_manager.get_client()
+        response = await s3.get_object(
+            Bucket=self.bucket_name,
+            Key=self.remote_path,
+            Range=f"bytes={start}-{end - 1}",
+        )
+        async with response["Body"] as stream:
+            data = await stream.read()
+        self.requests += 1
+        self.bytes_fetched += len(data)
+        return data
+
+
+class S3RangeProxy:
+    """
+    HTTP server local (127.0.0.1, port ngẫu nhiên) phục vụ một S3RangeReader
+    cho ffprobe/ffmpeg: HEAD + GET có Range → 206, mỗi request một connection.
+
+        async with S3RangeProxy(reader) as url:
+            info = await probe.probe(url)
+    """
+
+    # Giữ buffer gửi nhỏ: ffmpeg đóng connection khi seek, phần đã đẩy vào
+    # socket buffer mà chưa đọc là byte kéo từ S3 vô ích.
+    SEND_BUFFER_BYTES = 64 * 1024
+
+    def __init__(self, reader: S3RangeReader, host: str = "127.0.0.1") -> None:
+        self.reader = reader
+        self.host = host
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.url: Optional[str] = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+        port = self._server.sockets[0].getsockname()[1]
+        filename = self.reader.remote_path.rsplit("/", 1)[-1] or "object"
+        self.url = f"http://{self.host}:{port}/{filename}"
+        return self.url
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        logger.info(
+            "S3 range proxy closed",
+            key=self.reader.remote_path,
+            bytes_fetched=self.reader.bytes_fetched,
+            requests=self.reader.requests,
+        )
+
+    async def __aenter__(self) -> str:
+        return await self.start()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    # ── Private ───────────────────────────────────────────────────────────────
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.SEND_BUFFER_BYTES)
+        writer.transport.set_write_buffer_limits(high=self.reader.block_size)
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            method = request_line.split(" ", 1)[0].upper()
+            if method not in ("GET", "HEAD"):
+                await self._write_head(writer, 405, {"Allow": "GET, HEAD", "Content-Length": "0"})
+                return
+
+            size = await self.reader.size()
+            start, end = 0, size
+            status = 200
+            if "range" in headers:
+                parsed = self._parse_range(headers["range"], size)
+                if parsed is None:
+                    await self._write_head(writer, 416, {
+                        "Content-Range": f"bytes */{size}",
+                        "Content-Length": "0",
+                    })
+                    return
+                start, end = parsed
+                status = 206
+
+            response_headers = {
+                "Content-Type": self.reader.content_type,
+                "Content-Length": str(end - start),
+                "Accept-Ranges": "bytes",
+            }
+            if status == 206:
+                response_headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+            await self._write_head(writer, status, response_headers)
+
+            if method == "GET":
+                # aclosing: client đóng giữa chừng → huỷ prefetch ngay, không đợi GC
+                async with aclosing(self.reader.iter_range(start, end)) as chunks:
+                    async for chunk in chunks:
+                        writer.write(chunk)
+                        await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client seek → đóng connection giữa chừng, bình thường với ffmpeg
+        except Exception as exc:
+            logger.warning("S3 range proxy request failed", key=self.reader.remote_path, error=str(exc))
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _parse_range(value: str, size: int) -> Optional[tuple[int, int]]:
+        """'bytes=a-b' → [a, b+1); chỉ hỗ trợ một range (đủ cho ffmpeg)"""
+        match = _RANGE_HEADER.match(value.strip())
+        if not match or (not match.group(1) and not match.group(2)):
+            return None
+        first, last = match.group(1), match.group(2)
+        if not first:
+            # Suffix range: n byte cuối
+            start, end = max(size - int(last), 0), size
+        else:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+        if start >= size or start >= end:
+            return None
+        return start, end
+
+    @staticmethod
+    async def _write_head(writer: asyncio.StreamWriter, status: int, headers: dict[str, str]) -> None:
+        reasons = {200: "OK", 206: "Partial Content", 405: "Method Not Allowed", 416: "Range Not Satisfiable"}
+        lines = [f"HTTP/1.1 {status} {reasons[status]}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
@@ -0,0 +1,94 @@
+"""
+Shared S3 client
+Giữ một aioboto3 S3 client dùng chung cho toàn bộ vòng đời process thay vì
+mở client mới (TLS handshake, resolve endpoint, load credentials) cho mỗi call.
+"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Any, Optional
+
+import aioboto3
+import structlog
+from botocore.config import Config
+
+from src.shared.config.settings import settings
+
+logger = structlog.get_logger()
+
+
+class S3ClientManager:
+    """
+    Quản lý một S3 client long-lived với connection pool có giới hạn.
+    - FastAPI: start() lúc startup, close() lúc shutdown.
+    - Worker/script: get_client() tự khởi tạo lazily.
+    Client bị gắn với event loop tạo ra nó, nên nếu loop thay đổi
+    (vd. mỗi Celery task chạy asyncio.run riêng) client sẽ được tạo lại.
+    """
+
+    def __init__(self, max_pool_connections: Optional[int] = None) -> None:
+        self.max_pool_connections = max_pool_connections or settings.S3_MAX_POOL_CONNECTIONS
+        self._session = aioboto3.Session()
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _get_config(self) -> Config:
+        return Config(
+            signature_version="s3v4",
+            s3={"addressing_style": "virtual"},
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=True,
+        )
+
+    async def start(self) -> None:
+        """Mở client dùng chung (idempotent)"""
+        await self.get_client()
+
+    async def get_client(self) -> Any:
+        """Trả về client dùng chung, tạo mới nếu chưa có hoặc loop đã đổi"""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return self._client
+
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            # Client cũ thuộc loop đã chết, không thể close an toàn trên loop mới
+            self._client = None
+            self._exit_stack = None
+            self._loop = loop
+
+        async with self._lock:
+            if self._client is None:
+                exit_stack = AsyncExitStack()
+                self._client = await exit_stack.enter_async_context(
+                    self._session.client(
+                        "s3",
+                        region_name=settings.AWS_REGION,
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        endpoint_url=settings.S3_ENDPOINT_URL if settings.S3_ENDPOINT_URL else None,
+                        config=self._get_config(),
+                    )
+                )
+                self._exit_stack = exit_stack
+                logger.info(
+                    "S3 client pool opened",
+                    max_pool_connections=self.max_pool_connections,
+                )
+        return self._client
+
+    async def close(self) -> None:
+        """Đóng client và giải phóng connection pool"""
+        exit_stack, self._exit_stack = self._exit_stack, None
+        self._client = None
+        self._loop = None
+        self._lock = None
+        if exit_stack is not None:
+            await exit_stack.aclose()
+            logger.info("S3 client pool closed")
+
+
+# Instance dùng chung cho cả process
+s3_client_manager = S3ClientManager()
@@ -0,0 +1,176 @@
+"""
+Local S3 presigner
+Ký presigned URL (SigV4 query-string) thuần CPU — không mở client, không I/O,
+không chạm event loop. Signing key dẫn xuất (date/region/service) được cache
+nên mỗi URL chỉ tốn 1 SHA256 + 1 HMAC.
+"""
+
+import hashlib
+import hmac
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Iterable, Optional
+from urllib.parse import quote, urlsplit
+
+import botocore.session
+
+from src.shared.config.settings import settings
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+SERVICE = "s3"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+MAX_EXPIRATION = 7 * 24 * 3600  # Giới hạn của SigV4 presign
+
+_DNS_COMPATIBLE_BUCKET = re.compile(r"^[a-z0-9][a-z0-9\-]{1,61}[a-z0-9]$")
+
+
+@dataclass(frozen=True)
+class SigningCredentials:
+    access_key: str
+    secret_key: str
+    token: Optional[str] = None
+
+
+@lru_cache(maxsize=64)
+def derive_signing_key(secret_key: str, date_stamp: str, region: str, service: str) -> bytes:
+    """kSigning = HMAC chain(date → region → service → aws4_request), cache theo ngày"""
+    k_date = hmac.new(f"AWS4{secret_key}".encode(), date_stamp.encode(), hashlib.sha256).digest()
+    k_region = hmac.new(k_date, region.encode(), hashlib.sha256).digest()
+    k_service = hmac.new(k_region, service.encode(), hashlib.sha256).digest()
+    return hmac.new(k_service, b"aws4_request", hashlib.sha256).digest()
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+class S3Presigner:
+    """
+    Tạo presigned URL cho upload_part / get_object giống hệt botocore
+    (cùng host, canonical request và chữ ký) nhưng chạy đồng bộ trong vài µs.
+    """
+
+    def __init__(
+        self,
+        bucket_name: Optional[str] = None,
+        region: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        credentials: Optional[SigningCredentials] = None,
+    ) -> None:
+        self.bucket_name = bucket_name or settings.S3_BUCKET_NAME
+        self.region = region or settings.AWS_REGION
+        endpoint_url = endpoint_url if endpoint_url is not None else settings.S3_ENDPOINT_URL
+        self._static_credentials = credentials or self._credentials_from_settings()
+        self._botocore_credentials = None
+        self._scheme, self._host, self._base_path = self._resolve_endpoint(endpoint_url)
+
+    # ── Public ────────────────────────────────────────────────────────────────
+
+    def presign_upload_part(
+        self, remote_path: str, upload_id: str, part_number: int, expiration: int = 3600
+    ) -> str:
+        return self.presign(
+            "PUT", remote_path,
+            {"partNumber": str(part_number), "uploadId": upload_id},
+            expiration,
+        )
+
+    def presign_upload_parts(
+        self, remote_path: str, upload_id: str, part_numbers: Iterable[int], expiration: int = 3600
+    ) -> dict[int, str]:
+        """Ký nhiều part một lần: credential, timestamp và signing key chỉ tính 1 lần cho cả batch"""
+        context = self._signing_context(expiration)
+        return {
+            part_number: self._sign(
+                context, "PUT", remote_path,
+                {"partNumber": str(part_number), "uploadId": upload_id},
+            )
+            for part_number in part_numbers
+        }
+
+    def presign_get_object(
+        self, remote_path: str, expiration: int = 3600, filename: Optional[str] = None
+    ) -> str:
+        params = {}
+        if filename:
+            # Set response content disposition to suggest filename for download
+            params["response-content-disposition"] = f'attachment; filename="{filename}"'
+        return self.presign("GET", remote_path, params, expiration)
+
+    def presign(self, method: str, remote_path: str, params: dict[str, str], expiration: int = 3600) -> str:
+        return self._sign(self._signing_context(expiration), method, remote_path, params)
+
+    # ── Private ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _credentials_from_settings() -> Optional[SigningCredentials]:
+        if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
+            return SigningCredentials(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
+        return None
+
+    def _get_credentials(self) -> SigningCredentials:
+        if self._static_credentials:
+            return self._static_credentials
+        # Không có key tĩnh (vd. IAM role trên ECS) → dùng credential chain của botocore.
+        # Refreshable credentials chỉ gọi mạng khi sắp hết hạn.
+        if self._botocore_credentials is None:
+            self._botocore_credentials = botocore.session.get_session().get_credentials()
+            if self._botocore_credentials is None:
+                raise RuntimeError("Không tìm thấy AWS credentials để ký presigned URL")
+        frozen = self._botocore_credentials.get_frozen_credentials()
+        return SigningCredentials(frozen.access_key, frozen.secret_key, frozen.token)
+
+    def _resolve_endpoint(self, endpoint_url: Optional[str]) -> tuple[str, str, str]:
+        virtual = bool(_DNS_COMPATIBLE_BUCKET.match(self.bucket_name))
+        if endpoint_url:
+            parts = urlsplit(endpoint_url)
+            scheme, host, base_path = parts.scheme, parts.netloc, parts.path.rstrip("/")
+        else:
+            scheme = "https"
+            host = "s3.amazonaws.com" if self.region == "us-east-1" else f"s3.{self.region}.amazonaws.com"
+            base_path = ""
+        if virtual:
+            return scheme, f"{self.bucket_name}.{host}", base_path
+        return scheme, host, f"{base_path}/{self.bucket_name}"
+
+    def _signing_context(self, expiration: int) -> dict:
+        if not 1 <= expiration <= MAX_EXPIRATION:
+            raise ValueError(f"expiration phải nằm trong [1, {MAX_EXPIRATION}] giây")
+        credentials = self._get_credentials()
+        now = datetime.now(timezone.utc)
+        date_stamp = now.strftime("%Y%m%d")
+        scope = f"{date_stamp}/{self.region}/{SERVICE}/aws4_request"
+        auth_params = {
+            "X-Amz-Algorithm": ALGORITHM,
+            "X-Amz-Credential": f"{credentials.access_key}/{scope}",
+            "X-Amz-Date": now.strftime("%Y%m%dT%H%M%SZ"),
+            "X-Amz-Expires": str(expiration),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if credentials.token:
+            auth_params["X-Amz-Security-Token"] = credentials.token
+        return {
+            "auth_params": auth_params,
+            "scope": scope,
+            "amz_date": auth_params["X-Amz-Date"],
+            "signing_key": derive_signing_key(credentials.secret_key, date_stamp, self.region, SERVICE),
+        }
+
+    def _sign(self, context: dict, method: str, remote_path: str, params: dict[str, str]) -> str:
+        path = _uri_encode(f"{self._base_path}/{remote_path}", safe="/~")
+        query_items = [(_uri_encode(k), _uri_encode(v)) for k, v in {**params, **context["auth_params"]}.items()]
+        canonical_query = "&".join(f"{k}={v}" for k, v in sorted(query_items))
+        canonical_request = "\n".join([
+            method, path, canonical_query, f"host:{self._host}", "", "host", UNSIGNED_PAYLOAD,
+        ])
+        string_to_sign = "\n".join([
+            ALGORITHM,
+            context["amz_date"],
+            context["scope"],
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+        signature = hmac.new(context["signing_key"], string_to_sign.encode(), hashlib.sha256).hexdigest()
+        query = "&".join(f"{k}={v}" for k, v in query_items)
+        return f"{self._scheme}://{self._host}{path}?{query}&X-Amz-Signature={signature}"
@@ -0,0 +1,183 @@
+"""
+S3 transfer tuning
+TransferConfig (part size, concurrency) cho upload/download nhiều part song song,
+giới hạn băng thông và progress callback báo bytes/giây.
+
+Lưu ý về aioboto3 (managed transfer):
+- Bỏ qua TransferConfig.max_bandwidth → giới hạn băng thông bằng cách bọc file
+  object (ThrottledFile) để mỗi lần read/write phải xin token từ BandwidthLimiter.
+- Callback của download_fileobj nhận tổng số byte đã tải (cộng dồn), còn
+  upload_fileobj nhận số byte của từng part → TransferProgress chuẩn hoá cả hai.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import structlog
+from boto3.s3.transfer import TransferConfig
+
+from src.shared.config.settings import settings
+
+logger = structlog.get_logger()
+
+
+def build_transfer_config(
+    multipart_threshold: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> TransferConfig:
+    return TransferConfig(
+        multipart_threshold=multipart_threshold or settings.S3_TRANSFER_MULTIPART_THRESHOLD,
+        multipart_chunksize=chunk_size or settings.S3_TRANSFER_CHUNK_SIZE,
+        max_concurrency=max_concurrency or settings.S3_TRANSFER_MAX_CONCURRENCY,
+        max_bandwidth=settings.S3_TRANSFER_MAX_BANDWIDTH,
+    )
+
+
+# ── Bandwidth cap ─────────────────────────────────────────────────────────────
+
+class BandwidthLimiter:
+    """Token bucket (bytes/giây) dùng chung cho mọi part của một transfer"""
+
+    def __init__(self, bytes_per_second: int, burst: Optional[int] = None) -> None:
+        if bytes_per_second <= 0:
+            raise ValueError("bytes_per_second phải > 0")
+        self.rate = bytes_per_second
+        self.capacity = burst or bytes_per_second
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: int) -> None:
+        async with self._lock:
+            # Chunk lớn hơn burst vẫn được đi qua, chỉ là chờ lâu hơn (token âm)
+            self._refill()
+            self._tokens -= amount
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.rate)
+                self._refill()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class ThrottledFile:
+    """Bọc file object (sync hoặc aiofiles) — read/write đi qua BandwidthLimiter"""
+
+    def __init__(self, fileobj: Any, limiter: BandwidthLimiter) -> None:
+        self._fileobj = fileobj
+        self._limiter = limiter
+
+    async def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        if asyncio.iscoroutine(data):
+            data = await data
+        await self._limiter.acquire(len(data))
+        return data
+
+    async def write(self, data: bytes) -> int:
+        await self._limiter.acquire(len(data))
+        written = self._fileobj.write(data)
+        if asyncio.iscoroutine(written):
+            written = await written
+        return written
+
+    async def seek(self, offset: int, whence: int = 0) -> int:
+        position = self._fileobj.seek(offset, whence)
+        if asyncio.iscoroutine(position):
+            position = await position
+        return position
+
+
+# ── Progress ──────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class TransferStats:
+    operation: str
+    key: str
+    bytes_transferred: int
+    total_bytes: Optional[int]
+    elapsed_sec: float
+    bytes_per_second: float
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.total_bytes:
+            return None
+        return round(100.0 * self.bytes_transferred / self.total_bytes, 1)
+
+
+class TransferProgress:
+    """
+    Callback truyền vào Callback= của aioboto3.
+    cumulative=True khi caller báo tổng byte (download), False khi báo từng phần (upload).
+    Log tiến độ theo chu kỳ và gọi on_progress (nếu có) mỗi lần cập nhật.
+    """
+
+    def __init__(
+        self,
+        operation: str,
+        key: str,
+        total_bytes: Optional[int] = None,
+        cumulative: bool = False,
+        on_progress: Optional[Callable[[TransferStats], None]] = None,
+        log_interval: Optional[float] = None,
+    ) -> None:
+        self.operation = operation
+        self.key = key
+        self.total_bytes = total_bytes
+        self.cumulative = cumulative
+        self.on_progress = on_progress
+        self.log_interval = (
+            log_interval if log_interval is not None else settings.S3_TRANSFER_PROGRESS_LOG_INTERVAL_SECONDS
+        )
+        self.bytes_transferred = 0
+        self._started = time.monotonic()
+        self._last_log = self._started
+
+    def __call__(self, amount: int) -> None:
+        if self.cumulative:
+            self.bytes_transferred = max(self.bytes_transferred, amount)
+        else:
+            self.bytes_transferred += amount
+
+        stats = self.stats()
+        if self.on_progress:
+            self.on_progress(stats)
+        now = time.monotonic()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self._log("S3 transfer progress", stats)
+
+    def stats(self) -> TransferStats:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return TransferStats(
+            operation=self.operation,
+            key=self.key,
+            bytes_transferred=self.bytes_transferred,
+            total_bytes=self.total_bytes,
+            elapsed_sec=elapsed,
+            bytes_per_second=self.bytes_transferred / elapsed,
+        )
+
+    def finish(self) -> TransferStats:
+        stats = self.stats()
+        self._log("S3 transfer finished", stats)
+        return stats
+
+    @staticmethod
+    def _log(event: str, stats: TransferStats) -> None:
+        logger.info(
+            event,
+            operation=stats.operation,
+            key=stats.key,
+            bytes=stats.bytes_transferred,
+            total_bytes=stats.total_bytes,
+            percent=stats.percent,
+            mb_per_sec=round(stats.bytes_per_second / (1024 * 1024), 2),
+            elapsed_sec=round(stats.elapsed_sec, 2),
+        )
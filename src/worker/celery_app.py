@@ -15,6 +15,16 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     worker_concurrency=2, # As per architecture.md
+    beat_schedule={
+        "reap-abandoned-uploads": {
+            "task": "reap_abandoned_uploads_task",
+            "schedule": settings.UPLOAD_REAPER_INTERVAL_SECONDS,
+        },
+        "poll-keyword-batches": {
+            "task": "poll_keyword_batches_task",
+            "schedule": settings.GEMINI_BATCH_POLL_INTERVAL_SECONDS,
+        },
+    },
 )
 
 if __name__ == "__main__":
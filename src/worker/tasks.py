@@ -1,15 +1,196 @@
+import asyncio
+from datetime import timedelta
 from src.worker.celery_app import celery_app
-import time
+from src.shared.config.settings import settings
 import structlog
 
 logger = structlog.get_logger()
 
+
+def _run_async(coro):
+    """
+    Chạy coroutine trong Celery task (sync).
+    Mỗi lần asyncio.run là một event loop mới, nên phải trả connection DB / S3 /
+    Gemini client về trước khi loop đóng.
+    """
+    from src.shared.database.session import engine
+    from src.shared.storage.s3_client import s3_client_manager
+    from src.modules.video_processing.infrastructure.adapters.gemini_key_pool import close_key_pools
+
+    async def _runner():
+        try:
+            return await coro
+        finally:
+            await s3_client_manager.close()
+            await close_key_pools()
+            await engine.dispose()
+
+    return asyncio.run(_runner())
+
+
+def _build_keyword_extractor(redis):
+    """Gemini extractor bọc cache; None nếu chưa cấu hình API key"""
+    from src.modules.video_processing.infrastructure.adapters.cached_keyword_extractor import CachedKeywordExtractor
+    from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import GeminiKeywordExtractor
+
+    try:
+        extractor = GeminiKeywordExtractor()
+    except ValueError:
+        return None
+    return CachedKeywordExtractor(extractor, redis=redis, bypass=not settings.KEYWORD_CACHE_ENABLED)
+
+
 @celery_app.task(name="process_video_task")
 def process_video_task(job_id: str):
+    from uuid import UUID
+    from src.shared.database.session import async_session_maker
+    from src.modules.video_processing.application.handlers import ProcessVideoJobUseCase
+    from src.modules.video_processing.infrastructure.repositories import PostgresVideoRepository
+    from src.modules.video_processing.infrastructure.adapters.video_editor_adapter import AutoEditorAdapter
+    from src.modules.video_processing.infrastructure.storage.s3_storage import S3StorageService
+    from src.modules.video_processing.infrastructure.adapters.cached_keyword_extractor import cache_stats
+    from redis.asyncio import Redis
+
     logger.info("Starting video processing task", job_id=job_id)
-    
-    # Simulate work
-    time.sleep(5)
-    
-    logger.info("Video processing task completed", job_id=job_id)
-    return {"status": "completed", "job_id": job_id}
+
+    async def _process():
+        redis = Redis.from_url(settings.REDIS_URL)
+        try:
+            async with async_session_maker() as session:
+                use_case = ProcessVideoJobUseCase(
+                    video_repo=PostgresVideoRepository(session),
+                    keyword_extractor=_build_keyword_extractor(redis),
+                    video_editor=AutoEditorAdapter(),
+                    storage=S3StorageService(),
+                )
+                return await use_case.execute(UUID(job_id))
+        finally:
+            await cache_stats.flush(redis)
+            await redis.aclose()
+
+    job = _run_async(_process())
+    status = job.status.value if job else "not_found"
+    logger.info("Video processing task completed", job_id=job_id, status=status)
+    return {"status": status, "job_id": job_id}
+
+
+@celery_app.task(name="reap_abandoned_uploads_task")
+def reap_abandoned_uploads_task():
+    """Celery beat: abort multipart upload bị bỏ dở và đánh dấu video 'abandoned'"""
+    from src.shared.database.session import async_session_maker
+    from src.modules.video_upload.application.handlers import ReapAbandonedUploadsUseCase
+    from src.modules.video_upload.infrastructure.repositories import VideoRepository
+    from src.modules.video_upload.infrastructure.adapters.s3_multipart import S3MultipartStorageAdapter
+
+    async def _reap():
+        async with async_session_maker() as session:
+            use_case = ReapAbandonedUploadsUseCase(
+                video_repo=VideoRepository(session),
+                storage=S3MultipartStorageAdapter(),
+                ttl=timedelta(hours=settings.UPLOAD_ABANDON_TTL_HOURS),
+                concurrency=settings.UPLOAD_REAPER_CONCURRENCY,
+                batch_size=settings.UPLOAD_REAPER_BATCH_SIZE,
+            )
+            return await use_case.execute()
+
+    result = _run_async(_reap())
+    return result.model_dump()
+
+
+@celery_app.task(name="probe_video_metadata_task")
+def probe_video_metadata_task(video_id: str):
+    """Sau /uploads/complete: ffprobe qua range request để điền metadata + thumbnail"""
+    from uuid import UUID
+    from src.shared.database.session import async_session_maker
+    from src.modules.video_upload.application.handlers import ProbeVideoMetadataUseCase
+    from src.modules.video_upload.infrastructure.repositories import VideoRepository
+    from src.modules.video_upload.infrastructure.adapters.s3_multipart import S3MultipartStorageAdapter
+    from src.modules.video_upload.infrastructure.adapters.ffprobe_probe import FFprobeMediaProbeAdapter
+
+    async def _probe():
+        async with async_session_maker() as session:
+            use_case = ProbeVideoMetadataUseCase(
+                video_repo=VideoRepository(session),
+                storage=S3MultipartStorageAdapter(),
+                probe=FFprobeMediaProbeAdapter(),
+            )
+            return await use_case.execute(UUID(video_id))
+
+    info = _run_async(_probe())
+    return info.model_dump() if info else None
+
+
+def _keyword_batch_repositories():
+    """Factory cho use case batch keyword: mỗi lần mở một session ngắn, commit một lần khi thoát"""
+    from contextlib import asynccontextmanager
+    from src.shared.database.session import async_session_maker
+    from src.shared.database.unit_of_work import unit_of_work
+    from src.modules.video_processing.infrastructure.repositories import (
+        PostgresKeywordBatchRepository,
+        PostgresVideoRepository,
+    )
+
+    @asynccontextmanager
+    async def _open():
+        async with async_session_maker() as session:
+            async with unit_of_work(session):
+                yield PostgresVideoRepository(session), PostgresKeywordBatchRepository(session)
+
+    return _open
+
+
+@celery_app.task(name="batch_extract_keywords_task")
+def batch_extract_keywords_task(user_id: int | None = None, limit: int | None = None):
+    """
+    Back-catalogue: claim job đã xong mà chưa có overlay và submit một Gemini batch.
+    Kết quả do poll_keyword_batches_task ghi vào job khi batch xong.
+    """
+    from src.modules.video_processing.application.handlers import SubmitKeywordBatchUseCase
+    from src.modules.video_processing.infrastructure.adapters.gemini_batch_extractor import GeminiBatchKeywordExtractor
+
+    async def _submit():
+        extractor = GeminiBatchKeywordExtractor()
+        try:
+            use_case = SubmitKeywordBatchUseCase(
+                repositories=_keyword_batch_repositories(),
+                batch_extractor=extractor,
+                max_attempts=settings.GEMINI_BATCH_MAX_ATTEMPTS,
+            )
+            return await use_case.execute(
+                user_id=user_id,
+                limit=limit or settings.GEMINI_BATCH_MAX_JOBS,
+            )
+        finally:
+            await extractor.aclose()
+
+    batch = _run_async(_submit())
+    if batch is None:
+        return {"batch": None, "job_ids": []}
+    return {"batch": batch.name, "job_ids": [str(job_id) for job_id in batch.job_ids]}
+
+
+@celery_app.task(name="poll_keyword_batches_task")
+def poll_keyword_batches_task():
+    """Celery beat: poll các Gemini batch đang mở, ghi overlays của batch đã xong"""
+    from src.modules.video_processing.application.handlers import ApplyKeywordBatchesUseCase
+    from src.modules.video_processing.infrastructure.adapters.gemini_batch_extractor import GeminiBatchKeywordExtractor
+
+    async def _poll():
+        try:
+            extractor = GeminiBatchKeywordExtractor()
+        except ValueError:
+            # Chưa cấu hình GEMINI_API_KEYS → không có batch nào để poll
+            return []
+        try:
+            use_case = ApplyKeywordBatchesUseCase(
+                repositories=_keyword_batch_repositories(),
+                batch_extractor=extractor,
+                timeout=timedelta(seconds=settings.GEMINI_BATCH_TIMEOUT_SECONDS),
+            )
+            return await use_case.execute()
+        finally:
+            await extractor.aclose()
+
+    jobs = _run_async(_poll())
+    logger.info("Keyword batch poll completed", updated=len(jobs))
+    return {"updated": len(jobs), "job_ids": [str(job.id) for job in jobs]}
@@ -0,0 +1,185 @@
+"""
+Stub server cho Gemini Batch API (chỉ các endpoint GeminiBatchClient dùng), chạy trong thread nền:
+  POST /upload/v1beta/files                            resumable upload (start → upload, finalize)
+  POST /v1beta/models/{model}:batchGenerateContent     tạo batch từ file JSONL đã upload
+  GET  /v1beta/batches/{id}                            PENDING → RUNNING → <final_state> theo số lần poll
+  POST /v1beta/batches/{id}:cancel
+  GET  /download/v1beta/files/{id}:download?alt=media  tải file kết quả
+Kết quả từng request do `responder(key, request) -> record` quyết định.
+"""
+
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+Responder = Callable[[str, dict[str, Any]], dict[str, Any]]
+
+
+def text_response(text: str) -> dict[str, Any]:
+    return {"response": {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}}
+
+
+def error_response(code: int = 500, message: str = "internal error") -> dict[str, Any]:
+    return {"error": {"code": code, "message": message}}
+
+
+class GeminiBatchStub:
+    def __init__(
+        self,
+        api_key: str = "stub-key",
+        responder: Optional[Responder] = None,
+        polls_until_done: int = 2,
+        final_state: str = "BATCH_STATE_SUCCEEDED",
+    ) -> None:
+        self.api_key = api_key
+        self.responder = responder or (lambda key, request: text_response("[]"))
+        self.polls_until_done = polls_until_done
+        self.final_state = final_state
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self.requests: list[dict[str, Any]] = []  # các dòng JSONL của batch gần nhất
+        self._uploads: dict[str, dict[str, Any]] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "GeminiBatchStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    # ── Handlers ──────────────────────────────────────────────────────────────
+
+    def _start_upload(self, headers: Any, body: dict[str, Any]) -> tuple[int, dict[str, Any], dict[str, str]]:
+        upload_id = uuid.uuid4().hex
+        self._uploads[upload_id] = {"display_name": (body.get("file") or {}).get("display_name")}
+        url = f"{self.base_url}/upload/v1beta/files?upload_id={upload_id}"
+        return 200, {}, {"X-Goog-Upload-URL": url, "X-Goog-Upload-Status": "active"}
+
+    def _finish_upload(self, upload_id: str, data: bytes) -> tuple[int, dict[str, Any]]:
+        if self._uploads.pop(upload_id, None) is None:
+            return 404, {"error": {"code": 404, "message": "unknown upload"}}
+        name = f"files/{uuid.uuid4().hex[:12]}"
+        self.files[name] = data
+        return 200, {"file": {"name": name, "sizeBytes": str(len(data)), "mimeType": "application/jsonl"}}
+
+    def _create_batch(self, model: str, body: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        file_name = body["batch"]["input_config"]["file_name"]
+        if file_name not in self.files:
+            return 400, {"error": {"code": 400, "message": f"file {file_name} not found"}}
+        name = f"batches/{uuid.uuid4().hex[:12]}"
+        self.batches[name] = {"model": model, "file": file_name, "polls": 0, "state": "BATCH_STATE_PENDING"}
+        return 200, {"name": name, "metadata": {"state": "BATCH_STATE_PENDING"}}
+
+    def _get_batch(self, name: str) -> tuple[int, dict[str, Any]]:
+        batch = self.batches.get(name)
+        if batch is None:
+            return 404, {"error": {"code": 404, "message": "batch not found"}}
+        batch["polls"] += 1
+        if batch["state"] in ("BATCH_STATE_PENDING", "BATCH_STATE_RUNNING"):
+            if batch["polls"] < self.polls_until_done:
+                batch["state"] = "BATCH_STATE_RUNNING"
+            else:
+                batch["state"] = self.final_state
+                if self.final_state == "BATCH_STATE_SUCCEEDED":
+                    batch["output"] = self._run(name, batch["file"])
+
+        operation: dict[str, Any] = {"name": name, "metadata": {"state": batch["state"]}}
+        if "output" in batch:
+            operation["done"] = True
+            operation["metadata"]["output"] = {"responsesFile": batch["output"]}
+            operation["response"] = {"responsesFile": batch["output"]}
+        return 200, operation
+
+    def _cancel_batch(self, name: str) -> tuple[int, dict[str, Any]]:
+        batch = self.batches.get(name)
+        if batch is None:
+            return 404, {"error": {"code": 404, "message": "batch not found"}}
+        batch["state"] = "BATCH_STATE_CANCELLED"
+        return 200, {}
+
+    def _run(self, batch_name: str, file_name: str) -> str:
+        self.requests = [json.loads(line) for line in self.files[file_name].decode("utf-8").splitlines() if line]
+        lines = [
+            json.dumps({"key": line["key"], **self.responder(line["key"], line["request"])})
+            for line in self.requests
+        ]
+        output = f"files/{batch_name.split('/')[-1]}-output"
+        self.files[output] = ("\n".join(lines) + "\n").encode("utf-8")
+        return output
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _reply(self, status: int, payload: Any, headers: Optional[dict[str, str]] = None) -> None:
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if isinstance(payload, bytes) else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _authorized(self) -> bool:
+                if self.headers.get("x-goog-api-key") == stub.api_key:
+                    return True
+                self._reply(403, {"error": {"code": 403, "message": "API key not valid"}})
+                return False
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def do_POST(self) -> None:
+                if not self._authorized():
+                    return
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                body = self._body()
+                if url.path == "/upload/v1beta/files":
+                    command = self.headers.get("X-Goog-Upload-Command", "")
+                    if command == "start":
+                        self._reply(*stub._start_upload(self.headers, json.loads(body or b"{}")))
+                    elif "finalize" in command and "upload_id" in query:
+                        self._reply(*stub._finish_upload(query["upload_id"][0], body))
+                    else:
+                        self._reply(400, {"error": {"code": 400, "message": f"bad upload command {command!r}"}})
+                elif url.path.startswith("/v1beta/models/") and url.path.endswith(":batchGenerateContent"):
+                    model = url.path[len("/v1beta/models/"):-len(":batchGenerateContent")]
+                    self._reply(*stub._create_batch(model, json.loads(body)))
+                elif url.path.startswith("/v1beta/batches/") and url.path.endswith(":cancel"):
+                    self._reply(*stub._cancel_batch(url.path[len("/v1beta/"):-len(":cancel")]))
+                else:
+                    self._reply(404, {"error": {"code": 404, "message": "not found"}})
+
+            def do_GET(self) -> None:
+                if not self._authorized():
+                    return
+                url = urlparse(self.path)
+                if url.path.startswith("/v1beta/batches/"):
+                    self._reply(*stub._get_batch(url.path[len("/v1beta/"):]))
+                elif url.path.startswith("/download/v1beta/") and url.path.endswith(":download"):
+                    name = url.path[len("/download/v1beta/"):-len(":download")]
+                    if name in stub.files:
+                        self._reply(200, stub.files[name])
+                    else:
+                        self._reply(404, {"error": {"code": 404, "message": "file not found"}})
+                else:
+                    self._reply(404, {"error": {"code": 404, "message": "not found"}})
+
+        return Handler
@@ -0,0 +1,66 @@
+"""
+Unit tests cho cấu hình engine (pool, pgbouncer) và metrics của connection pool
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.util import greenlet_spawn
+
+from src.shared.config.settings import Settings
+from src.shared.database.pool import InstrumentedAsyncPool
+from src.shared.database.session import build_engine_kwargs
+from src.shared.monitoring.metrics import collect_pool_metrics, render_prometheus
+
+
+def test_engine_kwargs_apply_pool_settings_and_server_statement_timeout():
+    kwargs = build_engine_kwargs(Settings(DB_POOL_SIZE=3, DB_MAX_OVERFLOW=2, DB_STATEMENT_TIMEOUT_MS=5000))
+
+    assert kwargs["echo"] is False
+    assert kwargs["poolclass"] is InstrumentedAsyncPool
+    assert (kwargs["pool_size"], kwargs["max_overflow"]) == (3, 2)
+    assert kwargs["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+
+def test_pgbouncer_mode_disables_prepared_statement_caches():
+    connect_args = build_engine_kwargs(Settings(DB_PGBOUNCER=True, DB_STATEMENT_TIMEOUT_MS=5000))["connect_args"]
+
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
+    assert connect_args["command_timeout"] == 5.0
+    assert "server_settings" not in connect_args
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_checkouts_and_timeouts():
+    pool = InstrumentedAsyncPool(lambda: MagicMock(), pool_size=1, max_overflow=0, timeout=0.05)
+
+    conn = await greenlet_spawn(pool.connect)
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+    conn.close()
+    conn = await greenlet_spawn(pool.connect)
+    conn.close()
+
+    assert pool.wait_stats.count == 2
+    assert pool.wait_stats.timeouts == 1
+    assert pool.recreate().wait_stats is pool.wait_stats
+
+
+def test_metrics_render_prometheus_text():
+    engine = create_async_engine(
+        "postgresql+asyncpg://u:p@127.0.0.1:1/db", **build_engine_kwargs(Settings(DB_POOL_SIZE=4))
+    )
+
+    text = render_prometheus(collect_pool_metrics(engine) + collect_pool_metrics(engine, name="replica"))
+
+    assert (
+        "# TYPE db_pool_checked_out gauge\n"
+        'db_pool_checked_out{engine="primary"} 0\n'
+        'db_pool_checked_out{engine="replica"} 0\n'
+    ) in text
+    assert 'db_pool_size{engine="primary"} 4\n' in text
+    assert text.count("# TYPE db_pool_checkouts_total counter") == 1
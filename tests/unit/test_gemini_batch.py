@@ -0,0 +1,466 @@
+"""
+Unit tests cho Gemini Batch API mode: REST client + adapter (submit / poll / collect) chạy với stub
+server local, use case submit + apply theo phiên ngắn
+"""
+
+import json
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.modules.video_processing.application.handlers import ApplyKeywordBatchesUseCase, SubmitKeywordBatchUseCase
+from src.modules.video_processing.domain.entities import KeywordBatch, VideoJob
+from src.modules.video_processing.domain.value_objects import (
+    JobStatus,
+    KeywordBatchState,
+    TextOverlay,
+    TextOverlayMode,
+    Transcript,
+    WordTimings,
+)
+from src.modules.video_processing.infrastructure.adapters.gemini_batch_extractor import (
+    GeminiBatchClient,
+    GeminiBatchError,
+    GeminiBatchKeywordExtractor,
+)
+from src.modules.video_processing.infrastructure.adapters.gemini_key_pool import GeminiKeyPool
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import GeminiKeywordExtractor
+from tests.stubs.gemini_batch_server import GeminiBatchStub, error_response, text_response
+
+_WINDOW_RE = re.compile(r"covering ([\d.]+)s to ([\d.]+)s")
+
+
+def _transcript(seconds: float) -> Transcript:
+    n = int(seconds * 2)
+    words = WordTimings(
+        [f"w{i}" for i in range(n)],
+        [i * 0.5 for i in range(n)],
+        [i * 0.5 + 0.4 for i in range(n)],
+        [0.9] * n,
+    )
+    return Transcript(full_text=" ".join(f"w{i}" for i in range(n)), words=words)
+
+
+def _callouts(key: str, request: dict) -> dict:
+    """Một callout mỗi 20s trong phần transcript của request"""
+    prompt = request["contents"][0]["parts"][0]["text"]
+    match = _WINDOW_RE.search(prompt)
+    start, end = (float(match.group(1)), float(match.group(2))) if match else (0.0, 60.0)
+    items, t = [], float(int(start) // 20 * 20 + 20)
+    while t + 5 < end:
+        items.append({"text": f"at {t:.0f}", "start": t, "end": t + 5.0, "mode": "BOTTOM_TITLE", "position": "bottom_center"})
+        t += 20
+    return text_response(json.dumps(items))
+
+
+def _batch_extractor(stub: GeminiBatchStub, window_seconds: float = 0) -> GeminiBatchKeywordExtractor:
+    extractor = GeminiKeywordExtractor(
+        api_keys=[stub.api_key],
+        key_pool=GeminiKeyPool([stub.api_key], requests_per_minute=6000, burst=10),
+        window_seconds=window_seconds,
+    )
+    return GeminiBatchKeywordExtractor(
+        client=GeminiBatchClient(stub.api_key, base_url=stub.base_url),
+        extractor=extractor,
+    )
+
+
+async def _submit_and_collect(batch: GeminiBatchKeywordExtractor, transcripts: dict) -> dict:
+    """submit → poll tới khi xong → collect, requests đi qua JSON như khi lưu vào DB"""
+    name, requests = await batch.submit(transcripts)
+    while (state := await batch.poll(name)) == KeywordBatchState.RUNNING:
+        pass
+    assert state == KeywordBatchState.SUCCEEDED
+    return await batch.collect(name, json.loads(json.dumps(requests)), transcripts)
+
+
+# ── Adapter + stub server ─────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_submit_poll_collect_fans_results_back():
+    with GeminiBatchStub(responder=_callouts, polls_until_done=3) as stub:
+        batch = _batch_extractor(stub)
+        try:
+            results = await _submit_and_collect(batch, {"job-a": _transcript(60), "job-b": _transcript(45)})
+        finally:
+            await batch.aclose()
+
+    assert len(stub.batches) == 1
+    assert next(iter(stub.batches.values()))["polls"] == 4  # 3 lần poll + 1 lần collect
+    assert sorted(r["key"] for r in stub.requests) == ["job-a#1", "job-b#1"]
+    request = stub.requests[0]["request"]
+    assert request["generation_config"]["response_mime_type"] == "application/json"
+    assert "$ref" not in json.dumps(request["generation_config"]["response_json_schema"])
+    assert request["system_instruction"]["parts"][0]["text"]
+
+    assert [o.start for o in results["job-a"]] == [20.0, 40.0]
+    assert [o.start for o in results["job-b"]] == [20.0, 40.0]
+    assert all(isinstance(o, TextOverlay) and o.mode == TextOverlayMode.BOTTOM_TITLE for o in results["job-a"])
+
+
+@pytest.mark.asyncio
+async def test_long_transcript_is_split_into_window_requests_and_merged():
+    with GeminiBatchStub(responder=_callouts) as stub:
+        batch = _batch_extractor(stub, window_seconds=600)
+        try:
+            results = await _submit_and_collect(batch, {"long": _transcript(1500)})
+        finally:
+            await batch.aclose()
+
+    assert [r["key"] for r in stub.requests] == ["long#1", "long#2", "long#3"]
+    starts = [o.start for o in results["long"]]
+    assert starts == sorted(starts)
+    assert len(starts) == len(set(starts))  # vùng chồng không sinh overlay trùng
+
+
+@pytest.mark.asyncio
+async def test_failed_request_leaves_job_out_of_results():
+    def responder(key, request):
+        return error_response() if key.startswith("bad") else _callouts(key, request)
+
+    with GeminiBatchStub(responder=responder) as stub:
+        batch = _batch_extractor(stub)
+        try:
+            results = await _submit_and_collect(batch, {"good": _transcript(60), "bad": _transcript(60)})
+        finally:
+            await batch.aclose()
+
+    assert set(results) == {"good"}
+
+
+@pytest.mark.asyncio
+async def test_truncated_response_leaves_job_out_of_results():
+    def responder(key, request):
+        return text_response('[{"text": "Kept", "start": 20.0, "end": 25.0, "mode": "BOTTOM_TITLE", '
+                             '"position": "bottom_center"}, {"text": "Cut", "sta')
+
+    with GeminiBatchStub(responder=responder) as stub:
+        batch = _batch_extractor(stub)
+        try:
+            results = await _submit_and_collect(batch, {"job": _transcript(60)})
+        finally:
+            await batch.aclose()
+
+    # Không ghi bản thiếu vào job; job được submit lại ở batch sau
+    assert results == {}
+
+
+@pytest.mark.asyncio
+async def test_job_with_a_failed_window_is_left_out_of_results():
+    def responder(key, request):
+        return error_response() if key == "long#2" else _callouts(key, request)
+
+    with GeminiBatchStub(responder=responder) as stub:
+        batch = _batch_extractor(stub, window_seconds=600)
+        try:
+            results = await _submit_and_collect(batch, {"long": _transcript(1500), "short": _transcript(60)})
+        finally:
+            await batch.aclose()
+
+    assert set(results) == {"short"}
+
+
+def test_malformed_result_line_is_skipped():
+    good = {"key": "good#1", **_callouts("good#1", {"contents": [{"parts": [{"text": ""}]}]})}
+    raw = (json.dumps(good) + "\n" + '{"key": "bad#1", "respon' + "\n").encode("utf-8")
+    with GeminiBatchStub() as stub:
+        batch = _batch_extractor(stub)
+    transcripts = {"good": _transcript(60), "bad": _transcript(60)}
+
+    results = batch._collect(raw, {"good#1": ("good", None), "bad#1": ("bad", None)}, transcripts)
+
+    assert set(results) == {"good"}
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_polls_as_failed_and_cannot_be_collected():
+    with GeminiBatchStub(final_state="BATCH_STATE_FAILED", polls_until_done=1) as stub:
+        batch = _batch_extractor(stub)
+        try:
+            name, requests = await batch.submit({"job": _transcript(60)})
+            assert await batch.poll(name) == KeywordBatchState.FAILED
+            with pytest.raises(GeminiBatchError, match="BATCH_STATE_FAILED"):
+                await batch.collect(name, requests, {"job": _transcript(60)})
+        finally:
+            await batch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_running_batch():
+    with GeminiBatchStub(polls_until_done=100) as stub:
+        batch = _batch_extractor(stub)
+        try:
+            name, _ = await batch.submit({"job": _transcript(60)})
+            assert await batch.poll(name) == KeywordBatchState.RUNNING
+            await batch.cancel(name)
+            assert await batch.poll(name) == KeywordBatchState.FAILED
+        finally:
+            await batch.aclose()
+
+    assert stub.batches[name]["state"] == "BATCH_STATE_CANCELLED"
+
+
+@pytest.mark.asyncio
+async def test_wrong_api_key_is_rejected():
+    with GeminiBatchStub(api_key="right") as stub:
+        client = GeminiBatchClient("wrong", base_url=stub.base_url)
+        try:
+            with pytest.raises(GeminiBatchError, match="403"):
+                await client.upload_file(b"{}\n", "x")
+        finally:
+            await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_empty_transcripts_skip_the_api():
+    with GeminiBatchStub() as stub:
+        batch = _batch_extractor(stub)
+        try:
+            assert await batch.submit({"empty": Transcript(full_text="  ", words=[])}) is None
+        finally:
+            await batch.aclose()
+
+    assert stub.files == {}
+
+
+# ── Use case ──────────────────────────────────────────────────────────────────
+
+T0 = datetime(2026, 1, 1)
+
+
+class _Store:
+    """"DB" dùng chung cho các phiên; session_open để kiểm tra không gọi batch API khi đang mở phiên"""
+
+    def __init__(self, jobs):
+        self.jobs = {job.id: job for job in jobs}
+        self.batches = {}
+        self.claims = {}
+        self.attempts = {}
+        self.session_open = False
+        self.sessions = 0
+
+    def repositories(self):
+        @asynccontextmanager
+        async def _open():
+            assert not self.session_open
+            self.session_open = True
+            self.sessions += 1
+            try:
+                yield _FakeVideoRepo(self), _FakeBatchRepo(self)
+            finally:
+                self.session_open = False
+        return _open
+
+
+class _FakeVideoRepo:
+    def __init__(self, store):
+        self.store = store
+
+    async def get_by_ids(self, job_ids, for_update=False):
+        # Bản sao như khi đọc từ DB: thay đổi chỉ có hiệu lực qua save
+        return [self.store.jobs[i].model_copy(deep=True) for i in job_ids if i in self.store.jobs]
+
+    async def load_transcripts(self, jobs):
+        for job in jobs:
+            job.transcript = self.store.jobs[job.id].transcript
+
+    async def save(self, job):
+        self.store.jobs[job.id].render_config = job.render_config.model_copy(deep=True)
+
+
+class _FakeBatchRepo:
+    def __init__(self, store):
+        self.store = store
+
+    async def claim(self, status, user_id, limit, max_attempts):
+        candidates = sorted(
+            (
+                job for job in self.store.jobs.values()
+                if job.status == status
+                and (user_id is None or job.user_id == user_id)
+                and not job.render_config.text_overlays
+                and job.transcript is not None
+                and job.id not in self.store.claims
+                and self.store.attempts.get(job.id, 0) < max_attempts
+            ),
+            key=lambda job: job.created_at,
+        )[:limit]
+        if not candidates:
+            return None
+        batch = KeywordBatch(job_ids=[job.id for job in candidates], created_at=T0)
+        self.store.batches[batch.id] = batch
+        self.store.claims.update({job.id: batch.id for job in candidates})
+        for job in candidates:
+            self.store.attempts[job.id] = self.store.attempts.get(job.id, 0) + 1
+        return batch.model_copy(deep=True)
+
+    async def mark_submitted(self, batch):
+        self.store.batches[batch.id] = batch.model_copy(deep=True)
+
+    async def list_open(self):
+        return [batch.model_copy(deep=True) for batch in self.store.batches.values()]
+
+    async def release(self, batch_id):
+        self.store.batches.pop(batch_id, None)
+        self.store.claims = {job: b for job, b in self.store.claims.items() if b != batch_id}
+
+
+class _FakeBatchExtractor:
+    def __init__(self, store, state=KeywordBatchState.SUCCEEDED, skip=None):
+        self.store = store
+        self.state = state
+        self.skip = skip
+        self.submitted = []
+        self.cancelled = []
+
+    async def submit(self, transcripts):
+        assert not self.store.session_open
+        self.submitted.append(dict(transcripts))
+        return f"batches/{len(self.submitted)}", {f"{key}#1": {"job": key, "window": None} for key in transcripts}
+
+    async def poll(self, name):
+        assert not self.store.session_open
+        return self.state
+
+    async def collect(self, name, requests, transcripts):
+        assert not self.store.session_open
+        return {
+            key: [TextOverlay(text="Hi", start=1.0, end=4.0, mode=TextOverlayMode.BOTTOM_TITLE)]
+            for key in transcripts if key != self.skip
+        }
+
+    async def cancel(self, name):
+        self.cancelled.append(name)
+
+
+def _job(user_id=1, status=JobStatus.COMPLETED, transcript=None, overlays=(), created_at=T0):
+    job = VideoJob(user_id=user_id, input_file_path="in.mp4", status=status, transcript=transcript, created_at=created_at)
+    job.render_config.text_overlays = list(overlays)
+    return job
+
+
+def _overlay(text="x"):
+    return TextOverlay(text=text, start=0.0, end=1.0, mode=TextOverlayMode.BOTTOM_TITLE)
+
+
+def _apply(store, extractor, now=T0 + timedelta(hours=1)):
+    return ApplyKeywordBatchesUseCase(store.repositories(), extractor, timeout=timedelta(hours=24), clock=lambda: now)
+
+
+@pytest.mark.asyncio
+async def test_submit_claims_jobs_and_persists_batch_without_holding_a_session():
+    transcript = _transcript(30)
+    done = _job(transcript=transcript, overlays=[_overlay()])
+    pending = _job(transcript=transcript)
+    other_user = _job(user_id=2, transcript=transcript)
+    no_transcript = _job()
+    processing = _job(status=JobStatus.PROCESSING, transcript=transcript)
+    store = _Store([done, pending, other_user, no_transcript, processing])
+    extractor = _FakeBatchExtractor(store)
+
+    batch = await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute(user_id=1)
+
+    assert list(extractor.submitted[0]) == [str(pending.id)]
+    assert batch.name == "batches/1" and batch.job_ids == [pending.id]
+    assert store.batches[batch.id].name == "batches/1" and store.batches[batch.id].requests
+    assert store.claims == {pending.id: batch.id}
+    # Job đã claim không bị submit lần nữa khi batch còn mở
+    assert await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute(user_id=1) is None
+    assert len(extractor.submitted) == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_respects_limit_and_releases_claims_when_submit_fails():
+    store = _Store([_job(transcript=_transcript(30), created_at=T0 + timedelta(minutes=i)) for i in range(4)])
+    extractor = _FakeBatchExtractor(store)
+
+    async def failing_submit(transcripts):
+        raise RuntimeError("upload failed")
+
+    extractor.submit = failing_submit
+    with pytest.raises(RuntimeError):
+        await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute(limit=3)
+    assert store.batches == {} and store.claims == {}
+
+    extractor = _FakeBatchExtractor(store)
+    batch = await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute(limit=3)
+    assert len(batch.job_ids) == 3 and len(store.claims) == 3
+
+
+@pytest.mark.asyncio
+async def test_apply_writes_results_and_skips_jobs_that_gained_overlays_meanwhile():
+    jobs = [_job(transcript=_transcript(30)) for _ in range(3)]
+    store = _Store(jobs)
+    extractor = _FakeBatchExtractor(store, skip=str(jobs[2].id))
+    await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute()
+    # Trong lúc batch chạy, user tự thêm overlay cho job 1
+    store.jobs[jobs[1].id].render_config.text_overlays = [_overlay("manual")]
+
+    updated = await _apply(store, extractor).execute()
+
+    assert [job.id for job in updated] == [jobs[0].id]
+    assert [o.text for o in store.jobs[jobs[0].id].render_config.text_overlays] == ["Hi"]
+    assert [o.text for o in store.jobs[jobs[1].id].render_config.text_overlays] == ["manual"]
+    assert store.jobs[jobs[2].id].render_config.text_overlays == []
+    # Batch xong → nhả claim; job lỗi được submit lại ở lần sau
+    assert store.batches == {} and store.claims == {}
+    await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute()
+    assert list(extractor.submitted[-1]) == [str(jobs[2].id)]
+
+
+@pytest.mark.asyncio
+async def test_apply_leaves_running_batches_and_releases_failed_or_expired_ones():
+    store = _Store([_job(transcript=_transcript(30))])
+    extractor = _FakeBatchExtractor(store, state=KeywordBatchState.RUNNING)
+    batch = await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute()
+    submitted_at = store.batches[batch.id].submitted_at
+
+    assert await _apply(store, extractor, now=submitted_at + timedelta(hours=1)).execute() == []
+    assert batch.id in store.batches
+
+    assert await _apply(store, extractor, now=submitted_at + timedelta(hours=25)).execute() == []
+    assert extractor.cancelled == [batch.name] and store.batches == {}
+
+    batch = await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute()
+    extractor.state = KeywordBatchState.FAILED
+    assert await _apply(store, extractor).execute() == []
+    assert store.batches == {} and store.claims == {}
+
+
+@pytest.mark.asyncio
+async def test_apply_releases_claims_that_were_never_submitted():
+    store = _Store([_job(transcript=_transcript(30))])
+    batch = await _FakeBatchRepo(store).claim(JobStatus.COMPLETED, None, 10, 3)
+    extractor = _FakeBatchExtractor(store)
+
+    await _apply(store, extractor, now=T0 + timedelta(minutes=5)).execute()
+    assert batch.id in store.batches
+
+    await _apply(store, extractor, now=T0 + timedelta(hours=2)).execute()
+    assert store.batches == {} and store.claims == {}
+
+
+@pytest.mark.asyncio
+async def test_submit_without_pending_jobs_does_not_call_extractor():
+    store = _Store([])
+    extractor = _FakeBatchExtractor(store)
+
+    assert await SubmitKeywordBatchUseCase(store.repositories(), extractor).execute() is None
+    assert extractor.submitted == []
+
+
+@pytest.mark.asyncio
+async def test_jobs_that_keep_failing_stop_being_claimed_after_max_attempts():
+    job = _job(transcript=_transcript(30))
+    store = _Store([job])
+    extractor = _FakeBatchExtractor(store, skip=str(job.id))
+    submit = SubmitKeywordBatchUseCase(store.repositories(), extractor, max_attempts=2)
+
+    for _ in range(2):
+        assert await submit.execute() is not None
+        assert await _apply(store, extractor).execute() == []
+
+    assert await submit.execute() is None
+    assert len(extractor.submitted) == 2 and store.attempts == {job.id: 2}
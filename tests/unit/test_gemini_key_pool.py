@@ -0,0 +1,185 @@
+"""
+Unit tests cho GeminiKeyPool: token bucket, least-loaded, cooldown theo Retry-After
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from google.genai import errors as genai_errors
+
+from src.modules.video_processing.domain.value_objects import Transcript, WordSegment
+from src.modules.video_processing.infrastructure.adapters.gemini_key_pool import (
+    AllKeysExhaustedError,
+    GeminiKeyPool,
+    TokenBucket,
+    is_rate_limited,
+    retry_after_seconds,
+)
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import GeminiKeywordExtractor
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _pool(keys=("k1", "k2", "k3"), clock=None, **kwargs):
+    options = dict(requests_per_minute=60, burst=1, max_in_flight_per_key=2, cooldown_seconds=30)
+    options.update(kwargs)
+    return GeminiKeyPool(list(keys), clock=clock or _Clock(), **options)
+
+
+def _rate_limit_error(headers=None, retry_delay=None):
+    body = {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "quota"}}
+    if retry_delay:
+        body["error"]["details"] = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": retry_delay}]
+    response = httpx.Response(429, headers=headers or {})
+    return genai_errors.ClientError(429, body, response)
+
+
+async def _chunks(text):
+    yield MagicMock(text=text)
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate_per_second=0.5, capacity=2, now=0.0)
+
+    assert bucket.take(0.0) and bucket.take(0.0)
+    assert not bucket.take(0.0)
+    assert bucket.wait_time(1.0) == pytest.approx(1.0)
+    assert bucket.take(2.0)
+
+
+@pytest.mark.asyncio
+async def test_acquire_spreads_load_across_keys():
+    pool = _pool(burst=5, max_in_flight_per_key=5)
+
+    slots = [await pool.acquire() for _ in range(6)]
+
+    assert [slot.stats.requests for slot in pool.slots] == [2, 2, 2]
+    pool.release(slots[0])
+    assert (await pool.acquire()) is slots[0]
+
+
+@pytest.mark.asyncio
+async def test_cooled_down_key_is_skipped_until_retry_after():
+    clock = _Clock()
+    pool = _pool(keys=("k1", "k2"), clock=clock, burst=10, max_in_flight_per_key=5)
+    first = await pool.acquire()
+    pool.release(first)
+
+    pool.cooldown(first, retry_after=20)
+    picked = [await pool.acquire() for _ in range(3)]
+    assert all(slot is not first for slot in picked)
+
+    clock.now += 21
+    for slot in picked:
+        pool.release(slot)
+    assert first in [await pool.acquire() for _ in range(2)]
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_next_token():
+    clock = _Clock()
+    pool = _pool(keys=("k1",), clock=clock, requests_per_minute=60, burst=1)
+    pool.release(await pool.acquire())
+
+    async def fake_sleep(seconds):
+        clock.now += seconds
+
+    with patch("src.modules.video_processing.infrastructure.adapters.gemini_key_pool.asyncio.sleep", fake_sleep):
+        started = clock.now
+        await pool.acquire()
+
+    assert clock.now - started == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_acquire_times_out_when_every_key_cools_down():
+    pool = _pool(keys=("k1",), acquire_timeout_seconds=5)
+    pool.cooldown(pool.slots[0], retry_after=60)
+
+    with pytest.raises(AllKeysExhaustedError):
+        await pool.acquire()
+
+
+def test_retry_after_from_header_or_retry_info():
+    assert retry_after_seconds(_rate_limit_error(headers={"Retry-After": "12"})) == 12
+    assert retry_after_seconds(_rate_limit_error(retry_delay="27s")) == 27
+    assert retry_after_seconds(_rate_limit_error()) is None
+    assert is_rate_limited(_rate_limit_error())
+    assert not is_rate_limited(genai_errors.ClientError(400, {"error": {"code": 400}}, None))
+
+
+@pytest.mark.asyncio
+async def test_extractor_rotates_to_next_key_on_429():
+    pool = _pool(keys=("k1", "k2"), burst=5)
+
+    def make_client(api_key, **kwargs):
+        client = MagicMock()
+        if api_key == "k1":
+            client.aio.models.generate_content_stream = AsyncMock(side_effect=_rate_limit_error(retry_delay="40s"))
+        else:
+            client.aio.models.generate_content_stream = AsyncMock(return_value=_chunks(
+                '[{"text": "Hello", "start": 0.0, "end": 5.0, "mode": "BOTTOM_TITLE", "position": "bottom_center"}]'
+            ))
+        return client
+
+    transcript = Transcript(full_text="hello world", words=[WordSegment(word="hello", start=0.0, end=0.4, confidence=0.9)])
+    with patch("src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client", make_client):
+        extractor = GeminiKeywordExtractor(api_keys=["k1", "k2"], key_pool=pool)
+        overlays = await extractor.extract(transcript)
+        await pool.aclose()
+
+    assert [o.text for o in overlays] == ["Hello"]
+    assert pool.slots[0].stats.rate_limited == 1
+    assert pool.slots[0].cooldown_until == pytest.approx(pool._clock() + 40)
+    assert all(slot.in_flight == 0 for slot in pool.slots)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_leases_never_exceed_in_flight_limit():
+    pool = _pool(keys=("k1", "k2"), burst=100, requests_per_minute=6000, max_in_flight_per_key=2, clock=lambda: 0.0)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        async with pool.lease():
+            peak = max(peak, sum(slot.in_flight for slot in pool.slots))
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(job() for _ in range(4)))
+
+    assert peak <= 4
+    assert [slot.stats.requests for slot in pool.slots] == [2, 2]
+
+
+def test_client_from_a_live_loop_is_closed_on_that_loop_when_the_loop_changes():
+    slot = _pool(keys=("k1",)).slots[0]
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        async def _client():
+            slot.client()
+            return slot._http
+
+        old_http = asyncio.run_coroutine_threadsafe(_client(), other).result(timeout=5)
+        new_http = asyncio.run(_client())
+
+        deadline = time.monotonic() + 5
+        while not old_http.is_closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert old_http.is_closed
+        assert new_http is not old_http and not new_http.is_closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(timeout=5)
+        other.close()
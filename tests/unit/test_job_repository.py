@@ -0,0 +1,267 @@
+"""
+Unit tests cho PostgresVideoRepository: save chỉ ghi cột đã đổi, update_status hẹp,
+transcript ở bảng riêng và decode lazy
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.modules.video_processing.domain.entities import TranscriptNotLoadedError, VideoJob
+from src.modules.video_processing.domain.value_objects import JobStatus, Transcript, WordSegment
+from src.modules.video_processing.infrastructure.repositories import (
+    PostgresKeywordBatchRepository,
+    PostgresVideoRepository,
+)
+from src.modules.video_processing.infrastructure.transcript_codec import decode_words, encode_words
+from src.shared.database.unit_of_work import unit_of_work
+
+
+class _FakeResult:
+    def __init__(self, rowcount=1, row=None, rows=()):
+        self.rowcount = rowcount
+        self.row = row
+        self.rows = list(rows)
+
+    def one_or_none(self):
+        return self.row
+
+    def scalar_one_or_none(self):
+        return self.row
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+class _FakeSession:
+    def __init__(self, results=None):
+        self.info = {}
+        self.results = list(results or [])
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return self.results.pop(0) if self.results else _FakeResult()
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def _words(n=1000):
+    return [WordSegment(word=f"w{i % 50}", start=i, end=i + 0.5, confidence=0.9) for i in range(n)]
+
+
+def _job():
+    return VideoJob(user_id=1, input_file_path="in.mp4", transcript=Transcript(full_text="...", words=_words()))
+
+
+def _row(job):
+    return SimpleNamespace(**job.model_dump())
+
+
+def _set_clause(sql: str) -> str:
+    return sql.split(" SET ", 1)[1].split(" WHERE ", 1)[0]
+
+
+def test_codec_round_trips_words():
+    words = _words(10) + [WordSegment(word="xin chào", start=1.25, end=2.0, confidence=0.5)]
+
+    blob = encode_words(words)
+
+    assert decode_words(blob) == words
+    assert len(blob) < len(Transcript(full_text="", words=words).model_dump_json())
+
+
+def test_codec_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        decode_words(b"XXX\x01" + b"\x00" * 8)
+
+
+@pytest.mark.asyncio
+async def test_first_save_writes_job_row_and_transcript_blob():
+    session = _FakeSession()
+
+    await PostgresVideoRepository(session).save(_job())
+
+    assert session.statements[0].startswith("INSERT INTO video_jobs")
+    assert "transcript" not in session.statements[0]
+    assert session.statements[1].startswith("INSERT INTO video_job_transcripts")
+
+
+@pytest.mark.asyncio
+async def test_second_save_only_updates_changed_columns():
+    session = _FakeSession()
+    repo, job = PostgresVideoRepository(session), _job()
+    await repo.save(job)
+
+    job.output_file_paths = ["outputs/a.mp4"]
+    await repo.save(job)
+    await repo.save(job)
+
+    assert len(session.statements) == 3
+    assert _set_clause(session.statements[2]) == "output_file_paths=%(output_file_paths)s::VARCHAR[]"
+
+
+@pytest.mark.asyncio
+async def test_update_status_never_touches_transcript():
+    session = _FakeSession()
+    repo, job = PostgresVideoRepository(session), _job()
+    await repo.save(job)
+
+    job.mark_as_processing()
+    await repo.update_status(job)
+    await repo.save(job)
+
+    assert _set_clause(session.statements[2]).startswith("status=%(status)s, updated_at=%(updated_at)s")
+    assert "transcript" not in session.statements[2]
+    assert len(session.statements) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_decodes_transcript_on_first_access():
+    job = _job()
+    blob = encode_words(job.transcript.words)
+    session = _FakeSession([_FakeResult(row=(_row(job), "...", blob))])
+    repo = PostgresVideoRepository(session)
+
+    loaded = await repo.get_by_id(job.id)
+
+    assert "LEFT OUTER JOIN video_job_transcripts" in session.statements[0]
+    assert not loaded.transcript_loaded
+    assert loaded.transcript.words == job.transcript.words
+    assert loaded.transcript_loaded
+
+    # Transcript không đổi → chỉ ghi cột render_config
+    loaded.render_config.resolution = "1080x1920"
+    await repo.save(loaded)
+    assert len(session.statements) == 2
+    assert _set_clause(session.statements[1]) == "render_config=%(render_config)s::JSONB"
+
+
+@pytest.mark.asyncio
+async def test_list_queries_skip_transcripts_until_loaded():
+    with_transcript, without = _job(), VideoJob(user_id=1, input_file_path="b.mp4")
+    blob = encode_words(with_transcript.transcript.words)
+    session = _FakeSession([_FakeResult(rows=[_row(with_transcript), _row(without)])])
+    repo = PostgresVideoRepository(session)
+
+    jobs = await repo.find_by_status("Completed")
+    assert "video_job_transcripts" not in session.statements[0]
+    with pytest.raises(TranscriptNotLoadedError):
+        jobs[0].transcript
+
+    # Chưa load transcript → save không đụng bảng transcript; job đọc từ DB → UPDATE cột đã đổi
+    jobs[0].output_file_paths = ["outputs/a.mp4"]
+    await repo.save(jobs[0])
+    assert len(session.statements) == 2
+    assert session.statements[1].startswith("UPDATE video_jobs")
+
+    session.results = [_FakeResult(rows=[(with_transcript.id, "...", blob)])]
+    await repo.load_transcripts(jobs)
+    assert len(jobs[0].transcript.words) == 1000
+    assert jobs[1].transcript is None
+
+
+@pytest.mark.asyncio
+async def test_clearing_transcript_deletes_its_row():
+    session = _FakeSession()
+    repo, job = PostgresVideoRepository(session), _job()
+    await repo.save(job)
+
+    job.transcript = None
+    await repo.save(job)
+
+    assert session.statements[-1].startswith("DELETE FROM video_job_transcripts")
+
+
+@pytest.mark.asyncio
+async def test_save_skips_job_deleted_elsewhere():
+    session = _FakeSession()
+    repo, job = PostgresVideoRepository(session), _job()
+    await repo.save(job)
+
+    session.results = [_FakeResult(rowcount=0)]
+    job.output_file_paths = ["outputs/a.mp4"]
+    await repo.save(job)
+
+    assert session.statements[2].startswith("UPDATE video_jobs")
+    assert len(session.statements) == 3  # không INSERT lại, không ghi transcript
+
+
+@pytest.mark.asyncio
+async def test_snapshots_only_advance_after_commit():
+    session = _FakeSession()
+    repo, job = PostgresVideoRepository(session), _job()
+    await repo.save(job)
+
+    job.output_file_paths = ["outputs/a.mp4"]
+    with pytest.raises(RuntimeError):
+        async with unit_of_work(session):
+            await repo.save(job)
+            raise RuntimeError("rollback")
+
+    # Lần ghi trước đã rollback → save lại vẫn gửi cột đó
+    await repo.save(job)
+    assert _set_clause(session.statements[-1]) == "output_file_paths=%(output_file_paths)s::VARCHAR[]"
+    await repo.save(job)
+    assert len(session.statements) == 4
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_without_transcript_skips_the_transcript_table():
+    job = _job()
+    session = _FakeSession([_FakeResult(row=_row(job))])
+
+    loaded = await PostgresVideoRepository(session).get_by_id(job.id, with_transcript=False)
+
+    assert "video_job_transcripts" not in session.statements[0]
+    assert loaded.id == job.id
+    with pytest.raises(TranscriptNotLoadedError):
+        loaded.transcript
+
+
+@pytest.mark.asyncio
+async def test_keyword_batch_claim_filters_and_limits_in_sql():
+    job = _job()
+    session = _FakeSession([_FakeResult(), _FakeResult(rows=[job.id])])
+
+    batch = await PostgresKeywordBatchRepository(session).claim(JobStatus.COMPLETED, 7, 50, 3)
+
+    assert batch.job_ids == [job.id]
+    claim = session.statements[1]
+    assert claim.startswith("INSERT INTO keyword_batch_jobs (job_id, batch_id, attempts) SELECT video_jobs.id")
+    assert "video_jobs.user_id = %(user_id_1)s" in claim
+    assert "video_jobs.render_config[%(render_config_1)s::TEXT] IS NULL" in claim
+    assert "NOT (EXISTS (SELECT * \nFROM keyword_batch_jobs" in claim
+    assert "LIMIT %(param_4)s" in claim
+    assert "keyword_batch_jobs.batch_id IS NOT NULL OR keyword_batch_jobs.attempts >= %(attempts_1)s" in claim
+    assert "ON CONFLICT (job_id) DO UPDATE SET batch_id = excluded.batch_id, " in claim
+    assert "attempts = (keyword_batch_jobs.attempts + %(attempts_2)s::INTEGER)" in claim
+    assert claim.endswith("WHERE keyword_batch_jobs.batch_id IS NULL RETURNING keyword_batch_jobs.job_id")
+
+
+@pytest.mark.asyncio
+async def test_keyword_batch_claim_without_candidates_removes_the_empty_batch():
+    session = _FakeSession([_FakeResult(), _FakeResult(rows=[])])
+
+    assert await PostgresKeywordBatchRepository(session).claim(JobStatus.COMPLETED, None, 50, 3) is None
+    assert "user_id" not in session.statements[1]
+    assert session.statements[2].startswith("DELETE FROM keyword_batches")
+
+
+@pytest.mark.asyncio
+async def test_get_by_ids_locks_rows_for_apply():
+    job = _job()
+    session = _FakeSession([_FakeResult(rows=[_row(job)])])
+
+    jobs = await PostgresVideoRepository(session).get_by_ids([job.id], for_update=True)
+
+    assert [j.id for j in jobs] == [job.id]
+    assert session.statements[0].endswith("FOR UPDATE")
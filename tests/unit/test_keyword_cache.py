@@ -0,0 +1,229 @@
+"""
+Unit tests cho CachedKeywordExtractor: LRU local → Redis → LLM, TTL, giới hạn size, bypass
+"""
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.modules.video_processing.domain.value_objects import TextOverlay, TextOverlayMode, Transcript, WordSegment
+from src.modules.video_processing.infrastructure.adapters import cached_keyword_extractor
+from src.modules.video_processing.infrastructure.adapters.cached_keyword_extractor import (
+    CachedKeywordExtractor,
+    KeywordCacheStats,
+    LocalLRUCache,
+)
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import KeywordExtraction
+from src.shared.monitoring.metrics import collect_keyword_cache_metrics, render_prometheus
+
+
+def _overlay(text, start):
+    return TextOverlay(text=text, start=start, end=start + 1.5, mode=TextOverlayMode.BOTTOM_TITLE)
+
+
+class _FakeExtractor:
+    def __init__(self, overlays=None, fingerprint="fp-1", complete=True):
+        self.overlays = overlays if overlays is not None else [_overlay("Gemini", 1.0)]
+        self.cache_fingerprint = fingerprint
+        self.complete = complete
+        self.calls = 0
+
+    async def extract(self, transcript):
+        return (await self.extract_detailed(transcript)).overlays
+
+    async def extract_detailed(self, transcript):
+        self.calls += 1
+        return KeywordExtraction(list(self.overlays), self.complete)
+
+
+class _FakeRedis:
+    def __init__(self, fail=False):
+        self.data = {}
+        self.ttls = {}
+        self.fail = fail
+
+    async def get(self, key):
+        if self.fail:
+            raise RedisConnectionError("down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        if self.fail:
+            raise RedisConnectionError("down")
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def hincrby(self, key, field, amount):
+        if self.fail:
+            raise RedisConnectionError("down")
+        fields = self.data.setdefault(key, {})
+        fields[field.encode()] = str(int(fields.get(field.encode(), b"0")) + amount).encode()
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+
+def _transcript(text="xin chào gemini"):
+    words = [WordSegment(word=w, start=i, end=i + 0.5, confidence=0.9) for i, w in enumerate(text.split())]
+    return Transcript(full_text=text, words=words)
+
+
+def _cached(inner, redis=None, **kwargs):
+    return CachedKeywordExtractor(
+        inner, redis=redis, local_cache=LocalLRUCache(8, 60), stats=KeywordCacheStats(), **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_second_call_hits_local_cache():
+    inner = _FakeExtractor()
+    cached = _cached(inner, _FakeRedis())
+
+    first = await cached.extract(_transcript())
+    second = await cached.extract(_transcript())
+
+    assert first == second == inner.overlays
+    assert inner.calls == 1
+    assert (cached.stats.misses, cached.stats.local_hits) == (1, 1)
+    assert cached.stats.hit_ratio == 0.5
+
+
+@pytest.mark.asyncio
+async def test_redis_hit_is_shared_across_processes():
+    redis, inner = _FakeRedis(), _FakeExtractor()
+    await _cached(inner, redis, ttl_seconds=120).extract(_transcript())
+    assert list(redis.ttls.values()) == [120]
+
+    # Worker khác: LRU trống, Redis đã có
+    other = _cached(inner, redis)
+    assert await other.extract(_transcript()) == inner.overlays
+    await other.extract(_transcript())
+
+    assert inner.calls == 1
+    assert (other.stats.redis_hits, other.stats.local_hits) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_key_depends_on_transcript_and_fingerprint():
+    cached = _cached(_FakeExtractor())
+    key = cached.cache_key(_transcript())
+
+    assert key.startswith(cached_keyword_extractor.CACHE_KEY_PREFIX)
+    assert key == cached.cache_key(_transcript())
+    assert key != cached.cache_key(_transcript("xin chào gemini flash"))
+    assert key != _cached(_FakeExtractor(fingerprint="fp-2")).cache_key(_transcript())
+
+
+@pytest.mark.asyncio
+async def test_refresh_and_bypass_call_llm():
+    redis, inner = _FakeRedis(), _FakeExtractor()
+    cached = _cached(inner, redis)
+    await cached.extract(_transcript())
+
+    await cached.extract(_transcript(), refresh=True)
+    assert inner.calls == 2
+
+    bypassed = _cached(inner, redis, bypass=True)
+    await bypassed.extract(_transcript())
+    assert inner.calls == 3
+    assert bypassed.stats.bypassed == 1
+    assert len(bypassed.local_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_empty_and_oversized_results_are_not_cached():
+    redis = _FakeRedis()
+    empty = _FakeExtractor(overlays=[])
+    await _cached(empty, redis).extract(_transcript())
+    assert redis.data == {}
+
+    big = _FakeExtractor(overlays=[_overlay("x" * 50, i) for i in range(10)])
+    cached = _cached(big, redis, max_value_bytes=100)
+    await cached.extract(_transcript())
+    await cached.extract(_transcript())
+    assert redis.data == {}
+    assert big.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_partial_results_are_returned_but_not_cached():
+    redis = _FakeRedis()
+    partial = _FakeExtractor(complete=False)
+    cached = _cached(partial, redis)
+
+    assert await cached.extract(_transcript()) == partial.overlays
+    await cached.extract(_transcript())
+
+    assert partial.calls == 2
+    assert redis.data == {} and len(cached.local_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_through_to_llm():
+    inner = _FakeExtractor()
+    cached = _cached(inner, _FakeRedis(fail=True))
+
+    assert await cached.extract(_transcript()) == inner.overlays
+    assert cached.stats.errors == 2  # get + set
+    # LRU local vẫn hoạt động khi Redis chết
+    await cached.extract(_transcript())
+    assert inner.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_corrupt_redis_value_is_treated_as_miss():
+    redis, inner = _FakeRedis(), _FakeExtractor()
+    cached = _cached(inner, redis)
+    redis.data[cached.cache_key(_transcript())] = b'[{"text": ""}]'
+
+    assert await cached.extract(_transcript()) == inner.overlays
+    assert cached.stats.errors == 1
+    assert inner.calls == 1
+
+
+def test_local_lru_evicts_oldest_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cached_keyword_extractor.time, "monotonic", lambda: now[0])
+    cache = LocalLRUCache(max_entries=2, ttl_seconds=10)
+
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+@pytest.mark.asyncio
+async def test_stats_from_every_worker_are_exported_as_prometheus_counters():
+    redis = _FakeRedis()
+    worker_a, worker_b = KeywordCacheStats(), KeywordCacheStats()
+    worker_a.local_hits, worker_a.misses = 3, 2
+    await worker_a.flush(redis)
+    worker_a.misses += 1
+    await worker_a.flush(redis)  # chỉ cộng phần tăng thêm
+    worker_b.redis_hits, worker_b.errors, worker_b.bypassed = 4, 1, 5
+    await worker_b.flush(redis)
+
+    text = render_prometheus(collect_keyword_cache_metrics(await KeywordCacheStats.load(redis)))
+
+    assert "# TYPE keyword_cache_local_hits_total counter\nkeyword_cache_local_hits_total 3\n" in text
+    assert "keyword_cache_redis_hits_total 4\n" in text
+    assert "keyword_cache_misses_total 3\n" in text
+    assert "keyword_cache_errors_total 1\n" in text
+    assert "keyword_cache_bypassed_total 5\n" in text
+
+
+@pytest.mark.asyncio
+async def test_failed_stats_flush_is_retried_next_time():
+    redis = _FakeRedis(fail=True)
+    stats = KeywordCacheStats(misses=2)
+    await stats.flush(redis)
+
+    redis.fail = False
+    await stats.flush(redis)
+
+    assert (await KeywordCacheStats.load(redis)).misses == 2
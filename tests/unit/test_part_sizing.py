@@ -0,0 +1,47 @@
+"""
+Unit tests cho PartSizingRule — part size / part count cho S3 multipart
+"""
+
+import math
+import pytest
+
+from src.modules.video_upload.domain.services import PartSizingRule, MiB, GiB, TiB
+
+
+class TestPartSizingRule:
+    def test_unknown_size_returns_default_part_size(self):
+        plan = PartSizingRule.recommend(None)
+        assert plan.part_size == PartSizingRule.DEFAULT_PART_SIZE
+        assert plan.part_count is None
+
+    def test_small_file_is_single_part(self):
+        plan = PartSizingRule.recommend(3 * MiB)
+        assert plan.part_count == 1
+        assert plan.part_size >= PartSizingRule.MIN_PART_SIZE
+
+    def test_empty_file_still_has_one_part(self):
+        assert PartSizingRule.recommend(0).part_count == 1
+
+    @pytest.mark.parametrize("file_size,expected_part_size", [
+        (500 * MiB, 10 * MiB),
+        (4 * GiB, 32 * MiB),
+        (50 * GiB, 128 * MiB),
+        (500 * GiB, 512 * MiB),
+    ])
+    def test_larger_files_get_larger_parts(self, file_size, expected_part_size):
+        plan = PartSizingRule.recommend(file_size)
+        assert plan.part_size == expected_part_size
+        assert plan.part_count == math.ceil(file_size / expected_part_size)
+
+    @pytest.mark.parametrize("file_size", [
+        1 * GiB + 1, 97 * GiB, 1 * TiB, 5 * TiB,
+    ])
+    def test_never_exceeds_s3_part_limit(self, file_size):
+        plan = PartSizingRule.recommend(file_size)
+        assert plan.part_count <= PartSizingRule.MAX_PARTS
+        assert PartSizingRule.MIN_PART_SIZE <= plan.part_size <= PartSizingRule.MAX_PART_SIZE
+        assert plan.part_size * plan.part_count >= file_size
+
+    def test_rejects_objects_larger_than_s3_limit(self):
+        with pytest.raises(ValueError):
+            PartSizingRule.recommend(5 * TiB + 1)
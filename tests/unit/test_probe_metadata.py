@@ -0,0 +1,138 @@
+"""
+Unit tests cho ProbeVideoMetadataUseCase và parse output ffprobe — repo, S3, probe đều là fake
+"""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from src.modules.video_upload.application.handlers import ProbeVideoMetadataUseCase
+from src.modules.video_upload.api.schemas import CompleteUploadRequest
+from src.modules.video_upload.domain.value_objects import MediaInfo
+from src.modules.video_upload.infrastructure.adapters.ffprobe_probe import FFprobeMediaProbeAdapter
+
+
+def _video(status="completed", file_size_bytes=None):
+    video_id = uuid4()
+    return SimpleNamespace(
+        id=video_id,
+        s3_key=f"uploads/{video_id}/a.mp4",
+        status=status,
+        file_size_bytes=file_size_bytes,
+    )
+
+
+class _FakeRepo:
+    def __init__(self, video):
+        self.video = video
+        self.updates = {}
+
+    async def get_by_id(self, video_id):
+        return self.video if self.video.id == video_id else None
+
+    async def update_fields(self, video_id, **kwargs):
+        self.updates.update(kwargs)
+        return self.video
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.put = {}
+
+    @asynccontextmanager
+    async def open_range_url(self, remote_path):
+        yield f"http://127.0.0.1:9/{remote_path}"
+
+    async def put_object(self, remote_path, body, content_type):
+        self.put[remote_path] = (body, content_type)
+        return f"s3://bucket/{remote_path}"
+
+
+class _FakeProbe:
+    def __init__(self, info, thumbnail_error=None):
+        self.info = info
+        self.thumbnail_error = thumbnail_error
+        self.urls = []
+
+    async def probe(self, source_url):
+        self.urls.append(source_url)
+        return self.info
+
+    async def extract_thumbnail(self, source_url, at_sec):
+        if self.thumbnail_error:
+            raise self.thumbnail_error
+        return b"\xff\xd8jpeg"
+
+
+INFO = MediaInfo(duration_sec=120.0, size_bytes=5000, video_codec="h264", width=1920, height=1080)
+
+
+@pytest.mark.asyncio
+async def test_probe_fills_metadata_and_thumbnail():
+    video = _video(file_size_bytes=4096)
+    repo, storage, probe = _FakeRepo(video), _FakeStorage(), _FakeProbe(INFO)
+
+    await ProbeVideoMetadataUseCase(repo, storage, probe).execute(video.id)
+
+    thumbnail_key = f"uploads/{video.id}/thumbnail.jpg"
+    assert probe.urls == [f"http://127.0.0.1:9/{video.s3_key}"]
+    assert storage.put[thumbnail_key] == (b"\xff\xd8jpeg", "image/jpeg")
+    assert repo.updates == {
+        "duration_sec": 120.0,
+        "video_codec": "h264",
+        "width": 1920,
+        "height": 1080,
+        "thumbnail_url": thumbnail_key,
+    }
+
+
+@pytest.mark.asyncio
+async def test_probe_backfills_size_and_survives_thumbnail_failure():
+    video = _video(file_size_bytes=None)
+    repo = _FakeRepo(video)
+    probe = _FakeProbe(INFO, thumbnail_error=RuntimeError("ffmpeg failed"))
+
+    await ProbeVideoMetadataUseCase(repo, _FakeStorage(), probe).execute(video.id)
+
+    assert repo.updates["file_size_bytes"] == 5000
+    assert repo.updates["duration_sec"] == 120.0
+    assert "thumbnail_url" not in repo.updates
+
+
+@pytest.mark.asyncio
+async def test_probe_skips_videos_not_completed():
+    video = _video(status="uploading")
+    repo, probe = _FakeRepo(video), _FakeProbe(INFO)
+
+    assert await ProbeVideoMetadataUseCase(repo, _FakeStorage(), probe).execute(video.id) is None
+    assert probe.urls == []
+    assert repo.updates == {}
+
+
+def test_parse_ffprobe_output():
+    info = FFprobeMediaProbeAdapter._parse_probe_output({
+        "streams": [{"codec_name": "hevc", "width": 3840, "height": 2160}],
+        "format": {"duration": "61.250000", "size": "104857600"},
+    })
+
+    assert info == MediaInfo(
+        duration_sec=61.25, size_bytes=104857600, video_codec="hevc", width=3840, height=2160
+    )
+
+
+def test_parse_ffprobe_output_without_video_stream():
+    info = FFprobeMediaProbeAdapter._parse_probe_output({"format": {"duration": "N/A"}})
+
+    assert info == MediaInfo()
+
+
+def test_complete_request_accepts_part_sizes():
+    request = CompleteUploadRequest(
+        video_id=uuid4(),
+        upload_id="uid",
+        parts=[{"PartNumber": 1, "ETag": "a", "Size": 10}, {"PartNumber": 2, "ETag": "b"}],
+    )
+
+    assert [p.size for p in request.parts] == [10, None]
@@ -0,0 +1,89 @@
+"""
+Unit tests cho encode transcript gọn trong prompt Gemini và ước lượng token
+"""
+
+import pytest
+
+from src.modules.video_processing.domain.value_objects import Transcript, WordSegment, WordTimings
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import GeminiKeywordExtractor
+from src.modules.video_processing.infrastructure.adapters.transcript_prompt import (
+    PROMPT_FORMAT_JSON,
+    encode_timed_lines,
+    encode_words_json,
+    estimate_tokens,
+)
+from src.shared.config.settings import Settings
+
+WORDS = WordTimings.from_segments([
+    WordSegment(word="Strategy", start=0.512, end=0.9, confidence=0.99),
+    WordSegment(word="is", start=1.0, end=1.2, confidence=0.98),
+    WordSegment(word="the", start=1.21, end=1.3, confidence=0.98),
+    WordSegment(word="long-term", start=1.5, end=2.0, confidence=0.97),
+    WordSegment(word="plan.", start=2.05, end=2.4, confidence=0.97),
+    WordSegment(word="Tactics", start=5.0, end=5.5, confidence=0.99),
+    WordSegment(word="are", start=5.55, end=5.7, confidence=0.99),
+    WordSegment(word="short-term", start=6.0, end=6.5, confidence=0.97),
+    WordSegment(word="actions", start=8.0, end=8.4, confidence=0.97),
+])
+
+
+def test_timed_lines_break_on_length_sentence_and_pause():
+    assert encode_timed_lines(WORDS).splitlines() == [
+        "t=0.5 Strategy is the long-term",  # đủ 4 word
+        "t=2.0 plan.",  # hết câu
+        "t=5.0 Tactics are short-term",
+        "t=8.0 actions",  # khoảng lặng 1.5s
+    ]
+
+
+def test_timed_lines_drop_confidence_and_json_keys():
+    lines = encode_timed_lines(WORDS)
+
+    assert "0.99" not in lines and "confidence" not in lines and "start" not in lines
+    assert estimate_tokens(lines) * 3 < estimate_tokens(encode_words_json(WORDS))
+
+
+def test_estimate_tokens_counts_digits_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hello") == 2
+    assert estimate_tokens("t=12.3") == 6
+    assert estimate_tokens("a b c") == 3
+
+
+@pytest.mark.parametrize("prompt_format", ["lines", "json"])
+def test_extractor_builds_prompt_in_configured_format(prompt_format):
+    extractor = GeminiKeywordExtractor(api_keys=["test-key"], prompt_format=prompt_format)
+
+    prompt = extractor._build_user_prompt(WORDS, "Strategy is the long-term plan.")
+
+    if prompt_format == "lines":
+        assert "t=5.0 Tactics are short-term" in prompt
+        assert '"word"' not in prompt
+    else:
+        assert '"confidence": 0.99' in prompt
+        assert "Strategy is the long-term plan." in prompt
+
+
+def test_prompt_format_changes_cache_fingerprint():
+    lines = GeminiKeywordExtractor(api_keys=["test-key"], prompt_format="lines")
+    legacy = GeminiKeywordExtractor(api_keys=["test-key"], prompt_format="json")
+
+    assert lines.cache_fingerprint != legacy.cache_fingerprint
+    with pytest.raises(ValueError):
+        GeminiKeywordExtractor(api_keys=["test-key"], prompt_format="xml")
+
+
+def test_legacy_json_format_stays_default_until_live_regression_is_recorded():
+    assert Settings.model_fields["KEYWORD_PROMPT_FORMAT"].default == PROMPT_FORMAT_JSON
+
+
+def test_compact_prompt_keeps_snap_accuracy():
+    """Timestamp nội suy từ dòng t= vẫn snap về đúng word như khi LLM thấy start chính xác"""
+    extractor = GeminiKeywordExtractor(api_keys=["test-key"])
+    transcript = Transcript(full_text="...", words=WORDS)
+    # "long-term" (word thứ 4 của dòng t=0.5, dòng sau t=2.0) → nội suy 0.5 + 3 * 1.5 / 4
+    raw = '[{"text": "Long term", "start": 1.625, "end": 6.7, "mode": "BOTTOM_TITLE", "position": "bottom_center"}]'
+
+    overlays = extractor._parse_and_validate(raw, transcript)
+
+    assert overlays[0].start == 1.5
@@ -0,0 +1,161 @@
+"""
+Unit tests cho S3RangeReader / S3RangeProxy — S3 là fake in-memory, không cần AWS thật
+"""
+
+import io
+import os
+import re
+
+import httpx
+import pytest
+
+from src.shared.storage.range_reader import S3RangeProxy, S3RangeReader
+
+OBJECT = os.urandom(1_000_000)
+
+
+class _FakeBody:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def read(self):
+        return self.data
+
+
+class _FakeS3:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.ranges: list[str] = []
+
+    async def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.data), "ContentType": "video/mp4"}
+
+    async def get_object(self, Bucket, Key, Range):
+        self.ranges.append(Range)
+        start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", Range).groups())
+        return {"Body": _FakeBody(self.data[start:end + 1])}
+
+
+class _FakeClientManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def get_client(self):
+        return self.client
+
+
+def _reader(block_size=64 * 1024, cache_blocks=8, readahead_blocks=0):
+    s3 = _FakeS3(OBJECT)
+    reader = S3RangeReader(
+        "uploads/x/a.mp4",
+        bucket_name="ocv-storage",
+        client_manager=_FakeClientManager(s3),
+        block_size=block_size,
+        cache_blocks=cache_blocks,
+        readahead_blocks=readahead_blocks,
+    )
+    return reader, s3
+
+
+@pytest.mark.asyncio
+async def test_seek_and_read_only_fetch_touched_blocks():
+    reader, s3 = _reader()
+
+    head = await reader.read(100)
+    await reader.seek(-50, io.SEEK_END)
+    tail = await reader.read()
+
+    assert head == OBJECT[:100]
+    assert tail == OBJECT[-50:]
+    assert reader.tell() == len(OBJECT)
+    assert len(s3.ranges) == 2
+    assert reader.bytes_fetched == 64 * 1024 + len(OBJECT) % (64 * 1024)
+
+
+@pytest.mark.asyncio
+async def test_cached_blocks_are_not_refetched():
+    reader, s3 = _reader()
+
+    await reader.read_range(10, 200_000)
+    fetched = reader.bytes_fetched
+    data = await reader.read_range(70_000, 130_000)
+
+    assert data == OBJECT[70_000:130_000]
+    assert reader.bytes_fetched == fetched
+    # 4 block thiếu liền nhau → 1 ranged GET
+    assert s3.ranges == ["bytes=0-262143"]
+
+
+@pytest.mark.asyncio
+async def test_range_larger_than_cache_is_still_correct():
+    reader, _ = _reader(block_size=4096, cache_blocks=2)
+
+    assert await reader.read_range(1000, 50_000) == OBJECT[1000:50_000]
+
+
+@pytest.mark.asyncio
+async def test_long_sequential_read_switches_to_prefetched_chunks():
+    reader, s3 = _reader(readahead_blocks=4)
+
+    data = b"".join([chunk async for chunk in reader.iter_range(0, len(OBJECT))])
+
+    assert data == OBJECT
+    # 4 block đầu qua cache, phần còn lại mỗi GET 4 block
+    assert s3.ranges[:4] == [f"bytes={i * 65536}-{(i + 1) * 65536 - 1}" for i in range(4)]
+    assert s3.ranges[4:] == ["bytes=262144-524287", "bytes=524288-786431", "bytes=786432-999999"]
+    assert reader.bytes_fetched == len(OBJECT)
+
+
+@pytest.mark.asyncio
+async def test_closing_a_sequential_read_stops_prefetching():
+    reader, s3 = _reader(readahead_blocks=2)
+
+    chunks = reader.iter_range(0, len(OBJECT))
+    for _ in range(3):
+        await anext(chunks)
+    await chunks.aclose()
+
+    # 2 block warmup + chunk đang đọc; chunk prefetch kế tiếp bị huỷ hoặc không còn GET nào sau đó
+    assert len(s3.ranges) <= 4
+    assert reader.bytes_fetched < len(OBJECT) // 2
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("bytes=0-", (0, 1000)),
+    ("bytes=10-19", (10, 20)),
+    ("bytes=990-5000", (990, 1000)),
+    ("bytes=-100", (900, 1000)),
+    ("bytes=1000-", None),
+    ("bytes=5-2", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert S3RangeProxy._parse_range(header, 1000) == expected
+
+
+@pytest.mark.asyncio
+async def test_proxy_serves_ranges_over_http():
+    reader, s3 = _reader()
+
+    async with S3RangeProxy(reader) as url:
+        async with httpx.AsyncClient() as client:
+            head = await client.head(url)
+            partial = await client.get(url, headers={"Range": "bytes=500000-500099"})
+            full = await client.get(url)
+            invalid = await client.get(url, headers={"Range": "bytes=2000000-"})
+
+    assert url.endswith("/a.mp4")
+    assert head.headers["content-length"] == str(len(OBJECT))
+    assert head.headers["accept-ranges"] == "bytes"
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 500000-500099/{len(OBJECT)}"
+    assert partial.content == OBJECT[500000:500100]
+    assert full.status_code == 200
+    assert full.content == OBJECT
+    assert invalid.status_code == 416
@@ -0,0 +1,86 @@
+"""
+Unit tests cho định tuyến session đọc: replica, fallback về primary sau khi chính client đó ghi
+"""
+
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api import main as api_main
+from src.shared.database import session as db_session
+
+
+def test_reads_use_primary_when_no_replica_configured(monkeypatch):
+    monkeypatch.setattr(db_session, "replica_session_maker", None)
+
+    assert db_session.read_session_maker() is db_session.async_session_maker
+
+
+def test_reads_use_replica_outside_a_tracked_request(monkeypatch):
+    replica = object()
+    monkeypatch.setattr(db_session, "replica_session_maker", replica)
+
+    assert db_session.read_session_maker() is replica
+
+
+def test_reads_fall_back_to_primary_only_for_the_client_that_wrote(monkeypatch):
+    monkeypatch.setattr(db_session, "replica_session_maker", object())
+    monkeypatch.setattr(db_session.settings, "DB_REPLICA_STALENESS_SECONDS", 5.0)
+
+    with db_session.track_client_writes(time.time() - 1):
+        assert db_session.read_session_maker() is db_session.async_session_maker
+    with db_session.track_client_writes(time.time() - 10):
+        assert db_session.read_session_maker() is db_session.replica_session_maker
+    # Client khác (không có dấu ghi) không bị kéo về primary
+    with db_session.track_client_writes(None):
+        assert db_session.read_session_maker() is db_session.replica_session_maker
+    with db_session.track_client_writes(time.time() + 3600):
+        assert db_session.read_session_maker() is db_session.replica_session_maker
+
+
+@pytest.mark.asyncio
+async def test_commit_marks_the_current_request_as_writer(monkeypatch):
+    async def commit(self):
+        pass
+
+    monkeypatch.setattr(AsyncSession, "commit", commit)
+    session = db_session.TrackedAsyncSession()
+
+    await session.commit()  # Ngoài request: không theo dõi
+    with db_session.track_client_writes() as writes:
+        assert not writes.wrote
+        await session.commit()
+    assert writes.wrote and writes.last_write_at is not None
+
+
+@pytest.mark.asyncio
+async def test_middleware_sets_cookie_after_write_and_honours_it(monkeypatch):
+    replica = object()
+    monkeypatch.setattr(db_session, "replica_session_maker", replica)
+    monkeypatch.setattr(api_main, "replica_engine", object())
+    monkeypatch.setattr(db_session.settings, "DB_REPLICA_STALENESS_SECONDS", 5.0)
+
+    app = FastAPI()
+    app.middleware("http")(api_main.read_your_writes)
+
+    @app.post("/write")
+    async def write():
+        db_session._client_writes.get().mark()
+        return {}
+
+    @app.get("/read")
+    async def read():
+        return {"primary": db_session.read_session_maker() is db_session.async_session_maker}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as writer:
+        assert (await writer.get("/read")).json() == {"primary": False}
+        response = await writer.post("/write")
+        assert api_main.LAST_WRITE_COOKIE in response.cookies
+        assert (await writer.get("/read")).json() == {"primary": True}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as other:
+        assert (await other.get("/read")).json() == {"primary": False}
@@ -0,0 +1,84 @@
+"""
+Unit tests cho S3ClientManager — client S3 dùng chung, không cần AWS thật
+"""
+
+import asyncio
+import pytest
+
+from src.shared.storage.s3_client import S3ClientManager
+
+
+class _FakeClientContext:
+    def __init__(self, registry: list):
+        self.registry = registry
+        self.closed = False
+
+    async def __aenter__(self):
+        self.registry.append(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+
+class _FakeSession:
+    def __init__(self):
+        self.created: list[_FakeClientContext] = []
+        self.kwargs: list[dict] = []
+
+    def client(self, service_name, **kwargs):
+        self.kwargs.append(kwargs)
+        return _FakeClientContext(self.created)
+
+
+def _make_manager(max_pool_connections: int = 7) -> tuple[S3ClientManager, _FakeSession]:
+    manager = S3ClientManager(max_pool_connections=max_pool_connections)
+    session = _FakeSession()
+    manager._session = session
+    return manager, session
+
+
+@pytest.mark.asyncio
+async def test_client_is_reused_across_calls():
+    manager, session = _make_manager()
+
+    first = await manager.get_client()
+    second = await manager.get_client()
+
+    assert first is second
+    assert len(session.created) == 1
+    assert session.kwargs[0]["config"].max_pool_connections == 7
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_use_opens_single_client():
+    manager, session = _make_manager()
+
+    clients = await asyncio.gather(*(manager.get_client() for _ in range(20)))
+
+    assert len(session.created) == 1
+    assert all(c is clients[0] for c in clients)
+
+
+@pytest.mark.asyncio
+async def test_close_releases_client_and_allows_reopen():
+    manager, session = _make_manager()
+
+    client = await manager.get_client()
+    await manager.close()
+    assert client.closed
+
+    reopened = await manager.get_client()
+    assert reopened is not client
+    assert len(session.created) == 2
+
+
+def test_client_is_recreated_on_new_event_loop():
+    """Mỗi asyncio.run (vd. Celery task) có loop riêng → cần client mới"""
+    manager, session = _make_manager()
+
+    first = asyncio.run(manager.get_client())
+    second = asyncio.run(manager.get_client())
+
+    assert first is not second
+    assert len(session.created) == 2
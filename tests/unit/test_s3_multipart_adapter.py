@@ -0,0 +1,97 @@
+"""
+Unit tests cho S3MultipartStorageAdapter với S3 client giả lập
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.modules.video_upload.infrastructure.adapters.s3_multipart import S3MultipartStorageAdapter
+
+
+class _FakePaginator:
+    def __init__(self, pages: list[dict]):
+        self.pages = pages
+        self.calls: list[dict] = []
+
+    def paginate(self, **kwargs):
+        self.calls.append(kwargs)
+        pages = self.pages
+
+        async def _iter():
+            for page in pages:
+                yield page
+
+        return _iter()
+
+
+def _make_adapter(s3_client) -> S3MultipartStorageAdapter:
+    client_manager = MagicMock()
+    client_manager.get_client = AsyncMock(return_value=s3_client)
+    return S3MultipartStorageAdapter(client_manager=client_manager)
+
+
+@pytest.mark.asyncio
+async def test_list_uploaded_parts_walks_all_pages():
+    paginator = _FakePaginator([
+        {"Parts": [
+            {"PartNumber": 1, "ETag": '"etag-1"', "Size": 10},
+            {"PartNumber": 2, "ETag": '"etag-2"', "Size": 10},
+        ], "IsTruncated": True},
+        {"Parts": [{"PartNumber": 4, "ETag": '"etag-4"', "Size": 7}], "IsTruncated": False},
+    ])
+    s3 = MagicMock()
+    s3.get_paginator.return_value = paginator
+    adapter = _make_adapter(s3)
+
+    parts = await adapter.list_uploaded_parts("uploads/v/a.mp4", "uid")
+
+    s3.get_paginator.assert_called_once_with("list_parts")
+    assert paginator.calls[0]["UploadId"] == "uid"
+    assert [p.part_number for p in parts] == [1, 2, 4]
+    assert parts[0].etag == "etag-1"
+    assert sum(p.size for p in parts) == 27
+
+
+@pytest.mark.asyncio
+async def test_list_uploaded_parts_handles_upload_without_parts():
+    s3 = MagicMock()
+    s3.get_paginator.return_value = _FakePaginator([{"IsTruncated": False}])
+    adapter = _make_adapter(s3)
+
+    assert await adapter.list_uploaded_parts("uploads/v/a.mp4", "uid") == []
+
+
+@pytest.mark.asyncio
+async def test_delete_objects_batches_by_1000_and_returns_failed_keys():
+    s3 = MagicMock()
+    s3.delete_objects = AsyncMock(side_effect=[
+        {"Errors": [{"Key": "k7", "Code": "AccessDenied"}]},
+        {},
+        {},
+    ])
+    adapter = _make_adapter(s3)
+    keys = [f"k{i}" for i in range(2500)]
+
+    failed = await adapter.delete_objects(keys)
+
+    batches = [call.kwargs["Delete"]["Objects"] for call in s3.delete_objects.call_args_list]
+    assert [len(b) for b in batches] == [1000, 1000, 500]
+    assert all(call.kwargs["Delete"]["Quiet"] for call in s3.delete_objects.call_args_list)
+    assert failed == ["k7"]
+
+
+@pytest.mark.asyncio
+async def test_list_object_keys_walks_prefix():
+    paginator = _FakePaginator([
+        {"Contents": [{"Key": "uploads/v/a.mp4"}, {"Key": "uploads/v/thumbnail.jpg"}]},
+        {"KeyCount": 0},
+    ])
+    s3 = MagicMock()
+    s3.get_paginator.return_value = paginator
+    adapter = _make_adapter(s3)
+
+    keys = await adapter.list_object_keys("uploads/v/")
+
+    s3.get_paginator.assert_called_once_with("list_objects_v2")
+    assert paginator.calls[0]["Prefix"] == "uploads/v/"
+    assert keys == ["uploads/v/a.mp4", "uploads/v/thumbnail.jpg"]
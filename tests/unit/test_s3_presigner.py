@@ -0,0 +1,126 @@
+"""
+Unit tests cho S3Presigner — URL ký local phải trùng khớp với botocore
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+from urllib.parse import parse_qsl, urlsplit
+
+import boto3
+import pytest
+from botocore.config import Config
+
+from src.shared.storage.s3_presigner import S3Presigner, SigningCredentials
+
+FIXED_NOW = datetime(2026, 3, 1, 12, 30, 0, tzinfo=timezone.utc)
+
+
+def _botocore_client(region: str, endpoint_url: str | None):
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key="secret",
+        endpoint_url=endpoint_url,
+        config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}),
+    )
+
+
+def _assert_same_url(ours: str, theirs: str) -> None:
+    a, b = urlsplit(ours), urlsplit(theirs)
+    assert (a.scheme, a.netloc, a.path) == (b.scheme, b.netloc, b.path)
+    assert dict(parse_qsl(a.query)) == dict(parse_qsl(b.query))
+
+
+@pytest.fixture
+def frozen_clock():
+    with patch("botocore.auth.get_current_datetime", return_value=FIXED_NOW.replace(tzinfo=None)), \
+         patch("src.shared.storage.s3_presigner.datetime") as mock_datetime:
+        mock_datetime.now.return_value = FIXED_NOW
+        yield
+
+
+@pytest.mark.parametrize("region,endpoint_url", [
+    ("us-east-1", None),
+    ("ap-southeast-1", None),
+    ("ap-southeast-1", "http://minio:9000"),
+])
+def test_upload_part_url_matches_botocore(frozen_clock, region, endpoint_url):
+    presigner = S3Presigner(
+        bucket_name="ocv-storage",
+        region=region,
+        endpoint_url=endpoint_url or "",
+        credentials=SigningCredentials("AKIDEXAMPLE", "secret"),
+    )
+    key = "uploads/abc/my video (1)+ü.mp4"
+
+    ours = presigner.presign_upload_part(key, "upload~id+/=", 7, expiration=900)
+    theirs = _botocore_client(region, endpoint_url).generate_presigned_url(
+        "upload_part",
+        Params={"Bucket": "ocv-storage", "Key": key, "UploadId": "upload~id+/=", "PartNumber": 7},
+        ExpiresIn=900,
+    )
+
+    _assert_same_url(ours, theirs)
+
+
+def test_download_url_with_filename_matches_botocore(frozen_clock):
+    presigner = S3Presigner(
+        bucket_name="ocv-storage",
+        region="us-east-1",
+        endpoint_url="",
+        credentials=SigningCredentials("AKIDEXAMPLE", "secret"),
+    )
+
+    ours = presigner.presign_get_object("uploads/x.mp4", filename="clip 1.mp4")
+    theirs = _botocore_client("us-east-1", None).generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": "ocv-storage",
+            "Key": "uploads/x.mp4",
+            "ResponseContentDisposition": 'attachment; filename="clip 1.mp4"',
+        },
+        ExpiresIn=3600,
+    )
+
+    _assert_same_url(ours, theirs)
+
+
+def test_session_token_is_included():
+    presigner = S3Presigner(
+        bucket_name="ocv-storage",
+        region="us-east-1",
+        endpoint_url="",
+        credentials=SigningCredentials("AKIDEXAMPLE", "secret", token="session-token"),
+    )
+
+    query = dict(parse_qsl(urlsplit(presigner.presign_get_object("a.mp4")).query))
+
+    assert query["X-Amz-Security-Token"] == "session-token"
+
+
+def test_expiration_out_of_range_is_rejected():
+    presigner = S3Presigner(
+        bucket_name="ocv-storage",
+        region="us-east-1",
+        endpoint_url="",
+        credentials=SigningCredentials("AKIDEXAMPLE", "secret"),
+    )
+
+    with pytest.raises(ValueError):
+        presigner.presign_get_object("a.mp4", expiration=8 * 24 * 3600)
+
+
+def test_batch_presign_matches_single_part_urls(frozen_clock):
+    presigner = S3Presigner(
+        bucket_name="ocv-storage",
+        region="us-east-1",
+        endpoint_url="",
+        credentials=SigningCredentials("AKIDEXAMPLE", "secret"),
+    )
+
+    batch = presigner.presign_upload_parts("uploads/x.mp4", "uid", [3, 1, 2])
+
+    assert list(batch) == [3, 1, 2]
+    for part_number, url in batch.items():
+        assert url == presigner.presign_upload_part("uploads/x.mp4", "uid", part_number)
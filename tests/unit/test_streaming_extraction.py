@@ -0,0 +1,140 @@
+"""
+Unit tests cho streaming extraction: parser JSON array tăng dần, structured output, giữ overlay khi response bị cắt
+"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.modules.video_processing.domain.value_objects import Transcript, WordSegment
+from src.modules.video_processing.infrastructure.adapters.gemini_key_pool import GeminiKeyPool
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import (
+    MAX_RETRIES,
+    GeminiKeywordExtractor,
+    OverlayCandidate,
+)
+from src.modules.video_processing.infrastructure.adapters.json_stream import JsonArrayStreamParser
+
+ITEMS = [
+    {"text": "Strategy", "start": 0.5, "end": 5.5, "mode": "CINEMATIC_CALLOUT", "position": "left",
+     "reason": 'says "long-term" [plan] {x}'},
+    {"text": "Tactics", "start": 10.0, "end": 15.0, "mode": "BOTTOM_TITLE", "position": "bottom_center"},
+    {"text": "Chess board game", "start": 20.0, "end": 27.0, "mode": "B_ROLL_VIDEO", "position": "left",
+     "search_query": "chess", "highlight_word": "chess\\u00e9"},
+]
+RAW = json.dumps(ITEMS)
+
+TRANSCRIPT = Transcript(
+    full_text="strategy tactics chess",
+    words=[
+        WordSegment(word="Strategy", start=0.5, end=1.0, confidence=0.9),
+        WordSegment(word="Tactics", start=10.0, end=10.5, confidence=0.9),
+        WordSegment(word="chess", start=20.0, end=20.4, confidence=0.9),
+    ],
+)
+
+
+def _feed_in_chunks(text, size):
+    parser, items = JsonArrayStreamParser(), []
+    for i in range(0, len(text), size):
+        items += parser.feed(text[i:i + size])
+    return parser, items
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, len(RAW)])
+def test_parser_emits_items_for_any_chunking(size):
+    parser, items = _feed_in_chunks("```json\n" + RAW + "\n```", size)
+
+    parser.close()
+    assert items == ITEMS
+
+
+def test_parser_emits_each_item_as_soon_as_it_closes():
+    parser = JsonArrayStreamParser()
+    first_end = RAW.index("}, {") + 1
+
+    assert parser.feed(RAW[:first_end - 1]) == []
+    assert parser.feed(RAW[first_end - 1:first_end]) == [ITEMS[0]]
+
+
+def test_parser_keeps_complete_items_of_truncated_response():
+    parser, items = _feed_in_chunks(RAW[:-40], 5)
+
+    assert items == ITEMS[:2]
+    with pytest.raises(ValueError, match="Truncated"):
+        parser.close()
+
+
+def test_parser_skips_malformed_item_and_rejects_non_array():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[{"a": 1}, {"b": }, {"c": 3}]') == [{"a": 1}, {"c": 3}]
+    assert parser.items_invalid == 1
+
+    with pytest.raises(ValueError):
+        JsonArrayStreamParser().feed('{"text": "x"}')
+    with pytest.raises(ValueError):
+        JsonArrayStreamParser().close()
+
+
+async def _stream(text, chunk_size=10, error=None):
+    for i in range(0, len(text), chunk_size):
+        yield MagicMock(text=text[i:i + chunk_size])
+    if error is not None:
+        raise error
+
+
+def _extractor():
+    pool = GeminiKeyPool(["test-key"], requests_per_minute=6000, burst=10)
+    return GeminiKeywordExtractor(api_keys=["test-key"], key_pool=pool)
+
+
+def _extract_with(*responses):
+    client = MagicMock()
+    client.aio.models.generate_content_stream = AsyncMock(side_effect=list(responses))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_extract_requests_structured_output_and_snaps_items():
+    client = _extract_with(_stream(RAW))
+    with patch("src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client", return_value=client):
+        extraction = await _extractor().extract_detailed(TRANSCRIPT)
+
+    overlays = extraction.overlays
+    assert [o.text for o in overlays] == ["Strategy", "Tactics", "Chess board game"]
+    assert extraction.complete
+    config = client.aio.models.generate_content_stream.call_args.kwargs["config"]
+    assert config.response_mime_type == "application/json"
+    assert config.response_schema == list[OverlayCandidate]
+
+
+@pytest.mark.asyncio
+async def test_truncated_response_is_salvaged_without_retry():
+    client = _extract_with(_stream(RAW[:-40]))
+    with patch("src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client", return_value=client):
+        extraction = await _extractor().extract_detailed(TRANSCRIPT)
+
+    assert [o.text for o in extraction.overlays] == ["Strategy", "Tactics"]
+    assert not extraction.complete
+    assert client.aio.models.generate_content_stream.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_error_after_items_keeps_them():
+    client = _extract_with(_stream(RAW[:-40], error=ConnectionResetError("reset")))
+    with patch("src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client", return_value=client):
+        overlays = await _extractor().extract(TRANSCRIPT)
+
+    assert len(overlays) == 2
+
+
+@pytest.mark.asyncio
+async def test_response_without_items_is_retried():
+    responses = [_stream("I cannot help with that.") for _ in range(MAX_RETRIES)] + [_stream(RAW)]
+    client = _extract_with(*responses)
+    with patch("src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client", return_value=client):
+        overlays = await _extractor().extract(TRANSCRIPT)
+
+    assert len(overlays) == 3
+    assert client.aio.models.generate_content_stream.await_count == MAX_RETRIES + 1
@@ -0,0 +1,260 @@
+"""
+Unit tests cho streaming pipeline: S3MultipartWriter, timeline auto-editor,
+ffmpeg stdout → sink, và bước silence removal trong ProcessVideoJobUseCase
+"""
+
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+
+from src.modules.video_processing.application.handlers import ProcessVideoJobUseCase
+from src.modules.video_processing.domain.entities import VideoJob
+from src.modules.video_processing.domain.value_objects import JobStatus, TimestampRange
+from src.modules.video_processing.infrastructure.adapters.video_editor_adapter import AutoEditorAdapter
+from src.shared.storage.multipart_writer import S3MultipartWriter
+
+MiB = 1024 * 1024
+
+
+class _FakeS3:
+    def __init__(self, fail_part=None):
+        self.fail_part = fail_part
+        self.parts: dict[int, bytes] = {}
+        self.completed = None
+        self.aborted = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_multipart_upload(self, Bucket, Key, ContentType):
+        return {"UploadId": "uid"}
+
+    async def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if PartNumber == self.fail_part:
+            raise RuntimeError("upload_part failed")
+        self.parts[PartNumber] = Body
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload["Parts"]
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted = True
+
+
+class _FakeClientManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def get_client(self):
+        return self.client
+
+
+def _writer(s3, max_in_flight=2):
+    return S3MultipartWriter(
+        "outputs/a.mp4", "video/mp4",
+        bucket_name="ocv-storage",
+        client_manager=_FakeClientManager(s3),
+        part_size=5 * MiB,
+        max_in_flight=max_in_flight,
+    )
+
+
+@pytest.mark.asyncio
+async def test_writer_uploads_parts_as_they_fill():
+    s3 = _FakeS3()
+    data = bytes(range(256)) * (48 * 1024)  # 12 MiB
+
+    async with _writer(s3) as writer:
+        for offset in range(0, len(data), 1_000_000):
+            await writer.write(data[offset:offset + 1_000_000])
+
+    assert [len(s3.parts[n]) for n in sorted(s3.parts)] == [5 * MiB, 5 * MiB, 2 * MiB]
+    assert b"".join(s3.parts[n] for n in sorted(s3.parts)) == data
+    assert [p["PartNumber"] for p in s3.completed] == [1, 2, 3]
+    assert s3.max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_writer_aborts_when_a_part_fails():
+    s3 = _FakeS3(fail_part=1)
+
+    with pytest.raises(RuntimeError):
+        async with _writer(s3) as writer:
+            for _ in range(4):
+                await writer.write(b"x" * (5 * MiB))
+
+    assert s3.aborted
+    assert s3.completed is None
+
+
+@pytest.mark.asyncio
+async def test_writer_completes_empty_stream_with_single_part():
+    s3 = _FakeS3()
+
+    async with _writer(s3):
+        pass
+
+    assert s3.parts == {1: b""}
+    assert len(s3.completed) == 1
+
+
+# Layout của auto-editor --export v3: chỉ có clip cho đoạn giữ lại, "start" trên timeline
+# output (liền nhau), "offset" trên source (có khoảng trống ở chỗ bị cắt)
+V3_TIMELINE = {
+    "version": "3",
+    "timebase": "30/1",
+    "background": "#000000",
+    "resolution": [1280, 720],
+    "samplerate": 48000,
+    "layout": "stereo",
+    "v": [[
+        {"name": "video", "src": "in.mp4", "start": 0, "dur": 45, "offset": 0, "speed": 1.0, "stream": 0},
+        {"name": "video", "src": "in.mp4", "start": 45, "dur": 60, "offset": 90, "speed": 1.0, "stream": 0},
+        {"name": "video", "src": "in.mp4", "start": 105, "dur": 30, "offset": 150, "speed": 1.0, "stream": 0},
+    ]],
+    "a": [[
+        {"name": "audio", "src": "in.mp4", "start": 0, "dur": 45, "offset": 0, "speed": 1.0, "volume": 1, "stream": 0},
+        {"name": "audio", "src": "in.mp4", "start": 45, "dur": 60, "offset": 90, "speed": 1.0, "volume": 1, "stream": 0},
+        {"name": "audio", "src": "in.mp4", "start": 105, "dur": 30, "offset": 150, "speed": 1.0, "volume": 1, "stream": 0},
+    ]],
+}
+
+
+def test_parse_v3_timeline_maps_clips_to_source_ranges():
+    ranges = AutoEditorAdapter._parse_v3_timeline(V3_TIMELINE)
+
+    # Clip 2 và 3 liền nhau trên source (90..150, 150..180) → gộp
+    assert ranges == [TimestampRange(start=0.0, end=1.5), TimestampRange(start=3.0, end=6.0)]
+
+
+def test_parse_v3_timeline_uses_audio_layer_for_audio_only_input():
+    timeline = {**V3_TIMELINE, "v": [], "resolution": None}
+
+    assert AutoEditorAdapter._parse_v3_timeline(timeline) == AutoEditorAdapter._parse_v3_timeline(V3_TIMELINE)
+
+
+def test_parse_v3_timeline_scales_source_length_by_speed():
+    timeline = {**V3_TIMELINE, "v": [[
+        {"name": "video", "src": "in.mp4", "start": 0, "dur": 30, "offset": 60, "speed": 2.0, "stream": 0},
+    ]]}
+
+    assert AutoEditorAdapter._parse_v3_timeline(timeline) == [TimestampRange(start=2.0, end=4.0)]
+
+
+def test_stream_command_writes_fragmented_mp4_to_stdout():
+    cmd = AutoEditorAdapter._build_stream_command(
+        "http://127.0.0.1:1234/a.mp4",
+        [TimestampRange(start=0.0, end=1.5), TimestampRange(start=3.0, end=5.0)],
+    )
+
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "between(t,0.000,1.500)+between(t,3.000,5.000)" in graph
+    assert "frag_keyframe+empty_moov+default_base_moof" in cmd
+    assert cmd[-1] == "pipe:1"
+
+
+@pytest.mark.asyncio
+async def test_stream_remove_silence_pipes_stdout_into_sink(tmp_path):
+    adapter = AutoEditorAdapter(temp_dir=str(tmp_path))
+    real_exec = asyncio.create_subprocess_exec
+
+    async def fake_exec(*cmd, **kwargs):
+        # ffmpeg giả: ghi 3 MiB ra stdout theo từng đoạn
+        script = "import sys\nfor _ in range(3): sys.stdout.buffer.write(b'm' * 1048576)"
+        return await real_exec(sys.executable, "-c", script, **kwargs)
+
+    async def fake_ranges(source_url):
+        return [TimestampRange(start=0.0, end=1.0)]
+
+    received = []
+
+    async def sink(chunk):
+        received.append(chunk)
+
+    with patch.object(adapter, "detect_kept_ranges", fake_ranges), \
+         patch("asyncio.create_subprocess_exec", fake_exec):
+        written = await adapter.stream_remove_silence("http://127.0.0.1:1/a.mp4", sink)
+
+    assert written == 3 * MiB
+    assert b"".join(received) == b"m" * (3 * MiB)
+
+
+class _FakeRepo:
+    def __init__(self, job):
+        self.job = job
+
+    async def get_by_id(self, job_id):
+        return self.job
+
+    async def save(self, job):
+        self.job = job
+
+    async def update_status(self, job):
+        self.job = job
+
+
+class _FakeWriter:
+    def __init__(self):
+        self.data = bytearray()
+
+    async def write(self, chunk):
+        self.data += chunk
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.writers = {}
+
+    @asynccontextmanager
+    async def open_range_url(self, remote_path):
+        yield f"http://127.0.0.1:9/{remote_path}"
+
+    @asynccontextmanager
+    async def open_stream_writer(self, remote_path, content_type):
+        writer = self.writers[remote_path] = _FakeWriter()
+        yield writer
+
+
+class _FakeEditor:
+    def __init__(self, error=None):
+        self.error = error
+        self.sources = []
+
+    async def stream_remove_silence(self, source_url, sink):
+        self.sources.append(source_url)
+        if self.error:
+            raise self.error
+        await sink(b"fmp4")
+        return 4
+
+
+@pytest.mark.asyncio
+async def test_process_job_streams_silence_removal_to_storage():
+    job = VideoJob(user_id=1, input_file_path="uploads/x/in.mp4")
+    storage, editor = _FakeStorage(), _FakeEditor()
+
+    result = await ProcessVideoJobUseCase(_FakeRepo(job), video_editor=editor, storage=storage).execute(job.id)
+
+    output_path = f"outputs/{job.id}/silence_removed.mp4"
+    assert editor.sources == ["http://127.0.0.1:9/uploads/x/in.mp4"]
+    assert storage.writers[output_path].data == b"fmp4"
+    assert result.output_file_paths == [output_path]
+    assert result.status == JobStatus.PROCESSING
+
+
+@pytest.mark.asyncio
+async def test_process_job_marks_failed_when_silence_removal_fails():
+    job = VideoJob(user_id=1, input_file_path="uploads/x/in.mp4")
+    editor = _FakeEditor(error=RuntimeError("ffmpeg failed"))
+
+    result = await ProcessVideoJobUseCase(_FakeRepo(job), video_editor=editor, storage=_FakeStorage()).execute(job.id)
+
+    assert result.status == JobStatus.FAILED
+    assert result.output_file_paths == []
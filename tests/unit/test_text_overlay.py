@@ -101,6 +101,12 @@ class TestRenderConfig:
 
 # ── GeminiKeywordExtractor mock test ─────────────────────────────────────────
 
+async def _stream(text: str, chunk_size: int = 16):
+    """Giả lập generate_content_stream: trả response theo từng chunk"""
+    for i in range(0, len(text), chunk_size):
+        yield MagicMock(text=text[i:i + chunk_size])
+
+
 class TestGeminiKeywordExtractor:
     """Test extractor với mock Gemini API — không cần API key thật"""
 
@@ -111,8 +117,9 @@ class TestGeminiKeywordExtractor:
                 WordSegment(word="Strategy", start=0.5, end=1.0, confidence=0.99),
                 WordSegment(word="is", start=1.0, end=1.2, confidence=0.98),
                 WordSegment(word="long-term", start=1.5, end=2.0, confidence=0.97),
-                WordSegment(word="Tactics", start=5.0, end=5.5, confidence=0.99),
-                WordSegment(word="short-term", start=6.0, end=6.5, confidence=0.97),
+                # Câu thứ hai bắt đầu ở 7.5s: overlay TACTICS snap vào đây, cách STRATEGY đủ min-gap 3s
+                WordSegment(word="Tactics", start=7.5, end=8.0, confidence=0.99),
+                WordSegment(word="short-term", start=8.5, end=9.0, confidence=0.97),
             ],
         )
 
@@ -144,15 +151,15 @@ class TestGeminiKeywordExtractor:
         )
 
         with patch(
-            "src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor.genai.Client"
+            "src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client"
         ) as mock_client_cls:
             mock_client = MagicMock()
             mock_client_cls.return_value = mock_client
-            mock_client.models.generate_content.return_value = MagicMock(
-                text=self._make_mock_response()
+            mock_client.aio.models.generate_content_stream = AsyncMock(
+                return_value=_stream(self._make_mock_response())
             )
 
-            extractor = GeminiKeywordExtractor(api_key="test-key")
+            extractor = GeminiKeywordExtractor(api_keys=["test-key"])
             result = await extractor.extract(self._make_transcript())
 
         assert len(result) == 2
@@ -167,9 +174,9 @@ class TestGeminiKeywordExtractor:
         )
 
         with patch(
-            "src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor.genai.Client"
+            "src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client"
         ):
-            extractor = GeminiKeywordExtractor(api_key="test-key")
+            extractor = GeminiKeywordExtractor(api_keys=["test-key"])
             result = await extractor.extract(Transcript(full_text="   "))
 
         assert result == []
@@ -188,13 +195,13 @@ class TestGeminiKeywordExtractor:
         ])
 
         with patch(
-            "src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor.genai.Client"
+            "src.modules.video_processing.infrastructure.adapters.gemini_key_pool.genai.Client"
         ) as mock_client_cls:
             mock_client = MagicMock()
             mock_client_cls.return_value = mock_client
-            mock_client.models.generate_content.return_value = MagicMock(text=overlapping_response)
+            mock_client.aio.models.generate_content_stream = AsyncMock(return_value=_stream(overlapping_response))
 
-            extractor = GeminiKeywordExtractor(api_key="test-key")
+            extractor = GeminiKeywordExtractor(api_keys=["test-key"])
             transcript = Transcript(
                 full_text="First word. Too close. Valid word.",
                 words=[
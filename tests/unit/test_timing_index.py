@@ -0,0 +1,97 @@
+"""
+Unit tests cho WordTimingIndex và snap-to-word trong GeminiKeywordExtractor
+"""
+
+import json
+import random
+
+import pytest
+
+from src.modules.video_processing.domain.timing_index import WordTimingIndex
+from src.modules.video_processing.domain.value_objects import WordSegment, WordTimings
+
+WORDS = WordTimings.from_segments([
+    WordSegment(word="Strategy", start=0.5, end=1.0, confidence=0.9),
+    WordSegment(word="is", start=1.0, end=1.2, confidence=0.9),
+    WordSegment(word="planning.", start=1.3, end=2.0, confidence=0.9),
+    WordSegment(word="Tactics", start=2.1, end=2.6, confidence=0.9),
+    WordSegment(word="are", start=2.6, end=2.8, confidence=0.9),
+    WordSegment(word="actions", start=2.9, end=3.4, confidence=0.9),
+    WordSegment(word="Next", start=5.0, end=5.3, confidence=0.9),  # sau khoảng lặng 1.6s
+    WordSegment(word="tactics,", start=5.4, end=5.9, confidence=0.9),
+])
+
+
+def _linear_nearest(starts, t, max_distance):
+    # Thuật toán cũ của _parse_and_validate
+    best, best_diff = None, max_distance
+    for start in starts:
+        if abs(start - t) < best_diff:
+            best, best_diff = start, abs(start - t)
+    return best
+
+
+def test_nearest_word_start_matches_linear_scan():
+    rng = random.Random(7)
+    words = WordTimings.from_segments(
+        WordSegment(word="w", start=s, end=s + 0.2, confidence=1.0)
+        for s in sorted(rng.uniform(0, 600) for _ in range(2000))
+    )
+    index = WordTimingIndex(words)
+
+    for _ in range(500):
+        t = rng.uniform(-5, 605)
+        assert index.nearest_word_start(t, 2.0) == _linear_nearest(words.starts, t, 2.0)
+
+
+def test_unsorted_words_are_indexed_by_start():
+    shuffled = list(WORDS)
+    random.Random(1).shuffle(shuffled)
+    index = WordTimingIndex(WordTimings.from_segments(shuffled))
+
+    assert index.nearest_word_start(2.05, 2.0) == 2.1
+    assert index.word_end_at(5.5) == 5.9
+
+
+def test_sentence_starts_use_punctuation_and_pauses():
+    index = WordTimingIndex(WORDS)
+
+    assert index.nearest_sentence_start(1.9, 0.6) == 2.1  # sau "planning."
+    assert index.nearest_sentence_start(4.6, 0.6) == 5.0  # sau khoảng lặng
+    assert index.nearest_sentence_start(1.2, 0.6) is None
+
+
+def test_word_end_at_only_extends_inside_a_word():
+    index = WordTimingIndex(WORDS)
+
+    assert index.word_end_at(2.3) == 2.6
+    assert index.word_end_at(4.0) is None
+
+
+def test_find_word_picks_nearest_occurrence():
+    index = WordTimingIndex(WORDS)
+
+    assert index.find_word("TACTICS", near=4.0, max_distance=3.0) == 5.4
+    assert index.find_word("tactics rule", near=1.0, max_distance=3.0) == 2.1
+    assert index.find_word("missing", near=1.0, max_distance=3.0) is None
+
+
+def test_extractor_snaps_overlays_to_transcript():
+    from src.modules.video_processing.domain.value_objects import Transcript
+    from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import (
+        GeminiKeywordExtractor,
+    )
+
+    extractor = GeminiKeywordExtractor(api_keys=["test-key"])
+
+    raw = json.dumps([
+        {"text": "TACTICS", "start": 1.8, "end": 2.7, "mode": "CINEMATIC_CALLOUT"},
+        {"text": "ACTIONS", "start": 3.1, "end": 3.2, "mode": "BOTTOM_TITLE"},
+        {"text": "b-roll", "start": 4.0, "end": 9.0, "mode": "B_ROLL_VIDEO",
+         "highlight_word": "Tactics", "search_query": "chess"},
+    ])
+    overlays = extractor._parse_and_validate(raw, Transcript(full_text="...", words=WORDS))
+
+    assert (overlays[0].start, overlays[0].end) == (2.1, 2.8)  # đầu câu, hết word "are"
+    assert (overlays[1].start, overlays[1].end) == (2.9, 3.4)  # word gần nhất, hết word
+    assert overlays[2].start == 5.4  # lần xuất hiện highlight_word gần nhất
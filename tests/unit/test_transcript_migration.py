@@ -0,0 +1,39 @@
+"""
+Unit tests cho codec đóng băng trong migration e8b3f6a1d924 (không phụ thuộc transcript_codec hiện tại)
+"""
+
+import importlib.util
+from pathlib import Path
+
+from src.modules.video_processing.domain.value_objects import WordTimings
+from src.modules.video_processing.infrastructure.transcript_codec import decode_words
+
+MIGRATION = Path(__file__).resolve().parents[2] / "alembic/versions/e8b3f6a1d924_add_video_job_transcripts.py"
+
+WORDS = [
+    {"word": "xin", "start": 0.0, "end": 0.25, "confidence": 0.9},
+    {"word": "chào", "start": 0.25, "end": 0.5, "confidence": 0.8},
+    {"word": "xin", "start": 1.0, "end": 1.25, "confidence": 0.7},
+]
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("transcript_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_migration_writes_v1_blobs_the_application_still_reads():
+    blob = _migration()._encode_words_v1(WORDS)
+
+    assert blob[3] == 1
+    assert decode_words(blob).to_dicts() == WORDS
+
+
+def test_downgrade_reads_both_v1_and_current_application_blobs():
+    migration = _migration()
+    current = WordTimings.from_segments(WORDS).to_bytes()
+
+    assert migration._decode_words(migration._encode_words_v1(WORDS)) == WORDS
+    assert migration._decode_words(current) == WORDS
@@ -0,0 +1,93 @@
+"""
+Unit tests cho unit_of_work và các lệnh ghi một round trip của repository
+"""
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.modules.video_processing.domain.entities import VideoJob
+from src.modules.video_processing.infrastructure.repositories import PostgresVideoRepository
+from src.modules.video_upload.infrastructure.repositories import VideoRepository
+from src.shared.database.unit_of_work import unit_of_work
+
+
+class _FakeResult:
+    rowcount = 1
+
+    def scalar_one_or_none(self):
+        return None
+
+
+class _FakeSession:
+    def __init__(self):
+        self.info = {}
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return _FakeResult()
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.mark.asyncio
+async def test_save_is_a_single_upsert_statement():
+    session = _FakeSession()
+
+    await PostgresVideoRepository(session).save(VideoJob(user_id=1, input_file_path="in.mp4"))
+
+    assert len(session.statements) == 1
+    assert session.statements[0].startswith("INSERT INTO video_jobs")
+    assert "ON CONFLICT (id) DO UPDATE" in session.statements[0]
+    assert "created_at = excluded.created_at" not in session.statements[0]
+    assert session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_uses_returning_without_prior_select():
+    session = _FakeSession()
+
+    assert await VideoRepository(session).delete(VideoJob(user_id=1, input_file_path="x").id) is False
+    assert len(session.statements) == 1
+    assert session.statements[0].startswith("DELETE FROM videos")
+    assert "RETURNING videos.id" in session.statements[0]
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_commits_once():
+    session = _FakeSession()
+    repo = PostgresVideoRepository(session)
+    job = VideoJob(user_id=1, input_file_path="in.mp4")
+
+    async with unit_of_work(session):
+        await repo.save(job)
+        job.mark_as_processing()
+        await repo.save(job)
+        async with unit_of_work(session):
+            job.mark_as_failed()
+            await repo.save(job)
+        assert session.commits == 0
+
+    assert len(session.statements) == 3
+    assert session.commits == 1
+    assert session.info == {}
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_rolls_back_on_error():
+    session = _FakeSession()
+
+    with pytest.raises(RuntimeError):
+        async with unit_of_work(session):
+            await PostgresVideoRepository(session).save(VideoJob(user_id=1, input_file_path="in.mp4"))
+            raise RuntimeError("boom")
+
+    assert session.commits == 0
+    assert session.rollbacks == 1
+    assert session.info == {}
@@ -0,0 +1,187 @@
+"""
+Unit tests cho ReapAbandonedUploadsUseCase — repo và S3 đều là fake
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.modules.video_upload.application.handlers import ReapAbandonedUploadsUseCase
+from src.modules.video_upload.domain.ports import UploadedPart
+
+NOW = datetime(2026, 3, 2, 12, 0, 0)
+
+
+def _video(upload_id="uid", age_hours=48):
+    video_id = uuid4()
+    return SimpleNamespace(
+        id=video_id,
+        s3_key=f"uploads/{video_id}/a.mp4",
+        upload_id=upload_id,
+        status="uploading",
+        created_at=NOW - timedelta(hours=age_hours),
+    )
+
+
+class _FakeRepo:
+    def __init__(self, videos):
+        self.videos = videos
+
+    async def find_stale_uploads(self, created_before, limit, after=None):
+        stale = sorted(
+            (v for v in self.videos if v.status == "uploading" and v.created_at < created_before),
+            key=lambda v: (v.created_at, v.id),
+        )
+        if after:
+            stale = [v for v in stale if (v.created_at, v.id) > after]
+        return stale[:limit]
+
+    async def bulk_update_status(self, video_ids, status, from_status=None):
+        updated = [
+            v for v in self.videos
+            if v.id in set(video_ids) and (from_status is None or v.status == from_status)
+        ]
+        for v in updated:
+            v.status = status
+        return len(updated)
+
+
+class _FakeStorage:
+    def __init__(self, parts_by_upload=None, failing_keys=(), gone_uploads=(), legacy_uploads=None):
+        self.parts_by_upload = parts_by_upload or {}
+        self.failing_keys = set(failing_keys)
+        self.gone_uploads = set(gone_uploads)
+        self.legacy_uploads = legacy_uploads or {}
+        self.aborted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def list_multipart_upload_ids(self, remote_path):
+        return self.legacy_uploads.get(remote_path, [])
+
+    async def list_uploaded_parts(self, remote_path, upload_id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        if remote_path in self.failing_keys:
+            raise RuntimeError("S3 unavailable")
+        if upload_id in self.gone_uploads:
+            raise ClientError({"Error": {"Code": "NoSuchUpload"}}, "ListParts")
+        return [UploadedPart(part_number=i + 1, etag="e", size=s)
+                for i, s in enumerate(self.parts_by_upload.get(upload_id, []))]
+
+    async def abort_multipart_upload(self, remote_path, upload_id):
+        self.aborted.append(upload_id)
+
+
+def _use_case(repo, storage, concurrency=8, batch_size=500):
+    return ReapAbandonedUploadsUseCase(
+        video_repo=repo,
+        storage=storage,
+        ttl=timedelta(hours=24),
+        concurrency=concurrency,
+        batch_size=batch_size,
+    )
+
+
+@pytest.mark.asyncio
+async def test_reaps_stale_uploads_and_reports_reclaimed_bytes():
+    stale = _video(upload_id="u1")
+    fresh = _video(upload_id="u2", age_hours=1)
+    repo = _FakeRepo([stale, fresh])
+    storage = _FakeStorage(parts_by_upload={"u1": [100, 50]})
+
+    result = await _use_case(repo, storage).execute(now=NOW)
+
+    assert storage.aborted == ["u1"]
+    assert stale.status == "abandoned"
+    assert fresh.status == "uploading"
+    assert result.videos_abandoned == 1
+    assert result.bytes_reclaimed == 150
+
+
+@pytest.mark.asyncio
+async def test_legacy_rows_without_upload_id_are_looked_up_by_key():
+    legacy = _video(upload_id=None)
+    repo = _FakeRepo([legacy])
+    storage = _FakeStorage(
+        parts_by_upload={"a": [10], "b": [20]},
+        legacy_uploads={legacy.s3_key: ["a", "b"]},
+    )
+
+    result = await _use_case(repo, storage).execute(now=NOW)
+
+    assert sorted(storage.aborted) == ["a", "b"]
+    assert result.aborted_uploads == 2
+    assert result.bytes_reclaimed == 30
+
+
+@pytest.mark.asyncio
+async def test_upload_gone_from_s3_is_not_counted_as_reaped():
+    video = _video(upload_id="gone")
+    repo = _FakeRepo([video])
+
+    result = await _use_case(repo, _FakeStorage(gone_uploads={"gone"})).execute(now=NOW)
+
+    assert video.status == "uploading"
+    assert result.aborted_uploads == 0 and result.videos_abandoned == 0
+
+
+@pytest.mark.asyncio
+async def test_upload_completed_during_reap_stays_completed():
+    video = _video(upload_id="racing")
+    repo = _FakeRepo([video])
+    storage = _FakeStorage()
+
+    async def abort_after_complete(remote_path, upload_id):
+        video.status = "completed"  # /complete thắng trước UPDATE
+
+    storage.abort_multipart_upload = abort_after_complete
+    result = await _use_case(repo, storage).execute(now=NOW)
+
+    assert video.status == "completed"
+    assert result.videos_abandoned == 0
+
+
+@pytest.mark.asyncio
+async def test_failures_stay_uploading_for_next_run():
+    ok, broken = _video(upload_id="ok"), _video(upload_id="broken")
+    repo = _FakeRepo([ok, broken])
+    storage = _FakeStorage(failing_keys={broken.s3_key})
+
+    result = await _use_case(repo, storage, batch_size=1).execute(now=NOW)
+
+    assert ok.status == "abandoned"
+    assert broken.status == "uploading"
+    assert result.videos_abandoned == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    repo = _FakeRepo([_video(upload_id=f"u{i}") for i in range(20)])
+    storage = _FakeStorage()
+
+    await _use_case(repo, storage, concurrency=3).execute(now=NOW)
+
+    assert len(storage.aborted) == 20
+    assert storage.max_in_flight <= 3
+
+
+@pytest.mark.asyncio
+async def test_full_batches_of_failures_do_not_block_newer_stale_uploads():
+    broken = [_video(upload_id=f"broken{i}", age_hours=72) for i in range(5)]
+    reapable = _video(upload_id="ok", age_hours=48)
+    repo = _FakeRepo([*broken, reapable])
+    storage = _FakeStorage(failing_keys={v.s3_key for v in broken})
+
+    result = await _use_case(repo, storage, batch_size=2).execute(now=NOW)
+
+    assert reapable.status == "abandoned"
+    assert all(v.status == "uploading" for v in broken)
+    assert result.scanned == 6
+    assert result.videos_abandoned == 1
@@ -0,0 +1,64 @@
+"""
+Unit tests cho request/response schemas của module video_upload
+"""
+
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from src.modules.video_upload.api.schemas import BulkDeleteRequest, GetPresignedUrlsBatchRequest
+
+
+class TestGetPresignedUrlsBatchRequest:
+    def test_range_selection(self):
+        request = GetPresignedUrlsBatchRequest(
+            video_id=uuid4(), upload_id="uid", start_part=5, count=3
+        )
+        assert request.resolve_part_numbers() == [5, 6, 7]
+
+    def test_range_is_clamped_to_s3_part_limit(self):
+        request = GetPresignedUrlsBatchRequest(
+            video_id=uuid4(), upload_id="uid", start_part=9_999, count=10
+        )
+        assert request.resolve_part_numbers() == [9_999, 10_000]
+
+    def test_explicit_part_numbers_are_deduplicated_and_sorted(self):
+        request = GetPresignedUrlsBatchRequest(
+            video_id=uuid4(), upload_id="uid", part_numbers=[4, 2, 4, 9]
+        )
+        assert request.resolve_part_numbers() == [2, 4, 9]
+
+    def test_requires_exactly_one_selection(self):
+        with pytest.raises(ValidationError):
+            GetPresignedUrlsBatchRequest(video_id=uuid4(), upload_id="uid")
+        with pytest.raises(ValidationError):
+            GetPresignedUrlsBatchRequest(
+                video_id=uuid4(), upload_id="uid", part_numbers=[1], start_part=1
+            )
+
+    def test_rejects_out_of_range_part_numbers(self):
+        with pytest.raises(ValidationError):
+            GetPresignedUrlsBatchRequest(
+                video_id=uuid4(), upload_id="uid", part_numbers=[0, 1]
+            )
+        with pytest.raises(ValidationError):
+            GetPresignedUrlsBatchRequest(
+                video_id=uuid4(), upload_id="uid", part_numbers=list(range(1, 1_002))
+            )
+
+
+class TestBulkDeleteRequest:
+    def test_filter_needs_a_criterion(self):
+        with pytest.raises(ValidationError):
+            BulkDeleteRequest.model_validate({"filter": {}})
+
+    def test_filter_with_status(self):
+        request = BulkDeleteRequest.model_validate({"filter": {"status": "failed"}})
+        assert request.filter.status == "failed"
+
+    def test_requires_exactly_one_target(self):
+        with pytest.raises(ValidationError):
+            BulkDeleteRequest.model_validate({})
+        with pytest.raises(ValidationError):
+            BulkDeleteRequest.model_validate({"video_ids": [str(uuid4())], "filter": {"status": "failed"}})
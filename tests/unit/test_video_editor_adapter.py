@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.modules.video_processing.infrastructure.adapters.video_editor_adapter import AutoEditorAdapter
 import asyncio
 
@@ -9,7 +9,7 @@ async def test_auto_editor_adapter_success():
     
     # Mock asyncio.create_subprocess_exec
     mock_process = MagicMock()
-    mock_process.communicate.return_value = (b"output", b"error")
+    mock_process.communicate = AsyncMock(return_value=(b"output", b"error"))
     mock_process.returncode = 0
     
     with patch("asyncio.create_subprocess_exec", return_value=mock_process) as mock_exec:
@@ -27,7 +27,7 @@ async def test_auto_editor_adapter_failure():
     adapter = AutoEditorAdapter(temp_dir="/tmp/test")
     
     mock_process = MagicMock()
-    mock_process.communicate.return_value = (b"", b"Some error")
+    mock_process.communicate = AsyncMock(return_value=(b"", b"Some error"))
     mock_process.returncode = 1
     
     with patch("asyncio.create_subprocess_exec", return_value=mock_process):
@@ -30,3 +30,13 @@ def test_video_job_failed():
     job = VideoJob(user_id=1, input_file_path="test.mp4")
     job.mark_as_failed()
     assert job.status == JobStatus.FAILED
+
+
+def test_serializing_job_never_includes_or_loads_transcript():
+    job = VideoJob(user_id=1, input_file_path="test.mp4", transcript=Transcript(full_text="hello"))
+    listed = VideoJob(user_id=1, input_file_path="test.mp4")
+    listed.defer_transcript()
+
+    assert "transcript" not in job.model_dump()
+    assert "transcript" not in listed.model_dump_json()
+    assert job.transcript.full_text == "hello"
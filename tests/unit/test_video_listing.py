@@ -0,0 +1,118 @@
+"""
+Unit tests cho keyset pagination /uploads/my-videos — cursor và SQL sinh ra
+"""
+
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.modules.video_upload.api.schemas import VideoListCursor
+from src.modules.video_upload.infrastructure.repositories import VideoRepository
+
+VIDEO_ID = UUID("7b0e4f6a-2d1c-4c7e-9b3a-5f2e8d1c0a9b")
+
+
+class _FakeResult:
+    def all(self):
+        return []
+
+    def scalars(self):
+        return self
+
+
+class _FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return _FakeResult()
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_cursor_round_trip():
+    cursor = VideoListCursor(created_at=datetime(2026, 3, 1, 12, 30, 5, 123456), id=VIDEO_ID)
+
+    decoded = VideoListCursor.decode(cursor.encode())
+
+    assert decoded == cursor
+    assert "=" not in cursor.encode()
+
+
+@pytest.mark.parametrize("value", ["", "not-base64!", "WyJ4Il0"])
+def test_invalid_cursor_is_rejected(value):
+    with pytest.raises(ValueError):
+        VideoListCursor.decode(value)
+
+
+@pytest.mark.asyncio
+async def test_first_page_query_projects_columns_and_orders_by_keyset():
+    session = _FakeSession()
+
+    await VideoRepository(session).list_by_user(user_id=None, limit=51)
+
+    sql = _sql(session.statements[0])
+    assert sql.startswith("SELECT videos.id, videos.original_filename, videos.status")
+    assert "videos.s3_key" not in sql
+    assert "videos.user_id IS NULL" in sql
+    assert "ORDER BY videos.created_at DESC, videos.id DESC" in sql
+    assert "LIMIT 51" in sql
+
+
+@pytest.mark.asyncio
+async def test_next_page_query_filters_after_cursor_and_status():
+    session = _FakeSession()
+    after = (datetime(2026, 3, 1, 12, 0, 0), VIDEO_ID)
+
+    await VideoRepository(session).list_by_user(user_id=7, limit=21, after=after, status="completed")
+
+    sql = _sql(session.statements[0])
+    assert "videos.user_id = 7" in sql
+    assert "videos.status = 'completed'" in sql
+    assert "(videos.created_at, videos.id) < ('2026-03-01 12:00:00'" in sql
+
+
+@pytest.mark.asyncio
+async def test_my_videos_lists_the_same_owner_that_initiate_stores():
+    from src.modules.video_upload.api.routes import list_videos
+
+    session = _FakeSession()
+    await list_videos(db=session, user_id=7, limit=10, cursor=None, status=None)
+
+    assert "videos.user_id = 7" in _sql(session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_get_by_ids_can_be_scoped_to_an_owner():
+    session = _FakeSession()
+
+    await VideoRepository(session).get_by_ids([VIDEO_ID], user_id=7)
+
+    assert "videos.user_id = 7" in _sql(session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_status_only_moves_rows_still_in_from_status():
+    class _Result:
+        rowcount = 0
+
+    session = _FakeSession()
+    session.info = {}
+
+    async def execute(statement):
+        session.statements.append(statement)
+        return _Result()
+
+    async def commit():
+        pass
+
+    session.execute, session.commit = execute, commit
+    await VideoRepository(session).bulk_update_status([VIDEO_ID], "abandoned", from_status="uploading")
+
+    sql = _sql(session.statements[0])
+    assert "videos.id = ANY (ARRAY[" in sql and "videos.status = 'uploading'" in sql
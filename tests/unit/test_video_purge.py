@@ -0,0 +1,181 @@
+"""
+Unit tests cho PurgeVideosUseCase — repo và S3 đều là fake
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.modules.video_upload.application.handlers import PurgeVideosUseCase
+
+T0 = datetime(2026, 3, 1)
+
+
+def _video(status="completed", upload_id=None, age_days=1, user_id=1):
+    video_id = uuid4()
+    return SimpleNamespace(
+        id=video_id,
+        user_id=user_id,
+        s3_key=f"uploads/{video_id}/a.mp4",
+        upload_id=upload_id,
+        status=status,
+        created_at=T0 - timedelta(days=age_days),
+    )
+
+
+class _FakeRepo:
+    def __init__(self, videos, jobs=None):
+        self.videos = {v.id: v for v in videos}
+        self.jobs = jobs or {}  # s3_key → job ids
+        self.delete_calls = []
+
+    async def find_processing_job_ids(self, s3_keys):
+        return {key: self.jobs[key] for key in s3_keys if key in self.jobs}
+
+    async def get_by_ids(self, video_ids, user_id=None):
+        return [
+            self.videos[i] for i in video_ids
+            if i in self.videos and (user_id is None or self.videos[i].user_id == user_id)
+        ]
+
+    async def find_for_purge(self, user_id, limit, status=None, created_before=None, after=None):
+        matching = sorted(
+            (v for v in self.videos.values() if status is None or v.status == status),
+            key=lambda v: (v.created_at, v.id),
+        )
+        if after:
+            matching = [v for v in matching if (v.created_at, v.id) > after]
+        return matching[:limit]
+
+    async def delete_many(self, video_ids):
+        self.delete_calls.append(list(video_ids))
+        return [self.videos.pop(i).id for i in video_ids if i in self.videos]
+
+
+class _FakeStorage:
+    def __init__(self, objects, failing_keys=(), gone_uploads=()):
+        self.objects = set(objects)
+        self.failing_keys = set(failing_keys)
+        self.gone_uploads = set(gone_uploads)
+        self.delete_calls = []
+        self.aborted = []
+
+    async def list_object_keys(self, prefix):
+        return sorted(k for k in self.objects if k.startswith(prefix))
+
+    async def delete_objects(self, remote_paths):
+        self.delete_calls.append(list(remote_paths))
+        failed = [k for k in remote_paths if k in self.failing_keys]
+        self.objects -= set(remote_paths) - self.failing_keys
+        return failed
+
+    async def abort_multipart_upload(self, remote_path, upload_id):
+        if upload_id in self.gone_uploads:
+            raise ClientError({"Error": {"Code": "NoSuchUpload"}}, "AbortMultipartUpload")
+        self.aborted.append(upload_id)
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_all_objects_under_prefix_in_one_batch():
+    videos = [_video(), _video()]
+    objects = [f"uploads/{v.id}/{name}" for v in videos for name in ("a.mp4", "thumbnail.jpg")]
+    repo, storage = _FakeRepo(videos), _FakeStorage(objects)
+
+    result = await PurgeVideosUseCase(repo, storage).execute([v.id for v in videos])
+
+    assert len(storage.delete_calls) == 1
+    assert storage.objects == set()
+    assert sorted(result.deleted_video_ids) == sorted(v.id for v in videos)
+    assert result.deleted_objects == 4
+    assert len(repo.delete_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_render_outputs_of_the_video_jobs():
+    video, other = _video(), _video()
+    job_id, other_job_id = uuid4(), uuid4()
+    objects = [video.s3_key, f"outputs/{job_id}/silence_removed.mp4", f"outputs/{other_job_id}/silence_removed.mp4"]
+    repo = _FakeRepo([video, other], jobs={video.s3_key: [job_id], other.s3_key: [other_job_id]})
+    storage = _FakeStorage(objects)
+
+    result = await PurgeVideosUseCase(repo, storage).execute([video.id])
+
+    assert storage.objects == {f"outputs/{other_job_id}/silence_removed.mp4"}
+    assert result.deleted_objects == 2
+
+
+@pytest.mark.asyncio
+async def test_video_with_failed_object_delete_keeps_its_row():
+    ok, broken = _video(), _video()
+    storage = _FakeStorage([ok.s3_key, broken.s3_key], failing_keys=[broken.s3_key])
+    repo = _FakeRepo([ok, broken])
+
+    result = await PurgeVideosUseCase(repo, storage).execute([ok.id, broken.id])
+
+    assert result.deleted_video_ids == [ok.id]
+    assert result.failed_video_ids == [broken.id]
+    assert broken.id in repo.videos
+
+
+@pytest.mark.asyncio
+async def test_in_progress_upload_is_aborted_before_purge():
+    uploading = _video(status="uploading", upload_id="uid-1")
+    already_gone = _video(status="uploading", upload_id="uid-2")
+    storage = _FakeStorage([], gone_uploads=["uid-2"])
+
+    result = await PurgeVideosUseCase(_FakeRepo([uploading, already_gone]), storage).execute(
+        [uploading.id, already_gone.id]
+    )
+
+    assert storage.aborted == ["uid-1"]
+    assert len(result.deleted_video_ids) == 2
+
+
+@pytest.mark.asyncio
+async def test_purge_by_filter_only_touches_matching_videos():
+    failed, completed = _video(status="failed"), _video(status="completed")
+    repo = _FakeRepo([failed, completed])
+
+    result = await PurgeVideosUseCase(repo, _FakeStorage([])).execute_matching(user_id=None, status="failed")
+
+    assert result.deleted_video_ids == [failed.id]
+    assert list(repo.videos) == [completed.id]
+
+
+@pytest.mark.asyncio
+async def test_purge_by_filter_continues_past_full_batches_of_failures(monkeypatch):
+    monkeypatch.setattr(PurgeVideosUseCase, "BATCH_SIZE", 2)
+    broken = [_video(status="failed", age_days=10) for _ in range(4)]
+    purgeable = _video(status="failed", age_days=1)
+    storage = _FakeStorage([v.s3_key for v in broken], failing_keys=[v.s3_key for v in broken])
+    repo = _FakeRepo([*broken, purgeable])
+
+    result = await PurgeVideosUseCase(repo, storage).execute_matching(user_id=1, status="failed")
+
+    assert result.deleted_video_ids == [purgeable.id]
+    assert sorted(result.failed_video_ids) == sorted(v.id for v in broken)
+
+
+@pytest.mark.asyncio
+async def test_unknown_ids_are_ignored():
+    result = await PurgeVideosUseCase(_FakeRepo([]), _FakeStorage([])).execute([uuid4()])
+
+    assert result.deleted_video_ids == []
+    assert result.failed_video_ids == []
+
+
+@pytest.mark.asyncio
+async def test_ids_owned_by_another_user_are_reported_not_found():
+    mine, theirs = _video(user_id=1), _video(user_id=2)
+    storage = _FakeStorage([mine.s3_key, theirs.s3_key])
+    repo = _FakeRepo([mine, theirs])
+    missing = uuid4()
+
+    result = await PurgeVideosUseCase(repo, storage).execute([mine.id, theirs.id, missing], user_id=1)
+
+    assert result.deleted_video_ids == [mine.id]
+    assert result.not_found_video_ids == [theirs.id, missing]
+    assert theirs.id in repo.videos and theirs.s3_key in storage.objects
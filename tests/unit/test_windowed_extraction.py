@@ -0,0 +1,150 @@
+"""
+Unit tests cho windowed keyword extraction: chia window, gọi song song, ghép với ràng buộc toàn cục
+"""
+
+import asyncio
+import json
+import re
+
+import pytest
+
+from src.modules.video_processing.domain.value_objects import TextOverlayMode, Transcript, WordTimings
+from src.modules.video_processing.infrastructure.adapters.gemini_keyword_extractor import (
+    MAX_B_ROLLS,
+    MAX_OVERLAYS,
+    GeminiKeywordExtractor,
+    plan_windows,
+)
+
+_WINDOW_RE = re.compile(r"covering ([\d.]+)s to ([\d.]+)s")
+
+
+def _transcript(seconds: float) -> Transcript:
+    n = int(seconds * 2)
+    words = WordTimings(
+        [f"w{i}" for i in range(n)],
+        [i * 0.5 for i in range(n)],
+        [i * 0.5 + 0.4 for i in range(n)],
+        [0.9] * n,
+    )
+    return Transcript(full_text=" ".join(f"w{i}" for i in range(n)), words=words)
+
+
+class _FakeGemini:
+    """Trả về một callout mỗi 10s trong window (B-Roll mỗi 60s) + một callout nằm ở vùng chồng"""
+
+    def __init__(self, fail_parts=()):
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self.fail_parts = fail_parts
+
+    async def __call__(self, prompt: str):
+        self.prompts.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+
+        match = _WINDOW_RE.search(prompt)
+        start, end = (float(match.group(1)), float(match.group(2))) if match else (0.0, 60.0)
+        if match and round(start) in self.fail_parts:
+            raise RuntimeError("boom")
+
+        items, t = [], float(int(start) // 10 * 10 + 10)
+        while t + 5 < end:
+            b_roll = int(t) % 60 == 0
+            items.append({
+                "text": f"at {t:.0f}",
+                "start": t,
+                "end": t + 5.0,
+                "mode": "B_ROLL_VIDEO" if b_roll else "BOTTOM_TITLE",
+                "position": "bottom_center",
+                "search_query": "city" if b_roll else None,
+            })
+            t += 10
+        raw = json.dumps(items)
+        for i in range(0, len(raw), 256):
+            yield raw[i:i + 256]
+
+
+def _extractor(fake, window_seconds=600.0):
+    extractor = GeminiKeywordExtractor(api_keys=["test-key"], window_seconds=window_seconds, prompt_format="lines")
+    extractor._stream_gemini = fake
+    return extractor
+
+
+def test_short_transcript_is_not_windowed():
+    assert plan_windows(_transcript(500), 600, 30) == []
+    assert plan_windows(_transcript(3600), 0, 30) == []
+
+
+def test_windows_cover_every_word_and_split_overlap_ownership():
+    transcript = _transcript(3600)
+    windows = plan_windows(transcript, 600, 30)
+
+    assert len(windows) == 7
+    assert windows[0].first_word == 0 and windows[-1].last_word == len(transcript.words)
+    for prev, cur in zip(windows, windows[1:]):
+        assert cur.start < prev.end  # chồng nhau
+        assert cur.first_word < prev.last_word
+        assert prev.own_end == cur.own_start
+        assert prev.end - prev.start <= 600
+
+
+@pytest.mark.asyncio
+async def test_windowed_extraction_merges_with_global_limits():
+    fake = _FakeGemini()
+    extractor = _extractor(fake)
+
+    overlays = await extractor.extract(_transcript(3600))
+
+    assert len(fake.prompts) == 7
+    assert 1 < fake.peak <= extractor.window_concurrency
+    assert all("part " in p and "covering" in p for p in fake.prompts)
+    # Mỗi prompt chỉ chứa word của window đó
+    assert "t=0.0 w0 " in fake.prompts[0] and " w7199" not in fake.prompts[0]
+    assert " w7199" in fake.prompts[-1] and "t=0.0 w0 " not in fake.prompts[-1]
+
+    starts = [o.start for o in overlays]
+    assert starts == sorted(starts) and len(set(starts)) == len(starts)
+    assert len(overlays) == MAX_OVERLAYS
+    b_rolls = [o for o in overlays if o.mode == TextOverlayMode.B_ROLL_VIDEO]
+    assert len(b_rolls) == MAX_B_ROLLS
+    assert b_rolls[0].start < 900 and b_rolls[-1].start > 2700  # trải đều cả video
+    for prev, cur in zip(overlays, overlays[1:]):
+        assert cur.start >= prev.end + 3.0
+
+
+@pytest.mark.asyncio
+async def test_failed_window_does_not_drop_the_others():
+    transcript = _transcript(1800)
+    failed = plan_windows(transcript, 600, 30)[1]
+    extractor = _extractor(_FakeGemini(fail_parts=(round(failed.start),)))
+
+    extraction = await extractor.extract_detailed(transcript)
+    overlays = extraction.overlays
+
+    assert not extraction.complete
+    assert any(o.start < failed.own_start for o in overlays)
+    assert any(o.start >= failed.own_end for o in overlays)
+    assert not any(failed.own_start <= o.start < failed.own_end for o in overlays)
+
+
+@pytest.mark.asyncio
+async def test_all_windows_failing_raises():
+    transcript = _transcript(1800)
+    parts = tuple(round(w.start) for w in plan_windows(transcript, 600, 30))
+
+    with pytest.raises(RuntimeError):
+        await _extractor(_FakeGemini(fail_parts=parts)).extract(transcript)
+
+
+@pytest.mark.asyncio
+async def test_short_transcript_uses_single_prompt():
+    fake = _FakeGemini()
+
+    overlays = await _extractor(fake).extract(_transcript(60))
+
+    assert len(fake.prompts) == 1 and "covering" not in fake.prompts[0]
+    assert overlays
@@ -0,0 +1,92 @@
+"""
+Unit tests cho WordTimings — transcript words dạng cột (array-backed)
+"""
+
+import struct
+from array import array
+
+import pytest
+from pydantic import ValidationError
+
+from src.modules.video_processing.domain.value_objects import Transcript, WordSegment, WordTimings
+from src.modules.video_processing.infrastructure.transcript_codec import decode_words, encode_words
+
+SEGMENTS = [
+    WordSegment(word="Xin", start=0.0, end=0.4, confidence=0.99),
+    WordSegment(word="chào", start=0.4, end=0.9, confidence=0.95),
+    WordSegment(word="", start=1.0, end=1.0, confidence=0.0),
+    WordSegment(word="🎬", start=1.2, end=1.5, confidence=0.5),
+]
+
+
+def test_behaves_like_list_of_word_segments():
+    words = WordTimings.from_segments(SEGMENTS)
+
+    assert len(words) == 4
+    assert words[1] == SEGMENTS[1]
+    assert words[-1].word == "🎬"
+    assert list(words) == SEGMENTS
+    assert words == SEGMENTS
+    assert words[1:3] == SEGMENTS[1:3]
+    assert list(words.starts) == [0.0, 0.4, 1.0, 1.2]
+    with pytest.raises(IndexError):
+        words[4]
+
+
+def test_transcript_accepts_json_words_and_serializes_them_back():
+    transcript = Transcript(full_text="Xin chào", words=[s.model_dump() for s in SEGMENTS])
+
+    assert isinstance(transcript.words, WordTimings)
+    assert transcript.model_dump()["words"] == [s.model_dump() for s in SEGMENTS]
+    assert Transcript.model_validate_json(transcript.model_dump_json()) == transcript
+
+
+def test_transcript_rejects_incomplete_words():
+    with pytest.raises(ValueError):
+        Transcript(full_text="x", words=[{"word": "x", "start": 0.0}])
+
+
+@pytest.mark.parametrize("words", [
+    [{"word": "x", "start": None, "end": 1.0, "confidence": 0.9}],
+    [{"word": "x", "start": 0.0, "end": [1.0], "confidence": 0.9}],
+    [None],
+    [5],
+])
+def test_transcript_rejects_malformed_words_with_validation_error(words):
+    with pytest.raises(ValidationError):
+        Transcript(full_text="x", words=words)
+
+
+def test_binary_round_trip():
+    words = WordTimings.from_segments(SEGMENTS)
+
+    assert WordTimings.from_bytes(words.to_bytes()) == words
+    assert decode_words(encode_words(SEGMENTS)) == words
+
+
+def test_decodes_legacy_string_table_blobs():
+    # v1: string table + word index
+    strings = ["a", "b"]
+    blob = b"".join([
+        struct.pack("<3sBII", b"TRW", 1, 3, 2),
+        array("d", [0.0, 1.0, 2.0]).tobytes(),
+        array("d", [0.5, 1.5, 2.5]).tobytes(),
+        array("d", [0.9, 0.8, 0.7]).tobytes(),
+        array("I", [0, 1, 0]).tobytes(),
+        array("I", [1, 1]).tobytes(),
+        "".join(strings).encode(),
+    ])
+
+    words = decode_words(blob)
+
+    assert [w.word for w in words] == ["a", "b", "a"]
+    assert list(words.ends) == [0.5, 1.5, 2.5]
+
+
+def test_binary_is_smaller_than_json():
+    words = WordTimings.from_segments(
+        WordSegment(word=f"word{i % 300}", start=i * 0.3, end=i * 0.3 + 0.25, confidence=0.9)
+        for i in range(10_000)
+    )
+
+    assert len(words.to_bytes()) < len(Transcript(full_text="", words=words).model_dump_json())